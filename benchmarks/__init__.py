@@ -0,0 +1,8 @@
+"""
+Load and performance benchmarks.
+
+The harnesses here run the real bot code against local fake servers for the
+Telegram Bot API and the Remnawave panel, so they need only a PostgreSQL
+database (configured the usual way through ``.env``). Use a throwaway
+database: benchmarks create users, subscriptions and payments.
+"""
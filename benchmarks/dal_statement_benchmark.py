@@ -0,0 +1,257 @@
+"""
+Micro-benchmark for the hottest DAL lookups.
+
+Runs the real DAL functions, which build their statements with
+``lambda_stmt``, against the previous ``select()`` versions (kept below as
+the baseline). By default no database is needed: a stand-in session does
+what ``session.execute`` does on the Python side before anything goes to
+the network (build the statement, compute its cache key, fetch the
+compiled SQL from the cache and bind the parameters):
+
+    python -m benchmarks.dal_statement_benchmark --rounds 20000
+
+With ``--database`` every lookup also runs against the PostgreSQL from
+``.env``, once with asyncpg's prepared statement cache off and once with
+``DB_PREPARED_STATEMENT_CACHE_SIZE``, which shows the server-side parse and
+planning cost the cache saves per round-trip:
+
+    python -m benchmarks.dal_statement_benchmark --database --rounds 2000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config.settings import Settings
+from db.dal import payment_dal, promo_code_dal, subscription_dal, user_dal
+from db.models import Payment, PromoCode, Subscription, User
+
+from .dataset import BENCH_TELEGRAM_ID_BASE
+from .utils import format_table
+
+# (session, random.Random) -> awaitable lookup
+Lookup = Callable[[Any, random.Random], Awaitable[Any]]
+
+
+# --- baseline: a fresh select() per call --------------------------------------
+
+async def legacy_get_user_by_id(session, user_id: int):
+    stmt = select(User).where(User.user_id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def legacy_get_active_subscription_by_user_id(session, user_id: int,
+                                                    panel_user_uuid: Optional[str] = None):
+    stmt = select(Subscription).where(
+        Subscription.user_id == user_id,
+        Subscription.is_active == True,
+        Subscription.end_date > datetime.now(timezone.utc),
+    )
+    if panel_user_uuid:
+        stmt = stmt.where(Subscription.panel_user_uuid == panel_user_uuid)
+    stmt = stmt.order_by(Subscription.end_date.desc()).limit(1)
+    result = await session.execute(stmt)
+    return result.scalars().first()
+
+
+async def legacy_has_any_subscription_for_user(session, user_id: int) -> bool:
+    stmt = select(Subscription.subscription_id).where(
+        Subscription.user_id == user_id).limit(1)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
+async def legacy_get_active_promo_code_by_code_str(session, code_str: str):
+    stmt = select(PromoCode).where(
+        PromoCode.code == code_str.upper(), PromoCode.is_active == True,
+        PromoCode.current_activations < PromoCode.max_activations,
+        or_(PromoCode.valid_until == None, PromoCode.valid_until
+            > datetime.now(timezone.utc)))
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def legacy_get_payment_by_provider_payment_id(session, provider_payment_id: str):
+    stmt = select(Payment).where(
+        Payment.provider_payment_id == provider_payment_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+# -----------------------------------------------------------------------------
+
+
+def _user_id(rng: random.Random) -> int:
+    return BENCH_TELEGRAM_ID_BASE + rng.randrange(1_000_000)
+
+
+# name -> (current, baseline)
+LOOKUPS: Dict[str, Tuple[Lookup, Lookup]] = {
+    "get_user_by_id": (
+        lambda session, rng: user_dal.get_user_by_id(session, _user_id(rng)),
+        lambda session, rng: legacy_get_user_by_id(session, _user_id(rng)),
+    ),
+    "get_active_subscription_by_user_id": (
+        lambda session, rng: subscription_dal.get_active_subscription_by_user_id(
+            session, _user_id(rng)),
+        lambda session, rng: legacy_get_active_subscription_by_user_id(
+            session, _user_id(rng)),
+    ),
+    "has_any_subscription_for_user": (
+        lambda session, rng: subscription_dal.has_any_subscription_for_user(
+            session, _user_id(rng)),
+        lambda session, rng: legacy_has_any_subscription_for_user(
+            session, _user_id(rng)),
+    ),
+    "get_active_promo_code_by_code_str": (
+        lambda session, rng: promo_code_dal.get_active_promo_code_by_code_str(
+            session, f"bench{rng.randrange(10_000)}"),
+        lambda session, rng: legacy_get_active_promo_code_by_code_str(
+            session, f"bench{rng.randrange(10_000)}"),
+    ),
+    "get_payment_by_provider_payment_id": (
+        lambda session, rng: payment_dal.get_payment_by_provider_payment_id(
+            session, f"bench-{rng.randrange(1_000_000)}"),
+        lambda session, rng: legacy_get_payment_by_provider_payment_id(
+            session, f"bench-{rng.randrange(1_000_000)}"),
+    ),
+}
+
+
+class _EmptyResult:
+
+    def scalar_one_or_none(self):
+        return None
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return None
+
+
+class CompileOnlySession:
+    """``execute`` does the Python-side work of AsyncSession.execute and returns no rows."""
+
+    def __init__(self):
+        self.dialect = asyncpg_dialect()
+        self.compiled_cache: Dict[Any, Any] = {}
+        self.cache_hits = 0
+        self.executions = 0
+
+    async def execute(self, statement):
+        compiled, extracted, cache_stats = statement._compile_w_cache(
+            self.dialect, compiled_cache=self.compiled_cache, column_keys=[])
+        compiled.construct_params(extracted_parameters=extracted)
+        self.executions += 1
+        if cache_stats == self.dialect.CACHE_HIT:
+            self.cache_hits += 1
+        return _EmptyResult()
+
+
+async def time_lookup(lookup: Lookup, session: Any, rounds: int, seed: int) -> float:
+    """Microseconds per call."""
+    rng = random.Random(seed)
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        await lookup(session, rng)
+    return (time.perf_counter_ns() - started) / rounds / 1000
+
+
+async def run_compile_benchmark(args: argparse.Namespace) -> List[Sequence[object]]:
+    rows: List[Sequence[object]] = []
+    for name, (current, legacy) in LOOKUPS.items():
+        # Warm the compiled cache so both sides measure the steady state
+        legacy_session, current_session = CompileOnlySession(), CompileOnlySession()
+        await time_lookup(legacy, legacy_session, 10, args.seed)
+        await time_lookup(current, current_session, 10, args.seed)
+        baseline_us = await time_lookup(legacy, legacy_session, args.rounds, args.seed)
+        current_us = await time_lookup(current, current_session, args.rounds, args.seed)
+        rows.append([
+            name,
+            f"{baseline_us:.1f}",
+            f"{current_us:.1f}",
+            f"{baseline_us / current_us:.2f}x",
+            f"{current_session.cache_hits}/{current_session.executions}",
+        ])
+    print("Python-side cost per call (no database):")
+    print(format_table(
+        ["lookup", "select() us", "lambda us", "speedup", "compiled cache hits"], rows))
+    return rows
+
+
+async def _time_on_database(factory: async_sessionmaker, rounds: int, seed: int) -> Dict[str, float]:
+    timings = {}
+    async with factory() as session:
+        for name, (current, _legacy) in LOOKUPS.items():
+            await time_lookup(current, session, 10, seed)
+            timings[name] = await time_lookup(current, session, rounds, seed)
+    return timings
+
+
+async def run_database_benchmark(args: argparse.Namespace) -> List[Sequence[object]]:
+    settings = Settings()
+    cache_size = settings.DB_PREPARED_STATEMENT_CACHE_SIZE or 100
+    timings = {}
+    for label, size in (("off", 0), ("on", cache_size)):
+        # One connection, so every call reuses the same server session
+        engine = create_async_engine(
+            settings.DATABASE_URL,
+            pool_size=1,
+            max_overflow=0,
+            connect_args={"prepared_statement_cache_size": size,
+                          "statement_cache_size": size},
+        )
+        try:
+            factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            timings[label] = await _time_on_database(factory, args.rounds, args.seed)
+        finally:
+            await engine.dispose()
+
+    rows: List[Sequence[object]] = [[
+        name,
+        f"{timings['off'][name]:.1f}",
+        f"{timings['on'][name]:.1f}",
+        f"{timings['off'][name] / timings['on'][name]:.2f}x",
+    ] for name in LOOKUPS]
+    print(f"Round-trip per call, prepared statement cache off vs {cache_size}:")
+    print(format_table(["lookup", "off us", "cached us", "speedup"], rows))
+    return rows
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    await run_compile_benchmark(args)
+    if args.database:
+        print()
+        await run_database_benchmark(args)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.dal_statement_benchmark",
+        description="Compare the cached DAL lookups with fresh select() statements.")
+    parser.add_argument("--rounds", type=int, default=20_000,
+                        help="calls per lookup")
+    parser.add_argument("--database", action="store_true",
+                        help="also run the lookups against PostgreSQL from .env")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.rounds <= 0:
+        parser.error("--rounds must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    asyncio.run(run_benchmark(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
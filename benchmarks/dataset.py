@@ -0,0 +1,282 @@
+import random
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+# Far above real Telegram ids so benchmark rows never collide with real users
+BENCH_TELEGRAM_ID_BASE = 900_000_000_000
+# The sync benchmark owns this range and wipes it between runs
+SYNC_TELEGRAM_ID_BASE = 2 * BENCH_TELEGRAM_ID_BASE
+
+_PLATFORMS = (
+    ("Android", "Pixel 8", "14"),
+    ("iOS", "iPhone 15", "17.4"),
+    ("Windows", "Desktop", "11"),
+    ("macOS", "MacBook Air", "14.4"),
+)
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+@dataclass
+class PanelDataset:
+    """Generated Remnawave panel state: users (in panel order) and their HWID devices."""
+
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    devices: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    _by_uuid: Dict[str, Dict[str, Any]] = field(default_factory=dict,
+                                                  repr=False)
+    _by_telegram_id: Dict[int, List[Dict[str, Any]]] = field(
+        default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        users, self.users = self.users, []
+        for user in users:
+            self.add_user(user)
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        self.users.append(user)
+        self._by_uuid[user["uuid"]] = user
+        if user.get("telegramId") is not None:
+            self._by_telegram_id.setdefault(user["telegramId"], []).append(user)
+
+    def remove_user(self, user_uuid: str) -> Optional[Dict[str, Any]]:
+        user = self._by_uuid.pop(user_uuid, None)
+        if user is not None:
+            self.users.remove(user)
+            self.devices.pop(user_uuid, None)
+            self._unindex_telegram_id(user)
+        return user
+
+    def update_user(self, user: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        self._unindex_telegram_id(user)
+        user.update(changes)
+        if user.get("telegramId") is not None:
+            self._by_telegram_id.setdefault(user["telegramId"], []).append(user)
+
+    def _unindex_telegram_id(self, user: Dict[str, Any]) -> None:
+        bucket = self._by_telegram_id.get(user.get("telegramId"))
+        if bucket and user in bucket:
+            bucket.remove(user)
+
+    def get_by_uuid(self, user_uuid: str) -> Optional[Dict[str, Any]]:
+        return self._by_uuid.get(user_uuid)
+
+    def get_by_telegram_id(self, telegram_id: int) -> List[Dict[str, Any]]:
+        return list(self._by_telegram_id.get(telegram_id, ()))
+
+    def find(self, **filters: Any) -> List[Dict[str, Any]]:
+        return [
+            user for user in self.users
+            if all(user.get(key) == value for key, value in filters.items())
+        ]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = {"ACTIVE": 0, "DISABLED": 0, "EXPIRED": 0, "LIMITED": 0}
+        for user in self.users:
+            counts[user.get("status", "ACTIVE")] = counts.get(
+                user.get("status", "ACTIVE"), 0) + 1
+        return counts
+
+
+def make_panel_user(rng: random.Random,
+                    index: int,
+                    telegram_id: Optional[int],
+                    now: Optional[datetime] = None,
+                    description: str = "") -> Dict[str, Any]:
+    now = now or datetime.now(timezone.utc)
+    user_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    short_uuid = uuid.UUID(int=rng.getrandbits(128)).hex[:16]
+    traffic_limit = rng.choice((0, 50, 100, 200)) * 1024**3
+    return {
+        "uuid": user_uuid,
+        "shortUuid": short_uuid,
+        "subscriptionUuid": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "username": f"bench_{index}",
+        "telegramId": telegram_id,
+        "email": None,
+        "status": "ACTIVE",
+        "expireAt": _iso(now + timedelta(days=rng.randint(1, 365))),
+        "createdAt": _iso(now - timedelta(days=rng.randint(1, 365))),
+        "description": description,
+        "trafficLimitBytes": traffic_limit,
+        "trafficLimitStrategy": "NO_RESET",
+        "userTraffic": {
+            "usedTrafficBytes": rng.randint(0, traffic_limit or 10 * 1024**3),
+        },
+        "hwidDeviceLimit": rng.choice((None, 3, 5)),
+        "subscriptionUrl": f"https://sub.bench.local/{short_uuid}",
+    }
+
+
+def make_devices(rng: random.Random, count: int,
+                 now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    devices = []
+    for _ in range(count):
+        platform, model, os_version = rng.choice(_PLATFORMS)
+        devices.append({
+            "hwid": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "platform": platform,
+            "deviceModel": model,
+            "osVersion": os_version,
+            "userAgent": f"Happ/3.0 ({platform})",
+            "createdAt": _iso(now - timedelta(days=rng.randint(0, 90))),
+        })
+    return devices
+
+
+def generate_panel_dataset(count: int,
+                           telegram_ids: Iterable[int] = (),
+                           seed: int = 0,
+                           max_devices: int = 3) -> PanelDataset:
+    """
+    Build ``count`` panel users. The first users are bound to ``telegram_ids``
+    (one each); the rest get fresh ids from ``BENCH_TELEGRAM_ID_BASE`` upwards,
+    past the bound ones.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    bound_ids = list(telegram_ids)
+    next_free_id = max(bound_ids + [BENCH_TELEGRAM_ID_BASE]) + 1_000_000
+    dataset = PanelDataset()
+    for index in range(count):
+        if index < len(bound_ids):
+            telegram_id = bound_ids[index]
+        else:
+            telegram_id = next_free_id
+            next_free_id += 1
+        user = make_panel_user(rng, index, telegram_id, now)
+        dataset.add_user(user)
+        dataset.devices[user["uuid"]] = make_devices(
+            rng, rng.randint(0, max_devices), now)
+    return dataset
+
+
+SYNC_CATEGORIES = ("new", "changed", "no_telegram_id", "uuid_conflict",
+                   "unchanged")
+
+
+@dataclass(frozen=True)
+class SyncMix:
+    """
+    Shares of panel users by how they relate to the local database before a
+    sync; whatever is left over is ``unchanged``.
+
+    new             panel user with a telegram id unknown to the bot
+    changed         known user whose expiry, status and description differ
+    no_telegram_id  panel user without telegramId (skipped by the sync)
+    uuid_conflict   known telegram id re-created on the panel under a new
+                    UUID; the database still holds the old user/subscription UUIDs
+    """
+
+    new: float = 0.2
+    changed: float = 0.3
+    no_telegram_id: float = 0.1
+    uuid_conflict: float = 0.05
+
+    def __post_init__(self):
+        shares = (self.new, self.changed, self.no_telegram_id,
+                  self.uuid_conflict)
+        if any(share < 0 for share in shares) or sum(shares) > 1:
+            raise ValueError(
+                "Sync mix shares must be non-negative and sum to at most 1.")
+
+    def pick(self, rng: random.Random) -> str:
+        roll = rng.random()
+        for category, share in zip(SYNC_CATEGORIES,
+                                   (self.new, self.changed,
+                                    self.no_telegram_id, self.uuid_conflict)):
+            if roll < share:
+                return category
+            roll -= share
+        return "unchanged"
+
+
+@dataclass
+class SyncSeedUser:
+    """A bot database user (with one subscription) to insert before a sync."""
+
+    user_id: int
+    username: str
+    panel_user_uuid: str
+    panel_subscription_uuid: str
+    end_date: datetime
+    status: str
+
+
+@dataclass
+class SyncDataset:
+    panel: PanelDataset
+    seed_users: List[SyncSeedUser]
+    category_counts: Counter
+
+
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def generate_sync_dataset(count: int,
+                          mix: SyncMix,
+                          seed: int = 0,
+                          telegram_id_base: int = SYNC_TELEGRAM_ID_BASE,
+                          with_panel: bool = True,
+                          with_seed_users: bool = True) -> SyncDataset:
+    """
+    Deterministic panel state plus matching database seed for a sync run.
+    The same arguments always give the same users, so the panel and the
+    database side can be generated in different processes; drop the half
+    you do not need with ``with_panel`` / ``with_seed_users``.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(hour=0,
+                                             minute=0,
+                                             second=0,
+                                             microsecond=0)
+    panel = PanelDataset()
+    seed_users: List[SyncSeedUser] = []
+    category_counts: Counter = Counter()
+
+    for index in range(count):
+        category = mix.pick(rng)
+        category_counts[category] += 1
+        telegram_id = telegram_id_base + index
+        username = f"sync_{telegram_id}"
+        user = make_panel_user(
+            rng,
+            index,
+            None if category == "no_telegram_id" else telegram_id,
+            now,
+            description=username if category == "unchanged" else "")
+        stale_user_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        stale_subscription_uuid = str(
+            uuid.UUID(int=rng.getrandbits(128), version=4))
+
+        if with_panel:
+            panel.add_user(user)
+        if not with_seed_users or category in ("new", "no_telegram_id"):
+            continue
+
+        panel_expire_at = _parse_iso(user["expireAt"])
+        if category == "unchanged":
+            seed_user = SyncSeedUser(telegram_id, username, user["uuid"],
+                                     user["subscriptionUuid"],
+                                     panel_expire_at, user["status"])
+        elif category == "changed":
+            seed_user = SyncSeedUser(telegram_id, username, user["uuid"],
+                                     user["subscriptionUuid"],
+                                     panel_expire_at - timedelta(days=30),
+                                     "DISABLED")
+        else:
+            seed_user = SyncSeedUser(telegram_id, username, stale_user_uuid,
+                                     stale_subscription_uuid,
+                                     panel_expire_at, user["status"])
+        seed_users.append(seed_user)
+
+    return SyncDataset(panel=panel,
+                       seed_users=seed_users,
+                       category_counts=category_counts)
@@ -0,0 +1,248 @@
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from .dataset import PanelDataset
+from .utils import serve_app, simulate_latency
+
+API_PREFIX = "/api"
+# Not part of the panel API: lets a benchmark read counters from another process
+CONTROL_PREFIX = "/__bench"
+
+
+def _ok(payload: Any) -> web.Response:
+    return web.json_response({"response": payload})
+
+
+def _error(status: int, error_code: str, message: str) -> web.Response:
+    return web.json_response(
+        {
+            "statusCode": status,
+            "message": message,
+            "errorCode": error_code
+        },
+        status=status)
+
+
+class FakeRemnawavePanel:
+    """
+    Minimal Remnawave panel API over a generated dataset: the user, HWID
+    device and statistics endpoints PanelApiService talks to. Every request
+    is counted per route so benchmarks can report panel round trips.
+    """
+
+    def __init__(self,
+                 dataset: PanelDataset,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.request_counts: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.request_counts.values())
+
+    def reset_counters(self) -> None:
+        self.request_counts.clear()
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._count_and_delay])
+        app.router.add_get(f"{API_PREFIX}/users", self.list_users)
+        app.router.add_post(f"{API_PREFIX}/users", self.create_user)
+        app.router.add_patch(f"{API_PREFIX}/users", self.update_user)
+        app.router.add_get(f"{API_PREFIX}/users/by-telegram-id/{{telegram_id}}",
+                           self.users_by_telegram_id)
+        app.router.add_get(f"{API_PREFIX}/users/by-username/{{username}}",
+                           self.user_by_username)
+        app.router.add_get(f"{API_PREFIX}/users/by-email/{{email}}",
+                           self.users_by_email)
+        app.router.add_get(f"{API_PREFIX}/users/{{uuid}}", self.get_user)
+        app.router.add_delete(f"{API_PREFIX}/users/{{uuid}}", self.delete_user)
+        app.router.add_post(f"{API_PREFIX}/users/{{uuid}}/actions/{{action}}",
+                            self.user_action)
+        app.router.add_get(f"{API_PREFIX}/hwid/devices/{{uuid}}", self.devices)
+        app.router.add_post(f"{API_PREFIX}/hwid/devices/delete",
+                            self.delete_device)
+        app.router.add_get(f"{API_PREFIX}/system/stats", self.system_stats)
+        app.router.add_get(f"{API_PREFIX}/system/stats/bandwidth",
+                           self.bandwidth_stats)
+        app.router.add_get(f"{API_PREFIX}/system/stats/nodes", self.nodes_stats)
+        app.router.add_post(f"{API_PREFIX}/system/tools/happ/encrypt",
+                            self.encrypt_happ_link)
+        app.router.add_get(f"{CONTROL_PREFIX}/requests", self.control_requests)
+        app.router.add_post(f"{CONTROL_PREFIX}/reset", self.control_reset)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the fake panel; returns the value to use as PANEL_API_URL."""
+        self._runner, url = await serve_app(self.build_app(), host, port)
+        self.base_url = f"{url}{API_PREFIX}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _count_and_delay(self, request: web.Request, handler):
+        if request.path.startswith(CONTROL_PREFIX):
+            return await handler(request)
+        resource = request.match_info.route.resource
+        route_name = resource.canonical if resource else request.path
+        self.request_counts[f"{request.method} {route_name[len(API_PREFIX):]}"] += 1
+        await simulate_latency(self.latency_ms, self.jitter_ms)
+        return await handler(request)
+
+    async def control_requests(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.request_counts))
+
+    async def control_reset(self, request: web.Request) -> web.Response:
+        self.reset_counters()
+        return web.json_response({"ok": True})
+
+    async def list_users(self, request: web.Request) -> web.Response:
+        size = int(request.query.get("size", 25))
+        start = int(request.query.get("start", 0))
+        return _ok({
+            "users": self.dataset.users[start:start + size],
+            "total": len(self.dataset.users),
+        })
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        user = self.dataset.get_by_uuid(request.match_info["uuid"])
+        if user is None:
+            return _error(404, "A063", "User not found")
+        return _ok(user)
+
+    async def users_by_telegram_id(self, request: web.Request) -> web.Response:
+        try:
+            telegram_id = int(request.match_info["telegram_id"])
+        except ValueError:
+            return _error(400, "VALIDATION_ERROR", "Invalid telegramId")
+        users = self.dataset.get_by_telegram_id(telegram_id)
+        if not users:
+            return _error(404, "A062", "Users not found")
+        return _ok(users)
+
+    async def user_by_username(self, request: web.Request) -> web.Response:
+        users = self.dataset.find(username=request.match_info["username"])
+        if not users:
+            return _error(404, "A062", "User not found")
+        return _ok(users[0])
+
+    async def users_by_email(self, request: web.Request) -> web.Response:
+        users = self.dataset.find(email=request.match_info["email"])
+        if not users:
+            return _error(404, "A062", "Users not found")
+        return _ok(users)
+
+    async def create_user(self, request: web.Request) -> web.Response:
+        payload: Dict[str, Any] = await request.json()
+        if self.dataset.find(username=payload.get("username")):
+            return _error(400, "A019", "User username already exists")
+        short_uuid = uuid.uuid4().hex[:16]
+        user = {
+            "uuid": str(uuid.uuid4()),
+            "shortUuid": short_uuid,
+            "subscriptionUuid": str(uuid.uuid4()),
+            "telegramId": None,
+            "email": None,
+            "description": "",
+            "trafficLimitBytes": 0,
+            "userTraffic": {
+                "usedTrafficBytes": 0
+            },
+            "hwidDeviceLimit": None,
+            "subscriptionUrl": f"https://sub.bench.local/{short_uuid}",
+        }
+        user.update(payload)
+        self.dataset.add_user(user)
+        self.dataset.devices[user["uuid"]] = []
+        return _ok(user)
+
+    async def update_user(self, request: web.Request) -> web.Response:
+        payload: Dict[str, Any] = await request.json()
+        user = self.dataset.get_by_uuid(payload.get("uuid", ""))
+        if user is None:
+            return _error(404, "A063", "User not found")
+        self.dataset.update_user(user, payload)
+        return _ok(user)
+
+    async def delete_user(self, request: web.Request) -> web.Response:
+        if self.dataset.remove_user(request.match_info["uuid"]) is None:
+            return _error(404, "A063", "User not found")
+        return _ok({"isDeleted": True})
+
+    async def user_action(self, request: web.Request) -> web.Response:
+        user = self.dataset.get_by_uuid(request.match_info["uuid"])
+        if user is None:
+            return _error(404, "A063", "User not found")
+        action = request.match_info["action"]
+        if action not in ("enable", "disable"):
+            return _error(400, "VALIDATION_ERROR", "Unknown action")
+        user["status"] = "ACTIVE" if action == "enable" else "DISABLED"
+        return _ok(user)
+
+    async def devices(self, request: web.Request) -> web.Response:
+        devices = self.dataset.devices.get(request.match_info["uuid"], [])
+        return _ok({"total": len(devices), "devices": devices})
+
+    async def delete_device(self, request: web.Request) -> web.Response:
+        payload: Dict[str, Any] = await request.json()
+        devices = self.dataset.devices.get(payload.get("userUuid", ""), [])
+        devices[:] = [
+            device for device in devices if device["hwid"] != payload.get("hwid")
+        ]
+        return _ok({"total": len(devices), "devices": devices})
+
+    async def system_stats(self, request: web.Request) -> web.Response:
+        counts = self.dataset.status_counts()
+        return _ok({
+            "users": {
+                "statusCounts": counts,
+                "totalUsers": len(self.dataset.users),
+            },
+            "onlineStats": {
+                "onlineNow": counts.get("ACTIVE", 0) // 10,
+            },
+            "memory": {
+                "total": 8 * 1024**3,
+                "used": 3 * 1024**3,
+            },
+            "nodes": {
+                "totalOnline": 3
+            },
+        })
+
+    async def bandwidth_stats(self, request: web.Request) -> web.Response:
+        return _ok({
+            "bandwidthLastSevenDays": {
+                "current": "1.2 TB",
+                "previous": "1.1 TB"
+            },
+            "bandwidthLast30Days": {
+                "current": "4.8 TB",
+                "previous": "4.5 TB"
+            },
+        })
+
+    async def nodes_stats(self, request: web.Request) -> web.Response:
+        return _ok({
+            "lastSevenDays": [{
+                "nodeName": f"node-{index}",
+                "date": "2024-01-01",
+                "totalBytes": 1024**4
+            } for index in range(3)]
+        })
+
+    async def encrypt_happ_link(self, request: web.Request) -> web.Response:
+        payload: Dict[str, Any] = await request.json()
+        link = payload.get("linkToEncrypt", "")
+        return _ok({"encryptedLink": f"happ://crypt4/{uuid.uuid5(uuid.NAMESPACE_URL, link).hex}"})
@@ -0,0 +1,208 @@
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from .utils import serve_app, simulate_latency
+
+BENCH_BOT_ID = 100_000_001
+BENCH_BOT_USERNAME = "bench_shop_bot"
+
+# Answered with a Message object; everything else not listed below gets True
+_MESSAGE_METHODS = {
+    "sendMessage",
+    "editMessageText",
+    "editMessageCaption",
+    "editMessageReplyMarkup",
+    "editMessageMedia",
+    "sendPhoto",
+    "sendDocument",
+    "sendVideo",
+    "sendAnimation",
+    "sendInvoice",
+    "forwardMessage",
+}
+# Never throttled, so setup calls cannot fail because of injected 429s
+_UNTHROTTLED_METHODS = {"getMe", "getWebhookInfo", "setWebhook", "deleteWebhook"}
+
+
+@dataclass
+class RecordedCall:
+    method: str
+    params: Dict[str, Any]
+    at: float
+    throttled: bool
+
+
+def _decode_value(value: Any) -> Any:
+    # aiogram sends nested objects (reply_markup, prices, ...) as JSON strings
+    if not isinstance(value, str):
+        return value
+    if value[:1] in ("{", "[") or value in ("true", "false", "null"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+class FakeTelegramBotApi:
+    """
+    Local stand-in for api.telegram.org. Records every outbound call, answers
+    with plausible objects, and can add latency or reply 429 Too Many
+    Requests to a fraction of calls to exercise retry paths.
+    """
+
+    def __init__(self,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 flood_rate: float = 0.0,
+                 retry_after: int = 1,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls: List[RecordedCall] = []
+        self.method_counts: Counter = Counter()
+        self.throttled_counts: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._message_ids = itertools.count(1000)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.method_counts.values())
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.method_counts.clear()
+        self.throttled_counts.clear()
+
+    def last_call(self, method: str, chat_id: Optional[int] = None) -> Optional[RecordedCall]:
+        for call in reversed(self.calls):
+            if call.method != method or call.throttled:
+                continue
+            if chat_id is None or str(call.params.get("chat_id")) == str(chat_id):
+                return call
+        return None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the fake API; returns the base URL for TelegramAPIServer.from_base."""
+        self._runner, self.base_url = await serve_app(self.build_app(), host,
+                                                      port)
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form = await request.post()
+        params = {key: _decode_value(value) for key, value in form.items()}
+
+        await simulate_latency(self.latency_ms, self.jitter_ms)
+
+        throttled = (method not in _UNTHROTTLED_METHODS and self.flood_rate > 0
+                     and self._rng.random() < self.flood_rate)
+        self.calls.append(
+            RecordedCall(method=method,
+                         params=params,
+                         at=time.monotonic(),
+                         throttled=throttled))
+        self.method_counts[method] += 1
+        if throttled:
+            self.throttled_counts[method] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description":
+                    f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {
+                        "retry_after": self.retry_after
+                    },
+                },
+                status=429)
+
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _bot_user(self) -> Dict[str, Any]:
+        return {
+            "id": BENCH_BOT_ID,
+            "is_bot": True,
+            "first_name": "Bench Shop",
+            "username": BENCH_BOT_USERNAME,
+        }
+
+    def _message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = params.get("chat_id")
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            chat_id = 0
+        message_id = params.get("message_id")
+        message: Dict[str, Any] = {
+            "message_id": int(message_id) if message_id else next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {
+                "id": chat_id,
+                "type": "private"
+            },
+            "from": self._bot_user(),
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        if isinstance(params.get("reply_markup"), dict):
+            message["reply_markup"] = params["reply_markup"]
+        return message
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getMe":
+            return dict(self._bot_user(),
+                        can_join_groups=True,
+                        can_read_all_group_messages=False,
+                        supports_inline_queries=True)
+        if method in _MESSAGE_METHODS:
+            if "inline_message_id" in params:
+                return True
+            return self._message(params)
+        if method == "copyMessage":
+            return {"message_id": next(self._message_ids)}
+        if method == "getChatMember":
+            return {
+                "status": "member",
+                "user": {
+                    "id": int(params.get("user_id", 0)),
+                    "is_bot": False,
+                    "first_name": "Bench",
+                },
+            }
+        if method == "getChat":
+            return {"id": int(params.get("chat_id", 0)), "type": "private"}
+        if method == "getWebhookInfo":
+            return {
+                "url": "",
+                "has_custom_certificate": False,
+                "pending_update_count": 0
+            }
+        if method == "createInvoiceLink":
+            return f"https://t.me/$bench{next(self._message_ids)}"
+        if method == "exportChatInviteLink":
+            return "https://t.me/+bench"
+        return True
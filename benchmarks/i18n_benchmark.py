@@ -0,0 +1,153 @@
+"""
+Micro-benchmark for JsonI18n.gettext.
+
+Compares the compiled catalog with the previous lookup (fallback chain
+resolved, dict lookups and ``str.format(**kwargs)`` on every call, kept
+below as the baseline) over every key of the real locale files:
+
+    static    strings without placeholders, called without arguments
+    params    strings with placeholders, called with every argument
+    fallback  static strings for a language that is not loaded
+
+    python -m benchmarks.i18n_benchmark --rounds 200
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from bot.middlewares.i18n import CompiledMessage, JsonI18n
+
+from .utils import format_table
+
+# (key, kwargs) pairs one round calls gettext with
+Calls = List[Tuple[str, Dict[str, Any]]]
+
+
+def legacy_gettext(i18n: JsonI18n, lang_code: Optional[str], key: str,
+                   **kwargs) -> str:
+    """The lookup JsonI18n did before the catalog was compiled at load time."""
+    locales_data = i18n.locales_data
+    if lang_code and lang_code in locales_data:
+        effective_lang_code = lang_code
+    elif i18n.default_lang in locales_data:
+        effective_lang_code = i18n.default_lang
+    elif "en" in locales_data:
+        effective_lang_code = "en"
+    else:
+        effective_lang_code = lang_code or i18n.default_lang
+
+    lang_data = locales_data.get(effective_lang_code)
+    if lang_data is None:
+        return key.format(**kwargs) if kwargs else key
+    text = lang_data.get(key)
+    if text is None:
+        if effective_lang_code != i18n.default_lang:
+            text = locales_data.get(i18n.default_lang, {}).get(key)
+        if text is None:
+            return key.format(**kwargs) if kwargs else key
+    try:
+        return text.format(**kwargs) if kwargs else text
+    except KeyError:
+        return text
+    except Exception:
+        return text
+
+
+def build_calls(i18n: JsonI18n, lang: str) -> Dict[str, Calls]:
+    static: Calls = []
+    params: Calls = []
+    for key, text in sorted(i18n.locales_data.get(lang, {}).items()):
+        message = CompiledMessage(text)
+        if message.error:
+            continue
+        if message.fields:
+            # 1 renders under every format spec the locales use (.2f, .1f)
+            params.append((key, {field: 1 for field in message.fields}))
+        else:
+            static.append((key, {}))
+    return {"static": static, "params": params, "fallback": static}
+
+
+def time_calls(gettext: Callable[..., str], lang: str, calls: Calls,
+               rounds: int) -> float:
+    """Nanoseconds per call, best of three runs."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter_ns()
+        for _ in range(rounds):
+            for key, kwargs in calls:
+                gettext(lang, key, **kwargs)
+        best = min(best, (time.perf_counter_ns() - started) / (rounds * len(calls)))
+    return best
+
+
+def check_equivalence(i18n: JsonI18n, lang: str, cases: Dict[str, Calls]) -> int:
+    """Number of calls where the compiled catalog differs from the baseline."""
+    mismatches = 0
+    for case_lang, calls in ((lang, cases["static"]), (lang, cases["params"]),
+                             ("zz", cases["fallback"])):
+        for key, kwargs in calls:
+            if (i18n.gettext(case_lang, key, **kwargs)
+                    != legacy_gettext(i18n, case_lang, key, **kwargs)):
+                mismatches += 1
+    return mismatches
+
+
+def run_benchmark(args: argparse.Namespace) -> List[Sequence[object]]:
+    i18n = JsonI18n(path=args.locales, default=args.default_lang)
+    cases = build_calls(i18n, args.lang)
+    mismatches = check_equivalence(i18n, args.lang, cases)
+
+    compiled_gettext = i18n.gettext
+
+    def baseline_gettext(lang_code, key, **kwargs):
+        return legacy_gettext(i18n, lang_code, key, **kwargs)
+
+    rows: List[Sequence[object]] = []
+    for case, calls in cases.items():
+        if not calls:
+            continue
+        lang = "zz" if case == "fallback" else args.lang
+        baseline_ns = time_calls(baseline_gettext, lang, calls, args.rounds)
+        compiled_ns = time_calls(compiled_gettext, lang, calls, args.rounds)
+        rows.append([
+            case,
+            len(calls),
+            f"{baseline_ns:.0f}",
+            f"{compiled_ns:.0f}",
+            f"{baseline_ns / compiled_ns:.2f}x",
+        ])
+
+    print(format_table(["case", "keys", "baseline ns", "compiled ns", "speedup"],
+                       rows))
+    print(f"Outputs differing from the baseline: {mismatches}")
+    return rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.i18n_benchmark",
+        description="Compare JsonI18n.gettext with the pre-compiled-catalog lookup.")
+    parser.add_argument("--locales", default="locales")
+    parser.add_argument("--lang", default="ru", help="language to look keys up in")
+    parser.add_argument("--default-lang", default="ru")
+    parser.add_argument("--rounds", type=int, default=200,
+                        help="passes over all keys per measurement")
+    args = parser.parse_args(argv)
+    if args.rounds <= 0:
+        parser.error("--rounds must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    # Missing-key warnings would only measure the logging module
+    logging.basicConfig(level=logging.ERROR, stream=sys.stdout)
+    run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Replay-based load harness for the bot.
+
+Runs the production Dispatcher (build_dispatcher + build_core_services +
+build_root_router) behind aiogram's SimpleRequestHandler and replays
+synthetic webhook updates for a crowd of virtual users: /start, main menu
+callbacks, subscription views, promo code entry and the Telegram Stars
+payment flow. Outbound Bot API calls go to FakeTelegramBotApi, panel calls to
+FakeRemnawavePanel; only PostgreSQL is real.
+
+    python -m benchmarks.load_harness --users 200 --concurrency 50
+
+Reports throughput and p50/p95/p99 latency per handler step, plus Bot API
+and panel call counts. A step counts as an error when the webhook request
+fails, the handler raises, or an error with a traceback is logged while the
+update is handled (many handlers catch and log their exceptions).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import ErrorEvent, Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from sqlalchemy.orm import sessionmaker
+
+from bot.app.controllers.dispatcher_controller import build_dispatcher
+from bot.app.factories.build_services import build_core_services
+from bot.handlers.admin.sync_admin import perform_sync
+from bot.services.bot_identity_service import BotIdentityService
+from bot.routers import build_root_router
+from bot.utils.message_queue import init_queue_manager
+from config.settings import Settings
+from db import database_setup
+
+from .dataset import BENCH_TELEGRAM_ID_BASE, generate_panel_dataset
+from .fake_panel import FakeRemnawavePanel
+from .fake_telegram import BENCH_BOT_ID, BENCH_BOT_USERNAME, FakeTelegramBotApi
+from .scenarios import Scenario, ScenarioContext, VirtualUser, build_scenarios
+from .stats import LatencyRecorder
+from .utils import format_counter, serve_app
+
+BENCH_BOT_TOKEN = f"{BENCH_BOT_ID}:BENCHbenchBENCHbenchBENCHbenchBENCH0"
+DEFAULT_STARS_PRICE = 100
+DEFAULT_RUB_PRICE = 100.0
+
+SERVICE_KEYS_TO_CLOSE = (
+    "panel_service",
+    "cryptopay_service",
+    "freekassa_service",
+    "panel_webhook_service",
+    "yookassa_service",
+    "stars_service",
+    "platega_service",
+    "severpay_service",
+)
+
+
+def build_bench_settings(panel_api_url: str) -> Settings:
+    """
+    Settings from the environment (database, prices, features) with the bot
+    token, panel and webhook pointed at the local fakes, and a Stars price
+    for one month guaranteed so the payment scenario has something to buy.
+    """
+    env_settings = Settings(BOT_TOKEN=BENCH_BOT_TOKEN)
+    return Settings(
+        BOT_TOKEN=BENCH_BOT_TOKEN,
+        PANEL_API_URL=panel_api_url,
+        PANEL_API_KEY="bench",
+        WEBHOOK_BASE_URL="http://127.0.0.1",
+        STARS_ENABLED=True,
+        MONTH_1_ENABLED=True,
+        STARS_PRICE_1_MONTH=env_settings.STARS_PRICE_1_MONTH or DEFAULT_STARS_PRICE,
+        RUB_PRICE_1_MONTH=env_settings.RUB_PRICE_1_MONTH or DEFAULT_RUB_PRICE,
+    )
+
+
+_current_update_id: ContextVar[Optional[int]] = ContextVar("bench_update_id", default=None)
+
+
+class UpdateErrorTracker(logging.Handler):
+    """
+    Ids of updates whose handling raised (seen by the dispatcher's errors
+    observer) or logged an error with a traceback.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.failed_update_ids: Set[int] = set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        update_id = _current_update_id.get()
+        if update_id is not None and record.exc_info:
+            self.failed_update_ids.add(update_id)
+
+    async def track_update(self, handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+                           event: Update, data: Dict[str, Any]) -> Any:
+        token = _current_update_id.set(event.update_id)
+        try:
+            return await handler(event, data)
+        finally:
+            _current_update_id.reset(token)
+
+    async def on_error(self, event: ErrorEvent) -> Any:
+        self.failed_update_ids.add(event.update.update_id)
+        # Leave the exception to aiogram as without the tracker
+        return UNHANDLED
+
+    def install(self, dp: Dispatcher) -> None:
+        dp.update.outer_middleware(self.track_update)
+        dp.errors.register(self.on_error)
+        logging.getLogger().addHandler(self)
+
+    def uninstall(self) -> None:
+        logging.getLogger().removeHandler(self)
+
+
+async def build_bench_dispatcher(settings: Settings,
+                                 async_session_factory: sessionmaker,
+                                 telegram_api_url: str) -> tuple[Dispatcher, Bot]:
+    """Wire the dispatcher exactly as run_bot does, with the Bot API redirected."""
+    dp, bot, extra = build_dispatcher(settings, async_session_factory)
+    bench_session = AiohttpSession(
+        api=TelegramAPIServer.from_base(telegram_api_url))
+    # Keep the request middlewares build_dispatcher registered (tracing)
+    bench_session.middleware = bot.session.middleware
+    bot.session = bench_session
+
+    services = build_core_services(settings, bot, async_session_factory,
+                                   extra["i18n_instance"], BENCH_BOT_USERNAME)
+    for key, service in services.items():
+        dp[key] = service
+    bot_identity_service = BotIdentityService(
+        bot, settings.BOT_IDENTITY_REFRESH_SECONDS)
+    await bot_identity_service.load()
+    dp["bot_identity_service"] = bot_identity_service
+    dp["async_session_factory"] = async_session_factory
+    dp["queue_manager"] = init_queue_manager(bot)
+    dp.include_router(build_root_router(settings))
+    return dp, bot
+
+
+async def close_bench_dispatcher(dp: Dispatcher, bot: Bot) -> None:
+    for key in SERVICE_KEYS_TO_CLOSE:
+        service = dp.get(key)
+        close = getattr(service, "close", None) or getattr(
+            service, "close_session", None)
+        if callable(close):
+            try:
+                await close()
+            except Exception as e:
+                logging.warning(f"Failed to close {key}: {e}")
+    await bot.session.close()
+
+
+async def seed_from_panel(dp: Dispatcher, settings: Settings,
+                          async_session_factory: sessionmaker) -> float:
+    """Import the fake panel's users (and their subscriptions) into the database."""
+    started = time.perf_counter()
+    async with async_session_factory() as session:
+        result = await perform_sync(panel_service=dp["panel_service"],
+                                    session=session,
+                                    settings=settings,
+                                    i18n_instance=dp["i18n_instance"])
+    if result.get("status") != "completed":
+        logging.warning(f"Seeding sync finished with status {result.get('status')}: "
+                        f"{result.get('details')}")
+    return time.perf_counter() - started
+
+
+async def replay_user(http: aiohttp.ClientSession, webhook_url: str,
+                      user: VirtualUser, scenarios: List[Scenario],
+                      iterations: int, ctx: ScenarioContext,
+                      recorder: LatencyRecorder,
+                      error_tracker: UpdateErrorTracker) -> None:
+    for _ in range(iterations):
+        for scenario in scenarios:
+            for step in scenario.steps:
+                update = step.build(user, ctx)
+                if update is None:
+                    # e.g. no invoice to pay because sendInvoice got a 429
+                    recorder.record(step.name, 0.0, ok=False)
+                    continue
+                started = time.perf_counter()
+                try:
+                    async with http.post(webhook_url, json=update) as response:
+                        await response.read()
+                        ok = response.status == 200
+                except aiohttp.ClientError as e:
+                    logging.warning(f"Update {update['update_id']} failed: {e}")
+                    ok = False
+                if update["update_id"] in error_tracker.failed_update_ids:
+                    ok = False
+                recorder.record(step.name, time.perf_counter() - started, ok)
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    virtual_users = [
+        VirtualUser(user_id=BENCH_TELEGRAM_ID_BASE + args.id_offset + index,
+                    language_code="ru" if index % 2 == 0 else "en")
+        for index in range(args.users)
+    ]
+    subscribed_count = int(len(virtual_users) * args.subscribed_ratio)
+    dataset = generate_panel_dataset(
+        max(args.panel_users, subscribed_count),
+        telegram_ids=[user.user_id for user in virtual_users[:subscribed_count]],
+        seed=args.seed)
+
+    telegram = FakeTelegramBotApi(latency_ms=args.tg_latency_ms,
+                                  jitter_ms=args.tg_jitter_ms,
+                                  flood_rate=args.tg_flood_rate,
+                                  retry_after=args.tg_retry_after,
+                                  seed=args.seed)
+    panel = FakeRemnawavePanel(dataset,
+                               latency_ms=args.panel_latency_ms,
+                               jitter_ms=args.panel_jitter_ms)
+    telegram_url = await telegram.start()
+    panel_url = await panel.start()
+
+    settings = build_bench_settings(panel_url)
+    async_session_factory = database_setup.init_db_connection(settings)
+    await database_setup.init_db(settings, async_session_factory)
+
+    dp, bot = await build_bench_dispatcher(settings, async_session_factory,
+                                           telegram_url)
+    error_tracker = UpdateErrorTracker()
+    error_tracker.install(dp)
+    app = web.Application()
+    webhook_path = f"/{settings.BOT_TOKEN}"
+    SimpleRequestHandler(dispatcher=dp, bot=bot,
+                         handle_in_background=False).register(app, webhook_path)
+    setup_application(app, dp, bot=bot)
+    runner, bot_url = await serve_app(app)
+
+    all_scenarios = build_scenarios()
+    scenarios = [all_scenarios[name] for name in args.scenarios]
+    ctx = ScenarioContext(telegram=telegram,
+                          months=1,
+                          stars_price=settings.STARS_PRICE_1_MONTH)
+    recorder = LatencyRecorder()
+    summary: Dict[str, Any] = {}
+
+    try:
+        if not args.no_seed and subscribed_count:
+            summary["seed_sync_seconds"] = await seed_from_panel(
+                dp, settings, async_session_factory)
+        telegram.reset_counters()
+        panel.reset_counters()
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as http:
+
+            async def limited(user: VirtualUser) -> None:
+                async with semaphore:
+                    await replay_user(http, f"{bot_url}{webhook_path}", user,
+                                      scenarios, args.iterations, ctx, recorder,
+                                      error_tracker)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(limited(user) for user in virtual_users))
+            wall_seconds = time.perf_counter() - started
+
+        summary.update({
+            "wall_seconds": wall_seconds,
+            "updates": recorder.total,
+            "updates_per_second": recorder.total / wall_seconds if wall_seconds else 0.0,
+            "handlers": [asdict(item) for item in recorder.summarize(wall_seconds)],
+            "telegram_calls": dict(telegram.method_counts),
+            "telegram_throttled": dict(telegram.throttled_counts),
+            "panel_requests": dict(panel.request_counts),
+        })
+        print(recorder.format(wall_seconds))
+        print()
+        print(f"Updates: {recorder.total} in {wall_seconds:.2f}s "
+              f"({summary['updates_per_second']:.1f}/s), "
+              f"{args.users} users x {args.iterations} iteration(s), "
+              f"concurrency {args.concurrency}")
+        if "seed_sync_seconds" in summary:
+            print(f"Seed sync: {summary['seed_sync_seconds']:.2f}s "
+                  f"for {len(dataset.users)} panel users")
+        print(f"Bot API calls: {telegram.total_calls} "
+              f"({format_counter(telegram.method_counts)}); "
+              f"429 injected: {sum(telegram.throttled_counts.values())}")
+        print(f"Panel requests: {panel.total_requests} "
+              f"({format_counter(panel.request_counts)})")
+    finally:
+        error_tracker.uninstall()
+        await runner.cleanup()
+        await close_bench_dispatcher(dp, bot)
+        await telegram.close()
+        await panel.close()
+        if database_setup.async_engine is not None:
+            await database_setup.async_engine.dispose()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    scenario_names = list(build_scenarios())
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_harness",
+        description="Replay synthetic webhook updates through the real dispatcher.")
+    parser.add_argument("--users", type=int, default=100,
+                        help="virtual Telegram users")
+    parser.add_argument("--iterations", type=int, default=1,
+                        help="how many times each user repeats the scenarios")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="users replaying at the same time")
+    parser.add_argument("--scenarios", default=",".join(scenario_names),
+                        help=f"comma-separated, in order; from {', '.join(scenario_names)}")
+    parser.add_argument("--subscribed-ratio", type=float, default=0.5,
+                        help="share of users that already exist on the panel")
+    parser.add_argument("--panel-users", type=int, default=1000,
+                        help="size of the generated panel dataset")
+    parser.add_argument("--no-seed", action="store_true",
+                        help="skip importing panel users into the database first")
+    parser.add_argument("--id-offset", type=int, default=0,
+                        help="shift virtual user ids to start from a clean slate")
+    parser.add_argument("--tg-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tg-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tg-flood-rate", type=float, default=0.0,
+                        help="fraction of Bot API calls answered with 429")
+    parser.add_argument("--tg-retry-after", type=int, default=1)
+    parser.add_argument("--panel-latency-ms", type=float, default=0.0)
+    parser.add_argument("--panel-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in scenario_names]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.WARNING),
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        stream=sys.stdout)
+    asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    main()
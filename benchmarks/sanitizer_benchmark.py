@@ -0,0 +1,225 @@
+"""
+Micro-benchmark for the profile field sanitizers.
+
+Generates realistic Telegram names (Latin, Cyrillic, accented, CJK, emoji,
+decorative Unicode, plus spam-like names with links and service words) and
+compares sanitize_username / sanitize_display_name with the previous
+implementation, which ran every pattern separately (kept below as the
+baseline):
+
+    cold    each distinct name once, LRU cleared
+    warm    the same names again, as ProfileSyncMiddleware sees them
+
+    python -m benchmarks.sanitizer_benchmark --names 20000
+"""
+
+import argparse
+import random
+import re
+import time
+import unicodedata
+from typing import Callable, List, Optional, Sequence
+
+from bot.utils import text_sanitizer
+from bot.utils.text_sanitizer import sanitize_display_name, sanitize_username
+
+from .utils import format_table
+
+_FIRST_NAMES = [
+    "Alex", "Maria", "Иван", "Екатерина", "Дмитрий", "Ольга", "José", "Zoë",
+    "François", "Łukasz", "Ömer", "Nguyễn", "Мухаммад", "Айгерим", "Олександр",
+    "Георгий", "李", "さくら", "김민준", "محمد", "Δημήτρης", "Ανна",
+]
+_LAST_NAMES = [
+    "Smith", "Иванов", "Петрова", "García", "Müller", "Kowalski", "Ким",
+    "Şahin", "Trần", "Сидоренко", "王", "田中", "", "", "",
+]
+_DECORATIONS = ["", "", "", " 🔥", " ✨", "🌸", " | VPN", " 🇷🇺", " 👑", "ᅠ"]
+_STYLED_ALPHABETS = [
+    # Mathematical bold / script letters, folded by NFKD
+    "𝐀𝐁𝐂𝐃𝐄𝐅𝐆𝐇𝐈𝐉𝐊𝐋𝐌𝐍𝐎𝐏𝐐𝐑𝐒𝐓𝐔𝐕𝐖𝐗𝐘𝐙",
+    "𝓐𝓑𝓒𝓓𝓔𝓕𝓖𝓗𝓘𝓙𝓚𝓛𝓜𝓝𝓞𝓟𝓠𝓡𝓢𝓣𝓤𝓥𝓦𝓧𝓨𝓩",
+    "ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ",
+]
+_SPAM_NAMES = [
+    "Telegram Support", "ТЕЛЕГРАМ поддержка", "t.me/+abcdef", "Служба безопасности",
+    "T e l e g r a m", "tеlеgrаm", "Notification Service", "joinchat/XYZ",
+    "https://example.com", "www.free-vpn.ru", "t • m e/channel", "Модерация",
+    "teIegram", "Spam Report", "Security Review",
+]
+
+
+def _styled(name: str, rng: random.Random) -> str:
+    alphabet = rng.choice(_STYLED_ALPHABETS)
+    return "".join(
+        alphabet[ord(ch.upper()) - ord("A")] if "A" <= ch.upper() <= "Z" else ch
+        for ch in name)
+
+
+def generate_names(count: int, spam_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    names = []
+    for index in range(count):
+        if rng.random() < spam_ratio:
+            name = rng.choice(_SPAM_NAMES)
+        else:
+            name = (f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}".strip()
+                    + rng.choice(_DECORATIONS))
+            if rng.random() < 0.05:
+                name = _styled(name, rng)
+        # Keep names distinct so the cold pass really misses the cache
+        names.append(f"{name} {index}" if rng.random() < 0.5 else f"{name}{index}")
+    return names
+
+
+def generate_usernames(count: int, spam_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    usernames = []
+    for index in range(count):
+        if rng.random() < spam_ratio:
+            base = rng.choice(["telegram_support", "tme_news", "security_bot",
+                               "notification", "spam_report"])
+        else:
+            base = rng.choice(["alex", "maria", "ivan_petrov", "dima", "olga_k",
+                               "jose", "zoe", "vpn_user", "cool_guy"])
+        usernames.append(f"{base}{index}")
+    return usernames
+
+
+# --- baseline: one pass per pattern -----------------------------------------
+
+_LEGACY_PATTERNS = (text_sanitizer._URL_PATTERNS
+                    + text_sanitizer._OBFUSCATED_DOMAIN_PATTERNS
+                    + text_sanitizer._ENGLISH_SERVICE_PATTERNS
+                    + text_sanitizer._RUSSIAN_SERVICE_PATTERNS)
+
+
+def _legacy_normalize(value: str) -> str:
+    if not value:
+        return ""
+    normalized = unicodedata.normalize("NFKD", value)
+    normalized = normalized.translate(text_sanitizer._PRE_LOWER_TRANSLATION)
+    normalized = normalized.lower()
+    normalized = "".join(ch for ch in normalized
+                         if unicodedata.category(ch) != "Mn")
+    normalized = normalized.translate(text_sanitizer._POST_LOWER_TRANSLATION)
+    normalized = normalized.replace("rn", "m")
+    pattern = rf"[{re.escape(text_sanitizer._OBFUSCATION_CHARS)}\s]+"
+    normalized = re.sub(pattern, "", normalized)
+    return re.sub(r"[^a-z0-9]+", "", normalized)
+
+
+def _legacy_finalize(value: str) -> Optional[str]:
+    for pattern in _LEGACY_PATTERNS:
+        value = pattern.sub(" ", value)
+    compacted = re.sub(r"\s+", " ", value)
+    compacted = compacted.strip(" \t\r\n-_.,/\\").strip()
+    if not compacted:
+        return None
+    normalized = _legacy_normalize(compacted)
+    if any(token in normalized
+           for token in text_sanitizer._NORMALIZED_BANNED_TOKENS):
+        return None
+    return compacted
+
+
+def legacy_sanitize_display_name(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return _legacy_finalize(value.replace("@", " "))
+
+
+def legacy_sanitize_username(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return _legacy_finalize(value.strip().lstrip("@"))
+
+
+# -----------------------------------------------------------------------------
+
+
+def _clear_caches() -> None:
+    sanitize_display_name.cache_clear()
+    sanitize_username.cache_clear()
+
+
+def time_pass(func: Callable[[str], Optional[str]],
+              values: Sequence[str]) -> float:
+    """Microseconds per value."""
+    started = time.perf_counter_ns()
+    for value in values:
+        func(value)
+    return (time.perf_counter_ns() - started) / len(values) / 1000
+
+
+def find_mismatches(names: Sequence[str], usernames: Sequence[str]) -> List[str]:
+    _clear_caches()
+    mismatches = []
+    for value in names:
+        if sanitize_display_name(value) != legacy_sanitize_display_name(value):
+            mismatches.append(value)
+    for value in usernames:
+        if sanitize_username(value) != legacy_sanitize_username(value):
+            mismatches.append(value)
+    return mismatches
+
+
+def run_benchmark(args: argparse.Namespace) -> List[Sequence[object]]:
+    names = generate_names(args.names, args.spam_ratio, args.seed)
+    usernames = generate_usernames(args.names, args.spam_ratio, args.seed)
+    mismatches = find_mismatches(names, usernames)
+
+    rows: List[Sequence[object]] = []
+    for label, current, legacy, values in (
+            ("display name", sanitize_display_name,
+             legacy_sanitize_display_name, names),
+            ("username", sanitize_username, legacy_sanitize_username,
+             usernames),
+    ):
+        baseline_us = time_pass(legacy, values)
+        _clear_caches()
+        # The cache only holds SANITIZE_CACHE_SIZE names; warm the tail
+        cold_us = time_pass(current, values)
+        warm_values = values[-text_sanitizer.SANITIZE_CACHE_SIZE:]
+        warm_us = time_pass(current, warm_values)
+        rows.append([
+            label,
+            len(values),
+            f"{baseline_us:.2f}",
+            f"{cold_us:.2f}",
+            f"{warm_us:.3f}",
+            f"{baseline_us / cold_us:.2f}x",
+            f"{baseline_us / warm_us:.0f}x",
+        ])
+
+    print(format_table([
+        "field", "values", "baseline us", "cold us", "warm us", "cold speedup",
+        "warm speedup"
+    ], rows))
+    print(f"Outputs differing from the baseline: {len(mismatches)}")
+    for value in mismatches[:10]:
+        print(f"  {value!r}")
+    return rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.sanitizer_benchmark",
+        description="Compare the profile sanitizers with the per-pattern baseline.")
+    parser.add_argument("--names", type=int, default=20_000,
+                        help="distinct display names and usernames to generate")
+    parser.add_argument("--spam-ratio", type=float, default=0.05,
+                        help="share of names with links or service words")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.names <= 0:
+        parser.error("--names must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    run_benchmark(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .fake_telegram import BENCH_BOT_ID, BENCH_BOT_USERNAME, FakeTelegramBotApi
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+_callback_ids = itertools.count(1)
+_charge_ids = itertools.count(1)
+# Charge ids must not repeat those of earlier runs against the same database
+_charge_run = int(time.time())
+
+
+@dataclass
+class VirtualUser:
+    user_id: int
+    language_code: str = "ru"
+
+    @property
+    def first_name(self) -> str:
+        return f"Bench{self.user_id % 100_000}"
+
+    @property
+    def username(self) -> str:
+        return f"bench_{self.user_id}"
+
+    def as_telegram_user(self) -> Dict[str, Any]:
+        return {
+            "id": self.user_id,
+            "is_bot": False,
+            "first_name": self.first_name,
+            "username": self.username,
+            "language_code": self.language_code,
+        }
+
+    def as_chat(self) -> Dict[str, Any]:
+        return {
+            "id": self.user_id,
+            "type": "private",
+            "first_name": self.first_name,
+            "username": self.username,
+        }
+
+
+@dataclass
+class ScenarioContext:
+    """What step builders may look at: the fake Bot API and the bench prices."""
+
+    telegram: FakeTelegramBotApi
+    months: int
+    stars_price: int
+
+
+UpdateBuilder = Callable[[VirtualUser, ScenarioContext], Optional[Dict[str, Any]]]
+
+
+@dataclass
+class Step:
+    name: str
+    build: UpdateBuilder
+
+
+@dataclass
+class Scenario:
+    name: str
+    steps: List[Step] = field(default_factory=list)
+
+
+def _message_update(user: VirtualUser, **message_fields: Any) -> Dict[str, Any]:
+    message = {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": user.as_chat(),
+        "from": user.as_telegram_user(),
+    }
+    message.update(message_fields)
+    return {"update_id": next(_update_ids), "message": message}
+
+
+def text_message(text: str) -> UpdateBuilder:
+    def build(user: VirtualUser, ctx: ScenarioContext) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {"text": text}
+        if text.startswith("/"):
+            fields["entities"] = [{
+                "type": "bot_command",
+                "offset": 0,
+                "length": len(text.split(" ", 1)[0]),
+            }]
+        return _message_update(user, **fields)
+
+    return build
+
+
+def callback(data: Any) -> UpdateBuilder:
+    """Callback query press; ``data`` may be a callable of the context."""
+
+    def build(user: VirtualUser, ctx: ScenarioContext) -> Dict[str, Any]:
+        return {
+            "update_id": next(_update_ids),
+            "callback_query": {
+                "id": str(next(_callback_ids)),
+                "from": user.as_telegram_user(),
+                "chat_instance": str(user.user_id),
+                "data": data(ctx) if callable(data) else data,
+                "message": {
+                    "message_id": next(_message_ids),
+                    "date": int(time.time()),
+                    "chat": user.as_chat(),
+                    "from": {
+                        "id": BENCH_BOT_ID,
+                        "is_bot": True,
+                        "first_name": "Bench Shop",
+                        "username": BENCH_BOT_USERNAME,
+                    },
+                    "text": "...",
+                },
+            },
+        }
+
+    return build
+
+
+def _last_invoice_payload(user: VirtualUser, ctx: ScenarioContext) -> Optional[str]:
+    call = ctx.telegram.last_call("sendInvoice", chat_id=user.user_id)
+    return call.params.get("payload") if call else None
+
+
+def pre_checkout(user: VirtualUser, ctx: ScenarioContext) -> Optional[Dict[str, Any]]:
+    payload = _last_invoice_payload(user, ctx)
+    if payload is None:
+        return None
+    return {
+        "update_id": next(_update_ids),
+        "pre_checkout_query": {
+            "id": str(next(_callback_ids)),
+            "from": user.as_telegram_user(),
+            "currency": "XTR",
+            "total_amount": ctx.stars_price,
+            "invoice_payload": payload,
+        },
+    }
+
+
+def successful_payment(user: VirtualUser,
+                       ctx: ScenarioContext) -> Optional[Dict[str, Any]]:
+    payload = _last_invoice_payload(user, ctx)
+    if payload is None:
+        return None
+    charge_number = next(_charge_ids)
+    return _message_update(
+        user,
+        successful_payment={
+            "currency": "XTR",
+            "total_amount": ctx.stars_price,
+            "invoice_payload": payload,
+            # Stored as the unique provider_payment_id, so never reuse one
+            "telegram_payment_charge_id": f"bench_{_charge_run}_{user.user_id}_{charge_number}",
+            "provider_payment_charge_id": f"bench_{_charge_run}_{user.user_id}_{charge_number}",
+        })
+
+
+def build_scenarios() -> Dict[str, Scenario]:
+    """Named user journeys; step names are what latencies are reported under."""
+    scenarios = [
+        Scenario("start", [Step("start", text_message("/start"))]),
+        Scenario("menu", [
+            Step("menu:my_subscription", callback("main_action:my_subscription")),
+            Step("menu:referral", callback("main_action:referral")),
+            Step("menu:language", callback("main_action:language")),
+            Step("menu:back_to_main", callback("main_action:back_to_main")),
+        ]),
+        Scenario("subscription", [
+            Step("subscription:options", callback("main_action:subscribe")),
+            Step("subscription:period",
+                 callback(lambda ctx: f"subscribe_period:{ctx.months}")),
+            Step("subscription:view", callback("main_action:my_subscription")),
+            Step("subscription:devices", callback("main_action:my_devices")),
+        ]),
+        Scenario("promo", [
+            Step("promo:prompt", callback("main_action:apply_promo")),
+            Step("promo:code", text_message("BENCHNOSUCHCODE")),
+        ]),
+        Scenario("payment", [
+            Step("payment:period",
+                 callback(lambda ctx: f"subscribe_period:{ctx.months}")),
+            Step("payment:stars_invoice",
+                 callback(lambda ctx:
+                          f"pay_stars:{ctx.months}:{ctx.stars_price}:subscription")),
+            Step("payment:pre_checkout", pre_checkout),
+            Step("payment:successful", successful_payment),
+        ]),
+    ]
+    return {scenario.name: scenario for scenario in scenarios}
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import resource
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .utils import format_table, percentile
+
+
+@dataclass
+class HandlerStats:
+    name: str
+    count: int
+    errors: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    throughput: float
+
+
+@dataclass
+class LatencyRecorder:
+    """Collects per-handler latencies of a run and summarizes them."""
+
+    samples: Dict[str, List[float]] = field(
+        default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.samples[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(len(values) for values in self.samples.values())
+
+    def summarize(self, wall_seconds: float) -> List[HandlerStats]:
+        """Per-handler stats; throughput is handled updates per second of the whole run."""
+        result = []
+        for name in sorted(self.samples):
+            values = sorted(self.samples[name])
+            result.append(
+                HandlerStats(
+                    name=name,
+                    count=len(values),
+                    errors=self.errors.get(name, 0),
+                    mean_ms=sum(values) / len(values) * 1000,
+                    p50_ms=percentile(values, 0.50) * 1000,
+                    p95_ms=percentile(values, 0.95) * 1000,
+                    p99_ms=percentile(values, 0.99) * 1000,
+                    max_ms=values[-1] * 1000,
+                    throughput=len(values) / wall_seconds if wall_seconds else 0.0,
+                ))
+        return result
+
+    def format(self, wall_seconds: float) -> str:
+        rows = [[
+            item.name, item.count, item.errors, f"{item.throughput:.1f}",
+            f"{item.mean_ms:.1f}", f"{item.p50_ms:.1f}", f"{item.p95_ms:.1f}",
+            f"{item.p99_ms:.1f}", f"{item.max_ms:.1f}"
+        ] for item in self.summarize(wall_seconds)]
+        return format_table([
+            "handler", "count", "errors", "rps", "mean ms", "p50 ms", "p95 ms",
+            "p99 ms", "max ms"
+        ], rows)
+
+
+class StatementCounter:
+    """
+    Counts SQL statements sent through an engine while active, keyed by the
+    leading keyword (SELECT, INSERT, ...). An executemany counts once.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self._sync_engine = engine.sync_engine
+        self.counts: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def _on_before_cursor_execute(self, conn, cursor, statement, parameters,
+                                  context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement else "?"
+        self.counts[keyword] += 1
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self._sync_engine, "before_cursor_execute",
+                     self._on_before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self._sync_engine, "before_cursor_execute",
+                     self._on_before_cursor_execute)
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process from /proc (Linux only)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def lifetime_peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Tracks peak RSS over a block by polling /proc in the background. Where
+    /proc is unavailable it falls back to the process-lifetime peak, which
+    is then reported with ``is_lifetime_peak``.
+    """
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.baseline_bytes = 0
+        self.peak_bytes = 0
+        self.is_lifetime_peak = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def growth_bytes(self) -> int:
+        return max(self.peak_bytes - self.baseline_bytes, 0)
+
+    def _sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak_bytes = max(self.peak_bytes, rss)
+
+    async def _poll(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval_seconds)
+
+    async def __aenter__(self) -> "RssSampler":
+        rss = current_rss_bytes()
+        if rss is None:
+            self.is_lifetime_peak = True
+            self.baseline_bytes = lifetime_peak_rss_bytes()
+        else:
+            self.baseline_bytes = self.peak_bytes = rss
+            self._task = asyncio.create_task(self._poll())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._sample()
+        else:
+            self.peak_bytes = lifetime_peak_rss_bytes()
@@ -0,0 +1,319 @@
+"""
+Benchmark for panel synchronization.
+
+For each dataset size the benchmark wipes its own id range in the database,
+seeds bot users and subscriptions according to a SyncMix, starts
+FakeRemnawavePanel in a child process (so the panel's memory and CPU do not
+pollute the numbers) and measures two phases:
+
+    fetch  PanelApiService.get_all_panel_users
+    sync   perform_sync (which fetches again and reconciles the database)
+
+For each phase it reports wall time, SQL statements by kind, panel requests
+by route and peak RSS.
+
+    python -m benchmarks.sync_benchmark --sizes 10000,100000,500000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from bot.handlers.admin.sync_admin import perform_sync
+from bot.middlewares.i18n import get_i18n_instance
+from bot.services.panel_api_service import PanelApiService
+from config.settings import Settings
+from db import database_setup
+from db.models import Subscription, User
+
+from .dataset import SYNC_TELEGRAM_ID_BASE, SyncMix, generate_sync_dataset
+from .fake_panel import CONTROL_PREFIX, FakeRemnawavePanel
+from .load_harness import BENCH_BOT_TOKEN
+from .stats import RssSampler, StatementCounter
+from .utils import format_counter, format_table
+
+SEED_CHUNK_SIZE = 5_000
+MEGABYTE = 1024 * 1024
+
+
+def _serve_panel(count: int, mix: SyncMix, seed: int, latency_ms: float,
+                 connection) -> None:
+    """Child process: serve the generated panel until the parent says stop."""
+
+    async def serve() -> None:
+        dataset = generate_sync_dataset(count,
+                                        mix,
+                                        seed=seed,
+                                        with_seed_users=False).panel
+        panel = FakeRemnawavePanel(dataset, latency_ms=latency_ms)
+        connection.send(await panel.start())
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, connection.recv)
+        await panel.close()
+
+    asyncio.run(serve())
+
+
+class PanelProcess:
+
+    def __init__(self, count: int, mix: SyncMix, seed: int, latency_ms: float):
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(target=_serve_panel,
+                                        args=(count, mix, seed, latency_ms,
+                                              child_connection),
+                                        daemon=True)
+        self.base_url: Optional[str] = None
+
+    async def start(self) -> str:
+        self._process.start()
+        loop = asyncio.get_running_loop()
+        self.base_url = await loop.run_in_executor(None, self._connection.recv)
+        return self.base_url
+
+    def _control_url(self, path: str) -> str:
+        return self.base_url.rsplit("/", 1)[0] + CONTROL_PREFIX + path
+
+    async def request_counts(self) -> Dict[str, int]:
+        async with aiohttp.ClientSession() as http:
+            async with http.get(self._control_url("/requests")) as response:
+                return await response.json()
+
+    async def reset_counters(self) -> None:
+        async with aiohttp.ClientSession() as http:
+            async with http.post(self._control_url("/reset")) as response:
+                await response.read()
+
+    def stop(self) -> None:
+        if self._process.is_alive():
+            self._connection.send("stop")
+            self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+async def reset_sync_range(async_session_factory: sessionmaker) -> None:
+    """Remove users and subscriptions a previous run left in the benchmark id range."""
+    async with async_session_factory() as session:
+        await session.execute(
+            delete(Subscription).where(
+                Subscription.user_id >= SYNC_TELEGRAM_ID_BASE))
+        await session.execute(
+            delete(User).where(User.user_id >= SYNC_TELEGRAM_ID_BASE))
+        await session.commit()
+
+
+async def seed_database(async_session_factory: sessionmaker, count: int,
+                        mix: SyncMix, seed: int) -> Tuple[int, Dict[str, int]]:
+    """Insert the database side of the dataset; returns seeded users and the category split."""
+    dataset = generate_sync_dataset(count, mix, seed=seed, with_panel=False)
+    seed_users = dataset.seed_users
+    async with async_session_factory() as session:
+        for start in range(0, len(seed_users), SEED_CHUNK_SIZE):
+            chunk = seed_users[start:start + SEED_CHUNK_SIZE]
+            await session.execute(insert(User), [{
+                "user_id": seed_user.user_id,
+                "username": seed_user.username,
+                "language_code": "ru",
+                "is_banned": False,
+                "panel_user_uuid": seed_user.panel_user_uuid,
+            } for seed_user in chunk])
+            await session.execute(insert(Subscription), [{
+                "user_id": seed_user.user_id,
+                "panel_user_uuid": seed_user.panel_user_uuid,
+                "panel_subscription_uuid": seed_user.panel_subscription_uuid,
+                "end_date": seed_user.end_date,
+                "is_active": seed_user.status == "ACTIVE",
+                "status_from_panel": seed_user.status,
+            } for seed_user in chunk])
+        await session.commit()
+    return len(seed_users), dict(dataset.category_counts)
+
+
+async def measure_phase(name: str, run, panel: PanelProcess) -> Dict[str, Any]:
+    await panel.reset_counters()
+    with StatementCounter(database_setup.async_engine) as statements:
+        async with RssSampler() as rss:
+            started = time.perf_counter()
+            outcome = await run()
+            wall_seconds = time.perf_counter() - started
+    panel_requests = await panel.request_counts()
+    return {
+        "phase": name,
+        "wall_seconds": wall_seconds,
+        "statements": dict(statements.counts),
+        "statements_total": statements.total,
+        "panel_requests": panel_requests,
+        "panel_requests_total": sum(panel_requests.values()),
+        "peak_rss_mb": rss.peak_bytes / MEGABYTE,
+        "rss_growth_mb": rss.growth_bytes / MEGABYTE,
+        "rss_is_lifetime_peak": rss.is_lifetime_peak,
+        "outcome": outcome,
+    }
+
+
+async def benchmark_size(count: int, args: argparse.Namespace,
+                         settings_env: Dict[str, Any],
+                         async_session_factory: sessionmaker,
+                         i18n) -> List[Dict[str, Any]]:
+    await reset_sync_range(async_session_factory)
+    seeded, category_counts = await seed_database(async_session_factory, count,
+                                                  args.mix, args.seed)
+
+    panel = PanelProcess(count, args.mix, args.seed, args.panel_latency_ms)
+    await panel.start()
+    settings = Settings(PANEL_API_URL=panel.base_url, **settings_env)
+    try:
+        results = []
+        if not args.skip_fetch:
+
+            async def fetch() -> Dict[str, Any]:
+                async with PanelApiService(settings) as panel_service:
+                    users = await panel_service.get_all_panel_users(
+                        page_size=args.page_size)
+                return {"users": len(users) if users is not None else None}
+
+            results.append(await measure_phase("fetch", fetch, panel))
+
+        if not args.skip_sync:
+
+            async def sync() -> Dict[str, Any]:
+                async with PanelApiService(settings) as panel_service:
+                    async with async_session_factory() as session:
+                        result = await perform_sync(panel_service=panel_service,
+                                                    session=session,
+                                                    settings=settings,
+                                                    i18n_instance=i18n)
+                return {
+                    "status": result.get("status"),
+                    "details": result.get("details"),
+                    "errors": len(result.get("errors") or []),
+                }
+
+            results.append(await measure_phase("sync", sync, panel))
+    finally:
+        panel.stop()
+
+    for result in results:
+        result.update({
+            "size": count,
+            "seeded_users": seeded,
+            "mix": category_counts,
+        })
+    return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    rows = [[
+        result["size"],
+        result["phase"],
+        f"{result['wall_seconds']:.2f}",
+        result["statements_total"],
+        result["panel_requests_total"],
+        f"{result['peak_rss_mb']:.0f}" +
+        ("*" if result["rss_is_lifetime_peak"] else ""),
+        f"{result['rss_growth_mb']:.0f}",
+    ] for result in results]
+    lines = [
+        format_table([
+            "users", "phase", "wall s", "SQL stmts", "panel reqs",
+            "peak RSS MB", "RSS growth MB"
+        ], rows)
+    ]
+    for result in results:
+        lines.append(
+            f"{result['size']} {result['phase']}: SQL {format_counter(result['statements'])}; "
+            f"panel {format_counter(result['panel_requests'])}; "
+            f"outcome {result['outcome']}")
+    if any(result["rss_is_lifetime_peak"] for result in results):
+        lines.append("* process-lifetime peak (/proc not available)")
+    return "\n".join(lines)
+
+
+async def run_benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    settings_env = {"BOT_TOKEN": BENCH_BOT_TOKEN, "PANEL_API_KEY": "bench"}
+    settings = Settings(**settings_env)
+    async_session_factory = database_setup.init_db_connection(settings)
+    await database_setup.init_db(settings, async_session_factory)
+    i18n = get_i18n_instance(path="locales", default=settings.DEFAULT_LANGUAGE)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for count in args.sizes:
+            size_results = await benchmark_size(count, args, settings_env,
+                                                async_session_factory, i18n)
+            results.extend(size_results)
+            print(format_results(size_results))
+            print()
+        if not args.keep_data:
+            await reset_sync_range(async_session_factory)
+    finally:
+        await database_setup.async_engine.dispose()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.sync_benchmark",
+        description="Measure get_all_panel_users and perform_sync on generated panels.")
+    parser.add_argument("--sizes", default="10000,100000,500000",
+                        help="comma-separated panel user counts")
+    parser.add_argument("--new", type=float, default=SyncMix.new,
+                        help="share of panel users unknown to the bot")
+    parser.add_argument("--changed", type=float, default=SyncMix.changed,
+                        help="share of known users whose panel data changed")
+    parser.add_argument("--no-telegram-id", type=float,
+                        default=SyncMix.no_telegram_id,
+                        help="share of panel users without telegramId")
+    parser.add_argument("--uuid-conflict", type=float,
+                        default=SyncMix.uuid_conflict,
+                        help="share of known users re-created under a new panel UUID")
+    parser.add_argument("--page-size", type=int, default=100,
+                        help="page size for the fetch phase (perform_sync uses its own)")
+    parser.add_argument("--panel-latency-ms", type=float, default=0.0)
+    parser.add_argument("--skip-fetch", action="store_true")
+    parser.add_argument("--skip-sync", action="store_true")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="leave the last run's users in the database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    try:
+        args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        args.mix = SyncMix(new=args.new,
+                           changed=args.changed,
+                           no_telegram_id=args.no_telegram_id,
+                           uuid_conflict=args.uuid_conflict)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.sizes or min(args.sizes) <= 0:
+        parser.error("--sizes needs positive numbers")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.WARNING),
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        stream=sys.stdout)
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
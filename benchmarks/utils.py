@@ -0,0 +1,58 @@
+import asyncio
+import math
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+
+async def serve_app(app: web.Application,
+                    host: str = "127.0.0.1",
+                    port: int = 0) -> Tuple[web.AppRunner, str]:
+    """Start ``app`` on ``host`` (a free port by default) and return its runner and base URL."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, f"http://{bound_host}:{bound_port}"
+
+
+async def simulate_latency(latency_ms: float, jitter_ms: float = 0.0) -> None:
+    delay_ms = latency_ms + (random.uniform(-jitter_ms, jitter_ms)
+                             if jitter_ms else 0.0)
+    if delay_ms > 0:
+        await asyncio.sleep(delay_ms / 1000)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values (0.0 for no values)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def format_table(headers: Sequence[str], rows: List[Sequence[object]]) -> str:
+    cells = [[str(value) for value in row] for row in rows]
+    widths = [
+        max([len(header)] + [len(row[index]) for row in cells])
+        for index, header in enumerate(headers)
+    ]
+    lines = [
+        "  ".join(header.ljust(widths[index])
+                  for index, header in enumerate(headers)),
+        "  ".join("-" * width for width in widths),
+    ]
+    for row in cells:
+        lines.append("  ".join(
+            value.rjust(widths[index]) if index else value.ljust(widths[index])
+            for index, value in enumerate(row)))
+    return "\n".join(lines)
+
+
+def format_counter(counter: Dict[str, int], limit: Optional[int] = None) -> str:
+    items = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    if limit is not None:
+        items = items[:limit]
+    return ", ".join(f"{name}={count}" for name, count in items) or "-"
@@ -4,7 +4,6 @@ from typing import Dict
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
@@ -14,26 +13,78 @@ from bot.middlewares.ban_check_middleware import BanCheckMiddleware
 from bot.middlewares.action_logger_middleware import ActionLoggerMiddleware
 from bot.middlewares.profile_sync import ProfileSyncMiddleware
 from bot.middlewares.channel_subscription import ChannelSubscriptionMiddleware
+from bot.middlewares.query_stats import QueryStatsMiddleware, QueryStatsHandlerLabelMiddleware
+from bot.middlewares.read_only_session import ReadOnlySessionMiddleware
+from bot.keyboards.inline.keyboard_cache import configure_keyboard_cache, warm_keyboard_cache
+from bot.middlewares.tracing import (
+    HandlerTracingMiddleware,
+    TelegramRequestTracingMiddleware,
+    UpdateTracingMiddleware,
+    traced_middleware,
+)
+from bot.utils.db_pool_metrics import install_pool_metrics
+from bot.utils.fsm_storage import build_fsm_storage
+from bot.utils.query_stats import install_query_stats
+from bot.utils.tracing import instrument_dal, is_tracing_enabled
+from db import database_setup
 
 
 def build_dispatcher(settings: Settings, async_session_factory: sessionmaker) -> tuple[Dispatcher, Bot, Dict]:
-    storage = MemoryStorage()
+    storage = build_fsm_storage(settings, async_session_factory)
     default_props = DefaultBotProperties(parse_mode=ParseMode.HTML)
     bot = Bot(token=settings.BOT_TOKEN, default=default_props)
 
     dp = Dispatcher(storage=storage, settings=settings, bot_instance=bot)
 
     i18n_instance = get_i18n_instance(path="locales", default=settings.DEFAULT_LANGUAGE)
+    if settings.I18N_VALIDATE_ON_STARTUP:
+        problems = i18n_instance.validate_catalog()
+        for problem in problems:
+            logging.warning(f"i18n catalog: {problem}")
+        logging.info(f"i18n catalog validated: {len(problems)} problem(s) found.")
+
+    configure_keyboard_cache(settings.KEYBOARD_CACHE_SIZE)
+    warm_keyboard_cache(i18n_instance, settings)
 
     dp["i18n_instance"] = i18n_instance
     dp["async_session_factory"] = async_session_factory
 
-    dp.update.outer_middleware(DBSessionMiddleware(async_session_factory))
-    dp.update.outer_middleware(I18nMiddleware(i18n=i18n_instance, settings=settings))
-    dp.update.outer_middleware(ProfileSyncMiddleware())
-    dp.update.outer_middleware(BanCheckMiddleware(settings=settings, i18n_instance=i18n_instance))
-    dp.update.outer_middleware(ChannelSubscriptionMiddleware(settings=settings, i18n_instance=i18n_instance))
-    dp.update.outer_middleware(ActionLoggerMiddleware(settings=settings))
+    tracing_enabled = is_tracing_enabled()
+    if tracing_enabled:
+        instrument_dal()
+        bot.session.middleware(TelegramRequestTracingMiddleware())
+        # Outermost, so the root span covers every middleware below
+        dp.update.outer_middleware(UpdateTracingMiddleware())
+
+    if database_setup.async_engine is not None:
+        install_pool_metrics(database_setup.async_engine)
+
+    if settings.QUERY_STATS_ENABLED and database_setup.async_engine is not None:
+        install_query_stats(database_setup.async_engine)
+        # First, so the session commit is counted too
+        dp.update.outer_middleware(QueryStatsMiddleware(settings))
+        label_middleware = QueryStatsHandlerLabelMiddleware()
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(label_middleware)
+
+    if tracing_enabled:
+        handler_tracing_middleware = HandlerTracingMiddleware()
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(handler_tracing_middleware)
+
+    dp.update.outer_middleware(traced_middleware(DBSessionMiddleware(async_session_factory)))
+    dp.update.outer_middleware(traced_middleware(I18nMiddleware(i18n=i18n_instance, settings=settings)))
+    dp.update.outer_middleware(traced_middleware(ProfileSyncMiddleware()))
+    dp.update.outer_middleware(traced_middleware(BanCheckMiddleware(settings=settings, i18n_instance=i18n_instance)))
+    dp.update.outer_middleware(traced_middleware(ChannelSubscriptionMiddleware(settings=settings, i18n_instance=i18n_instance)))
+    dp.update.outer_middleware(traced_middleware(ActionLoggerMiddleware(settings=settings)))
+
+    read_only_session_middleware = ReadOnlySessionMiddleware()
+    for event_name, observer in dp.observers.items():
+        if event_name not in ("update", "error"):
+            observer.middleware(read_only_session_middleware)
 
     return dp, bot, {"i18n_instance": i18n_instance}
 
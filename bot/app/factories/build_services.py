@@ -14,6 +14,8 @@ from bot.services.panel_webhook_service import PanelWebhookService
 from bot.services.freekassa_service import FreeKassaService
 from bot.services.platega_service import PlategaService
 from bot.services.severpay_service import SeverPayService
+from bot.services.panel_description_sync import PanelDescriptionSyncService
+from bot.services.channel_membership_service import ChannelMembershipService
 
 
 def build_core_services(
@@ -24,6 +26,8 @@ def build_core_services(
     bot_username_for_default_return: str,
 ):
     panel_service = PanelApiService(settings)
+    panel_description_sync_service = PanelDescriptionSyncService(
+        panel_service, settings.PANEL_DESCRIPTION_SYNC_DEBOUNCE_SECONDS)
     subscription_service = SubscriptionService(settings, panel_service, bot, i18n)
     referral_service = ReferralService(settings, subscription_service, bot, i18n)
     promo_code_service = PromoCodeService(settings, subscription_service, bot, i18n)
@@ -64,6 +68,7 @@ def build_core_services(
         referral_service=referral_service,
         default_return_url=bot_username_for_default_return,
     )
+    channel_membership_service = ChannelMembershipService(bot, settings, async_session_factory)
     panel_webhook_service = PanelWebhookService(bot, settings, i18n, async_session_factory, panel_service)
     yookassa_service = YooKassaService(
         shop_id=settings.YOOKASSA_SHOP_ID,
@@ -84,6 +89,7 @@ def build_core_services(
 
     return {
         "panel_service": panel_service,
+        "panel_description_sync_service": panel_description_sync_service,
         "subscription_service": subscription_service,
         "referral_service": referral_service,
         "promo_code_service": promo_code_service,
@@ -94,4 +100,5 @@ def build_core_services(
         "yookassa_service": yookassa_service,
         "platega_service": platega_service,
         "severpay_service": severpay_service,
+        "channel_membership_service": channel_membership_service,
     }
@@ -0,0 +1,39 @@
+import hmac
+from dataclasses import asdict
+
+from aiohttp import web
+
+from bot.utils.metrics import collect_metrics, render_prometheus
+from bot.utils.query_stats import query_stats_snapshot
+from config.settings import Settings
+
+
+def _is_authorized(request: web.Request, settings: Settings) -> bool:
+    expected = settings.METRICS_TOKEN
+    if not expected:
+        return True
+    auth_header = request.headers.get("Authorization", "")
+    provided = (auth_header[len("Bearer "):] if auth_header.startswith("Bearer ")
+                else request.query.get("token", ""))
+    return hmac.compare_digest(provided.encode(), expected.encode())
+
+
+async def metrics_route(request: web.Request) -> web.Response:
+    """
+    Prometheus text format by default; ``?format=json`` returns the same
+    metrics plus the repeated statement shapes per handler.
+    """
+    settings: Settings = request.app["settings"]
+    if not _is_authorized(request, settings):
+        return web.Response(status=401, text="Unauthorized")
+
+    metrics = collect_metrics()
+    if request.query.get("format") == "json":
+        return web.json_response({
+            "metrics": [asdict(metric) for metric in metrics],
+            "query_stats": query_stats_snapshot(),
+        })
+    return web.Response(text=render_prometheus(metrics),
+                        content_type="text/plain",
+                        charset="utf-8",
+                        headers={"X-Content-Type-Options": "nosniff"})
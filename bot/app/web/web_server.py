@@ -86,6 +86,12 @@ async def build_and_start_web_app(
         app.router.add_post(panel_path, panel_webhook_route)
         logging.info(f"Panel webhook route configured at: [POST] {panel_path}")
 
+    if settings.METRICS_ENABLED:
+        from bot.app.web.metrics import metrics_route
+
+        app.router.add_get(settings.metrics_path, metrics_route)
+        logging.info(f"Metrics route configured at: [GET] {settings.metrics_path}")
+
     web_app_runner = web.AppRunner(app)
     await web_app_runner.setup()
     site = web.TCPSite(
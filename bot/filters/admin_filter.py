@@ -1,11 +1,11 @@
-from typing import List, Union
+from typing import Collection, Union
 from aiogram.filters import Filter
 from aiogram.types import Message, CallbackQuery, User
 
 
 class AdminFilter(Filter):
 
-    def __init__(self, admin_ids: List[int]):
+    def __init__(self, admin_ids: Collection[int]):
         self.admin_ids = admin_ids
 
     async def __call__(self, event: Union[Message, CallbackQuery],
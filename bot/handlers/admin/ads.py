@@ -7,8 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
 from bot.middlewares.i18n import JsonI18n
+from bot.middlewares.read_only_session import READ_ONLY_DB_FLAG
 from db.dal import ad_dal
 from bot.states.admin_states import AdminStates
+from bot.utils.keyset_cursor import PageRef, format_total_pages, parse_page_ref
 
 router = Router(name="admin_ads_router")
 
@@ -16,7 +18,7 @@ router = Router(name="admin_ads_router")
 PAGE_SIZE = 5
 
 
-@router.callback_query(F.data == "admin_action:ads")
+@router.callback_query(F.data == "admin_action:ads", flags={READ_ONLY_DB_FLAG: True})
 async def show_ads_menu(callback: types.CallbackQuery, settings: Settings, i18n_data: dict, session: AsyncSession):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -32,17 +34,17 @@ async def show_ads_menu(callback: types.CallbackQuery, settings: Settings, i18n_
     overview = _("admin_ads_overview", revenue=f"{total_revenue:.2f}", cost=f"{total_cost:.2f}")
 
     total_count = await ad_dal.count_campaigns(session)
-    if total_count == 0:
+    if total_count.value == 0:
         text = overview + "\n\n" + _("admin_ads_empty")
         from bot.keyboards.inline.admin_keyboards import get_ads_menu_keyboard
         reply_markup = get_ads_menu_keyboard(i18n, current_lang)
     else:
-        current_page = 0
-        total_pages = max(1, (total_count + PAGE_SIZE - 1) // PAGE_SIZE)
-        campaigns = await ad_dal.list_campaigns_paged(session, page=current_page, page_size=PAGE_SIZE)
+        page_ref = PageRef()
+        campaigns_page = await ad_dal.list_campaigns_paged(session, page_size=PAGE_SIZE)
+        total_pages = format_total_pages(total_count, PAGE_SIZE, page_ref, campaigns_page)
         text = overview + "\n\n" + _("admin_ads_header")
         from bot.keyboards.inline.admin_keyboards import get_ads_list_keyboard
-        reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns, current_page, total_pages)
+        reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns_page, page_ref, total_pages)
     await callback.message.edit_text(text, reply_markup=reply_markup)
     try:
         await callback.answer()
@@ -50,7 +52,7 @@ async def show_ads_menu(callback: types.CallbackQuery, settings: Settings, i18n_
         pass
 
 
-@router.callback_query(F.data.startswith("admin_ads:page:"))
+@router.callback_query(F.data.startswith("admin_ads:page:"), flags={READ_ONLY_DB_FLAG: True})
 async def ads_list_pagination(callback: types.CallbackQuery, settings: Settings, i18n_data: dict, session: AsyncSession):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -59,21 +61,22 @@ async def ads_list_pagination(callback: types.CallbackQuery, settings: Settings,
         await callback.answer("Language error.", show_alert=True)
         return
 
-    try:
-        page = int(callback.data.split(":")[2])
-    except Exception:
-        page = 0
+    page_ref = parse_page_ref(callback.data.split(":", 2)[2])
 
     totals = await ad_dal.get_totals(session)
     overview = _("admin_ads_overview", revenue=f"{totals.get('revenue', 0.0):.2f}", cost=f"{totals.get('cost', 0.0):.2f}")
     total_count = await ad_dal.count_campaigns(session)
-    total_pages = max(1, (total_count + PAGE_SIZE - 1) // PAGE_SIZE)
-    page = max(0, min(page, total_pages - 1))
 
-    campaigns = await ad_dal.list_campaigns_paged(session, page=page, page_size=PAGE_SIZE)
+    campaigns_page = await ad_dal.list_campaigns_paged(
+        session, page_size=PAGE_SIZE, after=page_ref.after, before=page_ref.before
+    )
+    if not campaigns_page.items and page_ref.key is not None:
+        page_ref = PageRef()
+        campaigns_page = await ad_dal.list_campaigns_paged(session, page_size=PAGE_SIZE)
+    total_pages = format_total_pages(total_count, PAGE_SIZE, page_ref, campaigns_page)
     text = overview + "\n\n" + _("admin_ads_header")
     from bot.keyboards.inline.admin_keyboards import get_ads_list_keyboard
-    reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns, page, total_pages)
+    reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns_page, page_ref, total_pages)
     try:
         await callback.message.edit_text(text, reply_markup=reply_markup)
         await callback.answer()
@@ -82,7 +85,7 @@ async def ads_list_pagination(callback: types.CallbackQuery, settings: Settings,
         await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_ads:card:"))
+@router.callback_query(F.data.startswith("admin_ads:card:"), flags={READ_ONLY_DB_FLAG: True})
 async def show_ad_card(callback: types.CallbackQuery, settings: Settings, i18n_data: dict, session: AsyncSession):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -93,7 +96,7 @@ async def show_ad_card(callback: types.CallbackQuery, settings: Settings, i18n_d
 
     parts = callback.data.split(":")
     camp_id = int(parts[2])
-    back_page = int(parts[3]) if len(parts) > 3 else 0
+    back_page = parts[3] if len(parts) > 3 else "0"
 
     camp = await ad_dal.get_campaign_by_id(session, camp_id)
     if not camp:
@@ -138,7 +141,7 @@ async def ads_delete_prompt(callback: types.CallbackQuery, settings: Settings, i
     try:
         _, _, camp_id_str, back_page_str = callback.data.split(":", 3)
         camp_id = int(camp_id_str)
-        back_page = int(back_page_str)
+        back_page = parse_page_ref(back_page_str).encode()
     except Exception:
         await callback.answer(i18n.gettext(current_lang, "error_try_again"), show_alert=True)
         return
@@ -158,7 +161,7 @@ async def ads_delete_prompt(callback: types.CallbackQuery, settings: Settings, i
         await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_ads:delete_cancel:"))
+@router.callback_query(F.data.startswith("admin_ads:delete_cancel:"), flags={READ_ONLY_DB_FLAG: True})
 async def ads_delete_cancel(callback: types.CallbackQuery, settings: Settings, i18n_data: dict, session: AsyncSession):
     # Return to the ad card view
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
@@ -171,7 +174,7 @@ async def ads_delete_cancel(callback: types.CallbackQuery, settings: Settings, i
     try:
         parts = callback.data.split(":", 3)
         camp_id = int(parts[2])
-        back_page = int(parts[3])
+        back_page = parse_page_ref(parts[3]).encode()
     except Exception:
         await callback.answer(_("error_try_again"), show_alert=True)
         return
@@ -217,7 +220,7 @@ async def ads_delete_confirm(callback: types.CallbackQuery, settings: Settings,
     try:
         parts = callback.data.split(":", 3)
         camp_id = int(parts[2])
-        back_page = int(parts[3])
+        page_ref = parse_page_ref(parts[3])
     except Exception:
         await callback.answer(_("error_try_again"), show_alert=True)
         return
@@ -236,12 +239,16 @@ async def ads_delete_confirm(callback: types.CallbackQuery, settings: Settings,
         cost=f"{totals.get('cost', 0.0):.2f}",
     )
     total_count = await ad_dal.count_campaigns(session)
-    total_pages = max(1, (total_count + PAGE_SIZE - 1) // PAGE_SIZE)
-    page = max(0, min(back_page, total_pages - 1))
-    campaigns = await ad_dal.list_campaigns_paged(session, page=page, page_size=PAGE_SIZE)
+    campaigns_page = await ad_dal.list_campaigns_paged(
+        session, page_size=PAGE_SIZE, after=page_ref.after, before=page_ref.before
+    )
+    if not campaigns_page.items and page_ref.key is not None:
+        page_ref = PageRef()
+        campaigns_page = await ad_dal.list_campaigns_paged(session, page_size=PAGE_SIZE)
+    total_pages = format_total_pages(total_count, PAGE_SIZE, page_ref, campaigns_page)
     text = overview + "\n\n" + _("admin_ads_header")
     from bot.keyboards.inline.admin_keyboards import get_ads_list_keyboard
-    reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns, page, total_pages)
+    reply_markup = get_ads_list_keyboard(i18n, current_lang, campaigns_page, page_ref, total_pages)
     try:
         await callback.message.edit_text(text, reply_markup=reply_markup)
         await callback.answer(_("admin_ads_deleted_success"), show_alert=True)
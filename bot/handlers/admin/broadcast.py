@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import Settings
 
 from db.dal import user_dal, message_log_dal
+from db.read_replica import ReadOnlySessionFactory
 
 from bot.states.admin_states import AdminStates
 from bot.keyboards.inline.admin_keyboards import (
@@ -220,6 +221,7 @@ async def confirm_broadcast_callback_handler(
     bot: Bot,
     settings: Settings,
     session: AsyncSession,
+    read_only_session_factory: ReadOnlySessionFactory,
 ):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -252,12 +254,13 @@ async def confirm_broadcast_callback_handler(
         await callback.answer()
 
         target = user_fsm_data.get("broadcast_target", "all")
-        if target == "active":
-            user_ids = await user_dal.get_user_ids_with_active_subscription(session)
-        elif target == "inactive":
-            user_ids = await user_dal.get_user_ids_without_active_subscription(session)
-        else:
-            user_ids = await user_dal.get_all_active_user_ids_for_broadcast(session)
+        async with read_only_session_factory.read_session(session) as read_session:
+            if target == "active":
+                user_ids = await user_dal.get_user_ids_with_active_subscription(read_session)
+            elif target == "inactive":
+                user_ids = await user_dal.get_user_ids_without_active_subscription(read_session)
+            else:
+                user_ids = await user_dal.get_all_active_user_ids_for_broadcast(read_session)
 
         sent_count = 0
         failed_count = 0
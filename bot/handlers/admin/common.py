@@ -6,6 +6,7 @@ from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
+from db.read_replica import ReadOnlySessionFactory
 from bot.keyboards.inline.admin_keyboards import (
     get_admin_panel_keyboard, get_stats_monitoring_keyboard, 
     get_user_management_keyboard, get_ban_management_keyboard,
@@ -15,6 +16,7 @@ from bot.middlewares.i18n import JsonI18n
 from bot.services.panel_api_service import PanelApiService
 from bot.services.subscription_service import SubscriptionService
 from bot.utils.message_queue import get_queue_manager
+from bot.utils.keyset_cursor import parse_page_ref
 
 from . import broadcast as admin_broadcast_handlers
 from .promo import create as admin_promo_create_handlers
@@ -53,7 +55,8 @@ async def admin_panel_command_handler(
 async def admin_panel_actions_callback_handler(
         callback: types.CallbackQuery, state: FSMContext, settings: Settings,
         i18n_data: dict, bot: Bot, panel_service: PanelApiService,
-        subscription_service: SubscriptionService, session: AsyncSession):
+        subscription_service: SubscriptionService, session: AsyncSession,
+        read_only_session_factory: ReadOnlySessionFactory):
     action_parts = callback.data.split(":")
     action = action_parts[1]
 
@@ -74,8 +77,9 @@ async def admin_panel_actions_callback_handler(
         return
 
     if action == "stats":
-        await admin_stats_handlers.show_statistics_handler(
-            callback, i18n_data, settings, session)
+        async with read_only_session_factory.read_session(session) as read_session:
+            await admin_stats_handlers.show_statistics_handler(
+                callback, i18n_data, settings, read_session, panel_service)
     elif action == "broadcast":
         await admin_broadcast_handlers.broadcast_message_prompt_handler(
             callback, state, i18n_data, settings, session)
@@ -105,12 +109,9 @@ async def admin_panel_actions_callback_handler(
     elif action == "users_list" and len(action_parts) > 2:
         # Route to users list handler with page number
         from . import user_management as admin_user_management_handlers
-        try:
-            page = int(action_parts[2])
-            await admin_user_management_handlers.users_list_handler(
-                callback, i18n_data, settings, session, page)
-        except (IndexError, ValueError):
-            await callback.answer("Invalid page number", show_alert=True)
+        await admin_user_management_handlers.users_list_handler(
+            callback, i18n_data, settings, session,
+            parse_page_ref(action_parts[2]))
     elif action == "users_search_prompt":
         from . import user_management as admin_user_management_handlers
         await admin_user_management_handlers.user_search_prompt_handler(
@@ -139,11 +140,13 @@ async def admin_panel_actions_callback_handler(
         await show_queue_status_handler(callback, i18n_data)
     elif action == "view_payments":
         from . import payments as admin_payments_handlers
-        await admin_payments_handlers.view_payments_handler(
-            callback, i18n_data, settings, session)
+        async with read_only_session_factory.read_session(session) as read_session:
+            await admin_payments_handlers.view_payments_handler(
+                callback, i18n_data, settings, read_session)
     elif action == "ads":
         from . import ads as admin_ads_handlers
-        await admin_ads_handlers.show_ads_menu(callback, settings, i18n_data, session)
+        async with read_only_session_factory.read_session(session) as read_session:
+            await admin_ads_handlers.show_ads_menu(callback, settings, i18n_data, read_session)
     elif action == "ads_create":
         from . import ads as admin_ads_handlers
         await admin_ads_handlers.ads_create_start(callback, state, settings, i18n_data)
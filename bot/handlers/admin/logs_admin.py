@@ -1,9 +1,7 @@
+import asyncio
 import logging
-import math
 import re
-import csv
-import io
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from aiogram import Router, F, types, Bot
 from aiogram.fsm.context import FSMContext
 from typing import Optional, List, Dict, Any
@@ -13,16 +11,25 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import Settings
 
 from db.dal import message_log_dal, user_dal
-from db.models import MessageLog, User
+from db.dal.pagination import KeysetPage, RowCount
+from db.models import User
+from db.read_replica import ReadOnlySessionFactory
 
 from bot.states.admin_states import AdminStates
 from bot.keyboards.inline.admin_keyboards import (
     get_logs_menu_keyboard, get_logs_pagination_keyboard,
-    get_back_to_admin_panel_keyboard)
+    get_logs_export_keyboard, get_back_to_admin_panel_keyboard)
 from bot.middlewares.i18n import JsonI18n
+from bot.middlewares.read_only_session import READ_ONLY_DB_FLAG
+from bot.utils.background_tasks import run_in_background
+from bot.utils.export_writer import GzipCsvPartWriter, parse_export_filters
+from bot.utils.keyset_cursor import (PageRef, current_page_index,
+                                     format_total_pages, next_page_ref,
+                                     parse_page_ref, prev_page_ref)
 
 router = Router(name="admin_logs_router")
 USERNAME_REGEX = re.compile(r"^[a-zA-Z0-9_]{5,32}$")
+LOGS_EXPORT_PRESET_DAYS = {"7d": 7, "30d": 30, "all": None}
 
 
 async def display_logs_menu(callback: types.CallbackQuery, i18n_data: dict,
@@ -49,9 +56,9 @@ async def display_logs_menu(callback: types.CallbackQuery, i18n_data: dict,
 
 
 async def _display_formatted_logs(target_message: types.Message,
-                                  logs: List[MessageLog],
-                                  total_logs: int,
-                                  current_page_idx: int,
+                                  logs_page: KeysetPage,
+                                  total_logs: RowCount,
+                                  page_ref: PageRef,
                                   settings: Settings,
                                   title_key: str,
                                   base_pagination_callback_data: str,
@@ -62,23 +69,24 @@ async def _display_formatted_logs(target_message: types.Message,
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
     page_size = settings.LOGS_PAGE_SIZE
     actual_title_kwargs = title_kwargs or {}
-
-    if not logs and total_logs == 0:
+    logs = logs_page.items
+    reply_markup = get_logs_pagination_keyboard(
+        prev_page_ref(page_ref, logs_page),
+        next_page_ref(page_ref, logs_page),
+        base_pagination_callback_data,
+        i18n,
+        current_lang,
+        back_to_logs_menu=True)
+
+    if not logs:
         text = _(
             title_key, current_page=1, total_pages=1, **
             actual_title_kwargs) + "\n\n" + _("admin_no_logs_found")
-        reply_markup = get_logs_pagination_keyboard(
-            current_page_idx,
-            1,
-            base_pagination_callback_data,
-            i18n,
-            current_lang,
-            back_to_logs_menu=True)
     else:
-        total_pages = math.ceil(total_logs / page_size) if page_size > 0 else 1
         text = _(title_key,
-                 current_page=current_page_idx + 1,
-                 total_pages=max(1, total_pages),
+                 current_page=current_page_index(page_ref, logs_page) + 1,
+                 total_pages=format_total_pages(total_logs, page_size,
+                                                page_ref, logs_page),
                  **actual_title_kwargs) + "\n"
 
         log_entries_text = []
@@ -115,13 +123,6 @@ async def _display_formatted_logs(target_message: types.Message,
                   event_type=log_entry_model.event_type or 'N/A',
                   content_preview=content_preview).replace("\n", "\n  "))
         text += "\n\n".join(log_entries_text)
-        reply_markup = get_logs_pagination_keyboard(
-            current_page_idx,
-            total_pages,
-            base_pagination_callback_data,
-            i18n,
-            current_lang,
-            back_to_logs_menu=True)
 
     try:
         await target_message.edit_text(text,
@@ -153,17 +154,13 @@ async def _display_formatted_logs(target_message: types.Message,
                 break
 
 
-@router.callback_query(F.data.startswith("admin_logs:view_all"))
+@router.callback_query(F.data.startswith("admin_logs:view_all"),
+                       flags={READ_ONLY_DB_FLAG: True})
 async def view_all_logs_handler(callback: types.CallbackQuery,
                                 settings: Settings, i18n_data: dict,
                                 session: AsyncSession):
-    page_idx = 0
     parts = callback.data.split(":")
-    if len(parts) == 3:
-        try:
-            page_idx = int(parts[2])
-        except ValueError:
-            page_idx = 0
+    page_ref = parse_page_ref(parts[2] if len(parts) == 3 else None)
 
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
@@ -171,15 +168,18 @@ async def view_all_logs_handler(callback: types.CallbackQuery,
         await callback.answer("Error processing request.", show_alert=True)
         return
 
-    logs_models = await message_log_dal.get_all_message_logs(
-        session, settings.LOGS_PAGE_SIZE, page_idx * settings.LOGS_PAGE_SIZE)
+    logs_page = await message_log_dal.get_all_message_logs(
+        session,
+        settings.LOGS_PAGE_SIZE,
+        after=page_ref.after,
+        before=page_ref.before)
     total_logs_count = await message_log_dal.count_all_message_logs(session)
 
     await _display_formatted_logs(
         target_message=callback.message,
-        logs=logs_models,
+        logs_page=logs_page,
         total_logs=total_logs_count,
-        current_page_idx=page_idx,
+        page_ref=page_ref,
         settings=settings,
         title_key="admin_all_logs_title",
         base_pagination_callback_data="admin_logs:view_all",
@@ -208,7 +208,8 @@ async def prompt_user_for_logs_handler(callback: types.CallbackQuery,
     await callback.answer()
 
 
-@router.message(AdminStates.waiting_for_user_id_for_logs, F.text)
+@router.message(AdminStates.waiting_for_user_id_for_logs, F.text,
+                flags={READ_ONLY_DB_FLAG: True})
 async def process_user_id_for_logs_handler(message: types.Message,
                                            state: FSMContext,
                                            settings: Settings, i18n_data: dict,
@@ -247,16 +248,16 @@ async def process_user_id_for_logs_handler(message: types.Message,
         f"@{user_model_for_logs.username}"
         if user_model_for_logs.username else f"ID {target_user_id}")
 
-    logs_models = await message_log_dal.get_user_message_logs(
-        session, target_user_id, settings.LOGS_PAGE_SIZE, 0)
+    logs_page = await message_log_dal.get_user_message_logs(
+        session, target_user_id, settings.LOGS_PAGE_SIZE)
     total_user_logs_count = await message_log_dal.count_user_message_logs(
         session, target_user_id)
 
     await _display_formatted_logs(
         target_message=message,
-        logs=logs_models,
+        logs_page=logs_page,
         total_logs=total_user_logs_count,
-        current_page_idx=0,
+        page_ref=PageRef(),
         settings=settings,
         title_key="admin_user_logs_title",
         base_pagination_callback_data=f"admin_logs:view_user:{target_user_id}",
@@ -265,14 +266,15 @@ async def process_user_id_for_logs_handler(message: types.Message,
         title_kwargs={"user_display": user_display_name})
 
 
-@router.callback_query(F.data.startswith("admin_logs:view_user:"))
+@router.callback_query(F.data.startswith("admin_logs:view_user:"),
+                       flags={READ_ONLY_DB_FLAG: True})
 async def view_user_logs_paginated_handler(callback: types.CallbackQuery,
                                            settings: Settings, i18n_data: dict,
                                            session: AsyncSession):
     try:
         parts = callback.data.split(":")
         target_user_id = int(parts[2])
-        page_idx = int(parts[3])
+        page_ref = parse_page_ref(parts[3])
     except (IndexError, ValueError):
         await callback.answer("Invalid log request format.", show_alert=True)
         return
@@ -294,17 +296,20 @@ async def view_user_logs_paginated_handler(callback: types.CallbackQuery,
         f"@{user_model_for_logs.username}"
         if user_model_for_logs.username else f"ID {target_user_id}")
 
-    logs_models = await message_log_dal.get_user_message_logs(
-        session, target_user_id, settings.LOGS_PAGE_SIZE,
-        page_idx * settings.LOGS_PAGE_SIZE)
+    logs_page = await message_log_dal.get_user_message_logs(
+        session,
+        target_user_id,
+        settings.LOGS_PAGE_SIZE,
+        after=page_ref.after,
+        before=page_ref.before)
     total_user_logs_count = await message_log_dal.count_user_message_logs(
         session, target_user_id)
 
     await _display_formatted_logs(
         target_message=callback.message,
-        logs=logs_models,
+        logs_page=logs_page,
         total_logs=total_user_logs_count,
-        current_page_idx=page_idx,
+        page_ref=page_ref,
         settings=settings,
         title_key="admin_user_logs_title",
         base_pagination_callback_data=f"admin_logs:view_user:{target_user_id}",
@@ -316,6 +321,8 @@ async def view_user_logs_paginated_handler(callback: types.CallbackQuery,
 
 @router.callback_query(F.data == "admin_action:view_logs_menu",
                        AdminStates.waiting_for_user_id_for_logs)
+@router.callback_query(F.data == "admin_action:view_logs_menu",
+                       AdminStates.waiting_for_logs_export_filters)
 async def cancel_log_user_input_state_to_menu(callback: types.CallbackQuery,
                                               state: FSMContext,
                                               settings: Settings,
@@ -326,10 +333,106 @@ async def cancel_log_user_input_state_to_menu(callback: types.CallbackQuery,
     await display_logs_menu(callback, i18n_data, settings, session)
 
 
+def _log_row_to_csv(row) -> List[Any]:
+    timestamp_str = row.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC') if row.timestamp else ''
+    content_clean = (row.content or '').replace('\n', ' ').replace('\r', ' ').strip()
+    raw_update_clean = (row.raw_update_preview or '').replace('\n', ' ').replace('\r', ' ').strip()
+    return [
+        row.log_id or '',
+        timestamp_str,
+        row.user_id or '',
+        row.telegram_username or '',
+        row.telegram_first_name or '',
+        row.event_type or '',
+        content_clean,
+        'Yes' if row.is_admin_event else 'No',
+        row.target_user_id or '',
+        raw_update_clean,
+    ]
+
+
+async def _export_logs_job(bot: Bot,
+                           chat_id: int,
+                           read_only_session_factory: ReadOnlySessionFactory,
+                           i18n: JsonI18n,
+                           current_lang: str,
+                           date_from: Optional[datetime],
+                           date_to: Optional[datetime],
+                           event_type_prefixes: List[str]):
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    headers = [
+        _("admin_csv_header_log_id"),
+        _("admin_csv_header_timestamp"),
+        _("admin_csv_header_user_id"),
+        _("admin_csv_header_telegram_username"),
+        _("admin_csv_header_telegram_first_name"),
+        _("admin_csv_header_event_type"),
+        _("admin_csv_header_content"),
+        _("admin_csv_header_is_admin_event"),
+        _("admin_csv_header_target_user_id"),
+        _("admin_csv_header_raw_update_preview")
+    ]
+    now = datetime.now()
+    writer = GzipCsvPartWriter(
+        filename_prefix=f"message_logs_{now.strftime('%Y%m%d_%H%M%S')}",
+        header=headers)
+
+    try:
+        async with read_only_session_factory() as session:
+            async for batch in message_log_dal.stream_message_logs_for_export(
+                    session,
+                    date_from=date_from,
+                    date_to=date_to,
+                    event_type_prefixes=event_type_prefixes):
+                csv_rows = [_log_row_to_csv(row) for row in batch]
+                # gzip + disk writes stay off the event loop
+                await asyncio.to_thread(writer.writerows, csv_rows)
+
+        parts = await asyncio.to_thread(writer.close)
+        if writer.total_rows == 0:
+            await bot.send_message(chat_id, _("admin_logs_csv_no_data"))
+            return
+
+        for index, part in enumerate(parts, start=1):
+            await bot.send_document(
+                chat_id,
+                types.FSInputFile(part.path, filename=part.filename),
+                caption=_("admin_logs_csv_export_success",
+                          count=part.rows,
+                          total=writer.total_rows,
+                          part=index,
+                          parts=len(parts)))
+        logging.info(
+            f"Logs export for chat {chat_id} finished: {writer.total_rows} rows in {len(parts)} file(s)."
+        )
+    except Exception as e:
+        logging.error(f"Error exporting logs to CSV: {e}", exc_info=True)
+        try:
+            await bot.send_message(
+                chat_id, _("admin_logs_csv_export_failed", error=str(e)))
+        except Exception:
+            pass
+    finally:
+        writer.cleanup()
+
+
+def _start_logs_export(bot: Bot, chat_id: int,
+                       read_only_session_factory: ReadOnlySessionFactory,
+                       i18n: JsonI18n, current_lang: str, date_from: Optional[datetime],
+                       date_to: Optional[datetime],
+                       event_type_prefixes: List[str]) -> None:
+    run_in_background(
+        _export_logs_job(bot, chat_id, read_only_session_factory, i18n,
+                         current_lang, date_from, date_to,
+                         event_type_prefixes),
+        name=f"logs_export_{chat_id}")
+
+
 @router.callback_query(F.data == "admin_logs:export_csv")
 async def export_logs_csv_handler(callback: types.CallbackQuery,
-                                 settings: Settings, i18n_data: dict,
-                                 session: AsyncSession):
+                                  state: FSMContext,
+                                  settings: Settings, i18n_data: dict):
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     if not i18n or not callback.message:
@@ -337,89 +440,60 @@ async def export_logs_csv_handler(callback: types.CallbackQuery,
         return
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
 
-    await callback.answer(_(
-        "admin_logs_csv_export_started"
-    ))
+    await callback.message.edit_text(
+        _("admin_logs_export_filters_prompt"),
+        reply_markup=get_logs_export_keyboard(i18n, current_lang))
+    await state.set_state(AdminStates.waiting_for_logs_export_filters)
+    await callback.answer()
 
-    try:
-        # Get all logs (limit to 10000 for performance)
-        logs_models = await message_log_dal.get_all_message_logs(
-            session, limit=10000, offset=0)
-        
-        if not logs_models:
-            await callback.message.answer(_(
-                "admin_logs_csv_no_data"
-            ))
-            return
 
-        # Create CSV content
-        csv_buffer = io.StringIO()
-        csv_writer = csv.writer(csv_buffer, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        
-        # Write header
-        headers = [
-            _("admin_csv_header_log_id"),
-            _("admin_csv_header_timestamp"),
-            _("admin_csv_header_user_id"),
-            _("admin_csv_header_telegram_username"),
-            _("admin_csv_header_telegram_first_name"),
-            _("admin_csv_header_event_type"),
-            _("admin_csv_header_content"),
-            _("admin_csv_header_is_admin_event"),
-            _("admin_csv_header_target_user_id"),
-            _("admin_csv_header_raw_update_preview")
-        ]
-        csv_writer.writerow(headers)
-        
-        # Write data rows
-        for log in logs_models:
-            # Format timestamp
-            timestamp_str = log.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC') if log.timestamp else ''
-            
-            # Clean content and raw_update_preview (remove newlines and quotes for CSV)
-            content_clean = (log.content or '').replace('\n', ' ').replace('\r', ' ').strip()
-            raw_update_clean = (log.raw_update_preview or '').replace('\n', ' ').replace('\r', ' ').strip()
-            
-            row = [
-                log.log_id or '',
-                timestamp_str,
-                log.user_id or '',
-                log.telegram_username or '',
-                log.telegram_first_name or '',
-                log.event_type or '',
-                content_clean,
-                'Yes' if log.is_admin_event else 'No',
-                log.target_user_id or '',
-                raw_update_clean
-            ]
-            csv_writer.writerow(row)
-        
-        # Create file
-        csv_content = csv_buffer.getvalue()
-        csv_buffer.close()
-        
-        # Generate filename with current timestamp
-        now = datetime.now()
-        filename = f"message_logs_{now.strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        # Send as document
-        csv_file = types.BufferedInputFile(
-            csv_content.encode('utf-8-sig'),  # BOM for Excel compatibility
-            filename=filename
-        )
-        
-        await callback.message.answer_document(
-            csv_file,
-            caption=_(
-                "admin_logs_csv_export_success",
-                count=len(logs_models),
-                date=now.strftime('%Y-%m-%d %H:%M:%S')
-            )
-        )
-        
-    except Exception as e:
-        logging.error(f"Error exporting logs to CSV: {e}", exc_info=True)
-        await callback.message.answer(_(
-            "admin_logs_csv_export_failed",
-            error=str(e)
-        ))
+@router.callback_query(F.data.startswith("admin_logs:export_run:"))
+async def export_logs_preset_handler(callback: types.CallbackQuery,
+                                     state: FSMContext, bot: Bot,
+                                     settings: Settings, i18n_data: dict,
+                                     read_only_session_factory: ReadOnlySessionFactory):
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    preset = callback.data.split(":")[-1]
+    if not i18n or not callback.message or preset not in LOGS_EXPORT_PRESET_DAYS:
+        await callback.answer("Error processing CSV export.", show_alert=True)
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    await state.clear()
+    days = LOGS_EXPORT_PRESET_DAYS[preset]
+    date_from = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+
+    _start_logs_export(bot, callback.message.chat.id, read_only_session_factory,
+                       i18n, current_lang, date_from, None, [])
+    await callback.message.edit_text(
+        _("admin_logs_csv_export_started"),
+        reply_markup=get_logs_menu_keyboard(i18n, current_lang))
+    await callback.answer()
+
+
+@router.message(AdminStates.waiting_for_logs_export_filters, F.text)
+async def process_logs_export_filters_handler(
+        message: types.Message, state: FSMContext, bot: Bot,
+        settings: Settings, i18n_data: dict,
+        read_only_session_factory: ReadOnlySessionFactory):
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    if not i18n:
+        await message.reply("Language service error.")
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    parsed = parse_export_filters(message.text or "")
+    if parsed is None:
+        await message.answer(
+            _("admin_logs_export_filters_invalid"),
+            reply_markup=get_logs_export_keyboard(i18n, current_lang))
+        return
+
+    await state.clear()
+    date_from, date_to, event_type_prefixes = parsed
+    _start_logs_export(bot, message.chat.id, read_only_session_factory, i18n,
+                       current_lang, date_from, date_to, event_type_prefixes)
+    await message.answer(_("admin_logs_csv_export_started"),
+                         reply_markup=get_logs_menu_keyboard(i18n, current_lang))
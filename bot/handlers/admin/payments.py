@@ -1,7 +1,6 @@
+import asyncio
 import logging
-import csv
-import io
-from aiogram import Router, F, types
+from aiogram import Router, F, types, Bot
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta, timezone
@@ -10,28 +9,42 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
 from db.dal import payment_dal
+from db.dal.pagination import KeysetPage, RowCount
 from db.models import Payment
-from bot.keyboards.inline.admin_keyboards import get_back_to_admin_panel_keyboard
+from db.read_replica import ReadOnlySessionFactory
+from bot.keyboards.inline.admin_keyboards import (
+    get_back_to_admin_panel_keyboard, get_payments_export_format_keyboard,
+    get_payments_export_period_keyboard)
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 from bot.middlewares.i18n import JsonI18n
+from bot.middlewares.read_only_session import READ_ONLY_DB_FLAG
+from bot.states.admin_states import AdminStates
+from bot.utils.background_tasks import run_in_background
+from bot.utils.export_writer import (
+    EXPORT_FORMAT_CSV, available_export_formats, create_export_writer,
+    parse_export_filters)
+from bot.utils.keyset_cursor import (
+    PageRef, current_page_index, format_count, format_total_pages,
+    next_page_ref, parse_page_ref, prev_page_ref)
 
 router = Router(name="admin_payments_router")
 
+PAYMENTS_EXPORT_PRESET_DAYS = {"30d": 30, "365d": 365, "all": None}
+PAYMENT_PROVIDER_ALIASES = {"stars": "telegram_stars"}
 
-async def get_payments_with_pagination(session: AsyncSession, page: int = 0, 
-                                     page_size: int = 10) -> tuple[List[Payment], int]:
-    """Get payments with pagination and total count."""
-    offset = page * page_size
-    
+
+async def get_payments_with_pagination(session: AsyncSession, page_ref: PageRef,
+                                     page_size: int = 10) -> tuple[KeysetPage, RowCount]:
+    """Get a keyset page of payments and the (possibly estimated) total count."""
     # Get total count
     total_count = await payment_dal.get_payments_count(session)
     
     # Get payments for current page
-    payments = await payment_dal.get_recent_payment_logs_with_user(
-        session, limit=page_size, offset=offset
+    payments_page = await payment_dal.get_succeeded_payments_page(
+        session, limit=page_size, after=page_ref.after, before=page_ref.before
     )
     
-    return payments, total_count
+    return payments_page, total_count
 
 
 def format_payment_text(payment: Payment, i18n: JsonI18n, lang: str, settings: Settings) -> str:
@@ -87,7 +100,8 @@ def format_payment_text(payment: Payment, i18n: JsonI18n, lang: str, settings: S
 
 
 async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict, 
-                              settings: Settings, session: AsyncSession, page: int = 0):
+                              settings: Settings, session: AsyncSession,
+                              page_ref: Optional[PageRef] = None):
     """Display paginated list of all payments."""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -97,10 +111,13 @@ async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict,
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
 
     page_size = 5  # Show 5 payments per page
-    payments, total_count = await get_payments_with_pagination(session, page, page_size)
-    total_pages = (total_count + page_size - 1) // page_size if total_count > 0 else 1
+    page_ref = page_ref or PageRef()
+    payments_page, total_count = await get_payments_with_pagination(session, page_ref, page_size)
+    payments = payments_page.items
+    page = current_page_index(page_ref, payments_page)
+    total_pages = format_total_pages(total_count, page_size, page_ref, payments_page)
 
-    if not payments and page == 0:
+    if not payments:
         await callback.message.edit_text(
             _("admin_no_payments_found"),
             reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n),
@@ -113,7 +130,7 @@ async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict,
     text_parts = [_("admin_payments_header")]
     text_parts.append(_("admin_payments_pagination_info", 
                        shown=len(payments), 
-                       total=total_count, 
+                       total=format_count(total_count), 
                        current_page=page + 1, 
                        total_pages=total_pages) + "\n")
     
@@ -126,13 +143,15 @@ async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict,
     
     # Pagination buttons
     nav_buttons = []
-    if page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"payments_page:{page-1}"))
+    prev_ref = prev_page_ref(page_ref, payments_page)
+    next_ref = next_page_ref(page_ref, payments_page)
+    if prev_ref is not None:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"payments_page:{prev_ref.encode()}"))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{page + 1}/{total_pages}", callback_data="noop"))
     
-    if page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"payments_page:{page+1}"))
+    if next_ref is not None:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"payments_page:{next_ref.encode()}"))
     
     if nav_buttons:
         builder.row(*nav_buttons)
@@ -145,7 +164,7 @@ async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict,
         ),
         InlineKeyboardButton(
             text=_("admin_refresh_payments"), 
-            callback_data=f"payments_page:{page}"
+            callback_data=f"payments_page:{page_ref.encode()}"
         )
     )
     
@@ -163,111 +182,233 @@ async def view_payments_handler(callback: types.CallbackQuery, i18n_data: dict,
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("payments_page:"))
+@router.callback_query(F.data.startswith("payments_page:"),
+                       AdminStates.waiting_for_payments_export_filters,
+                       flags={READ_ONLY_DB_FLAG: True})
+async def cancel_payments_export_handler(callback: types.CallbackQuery,
+                                         state: FSMContext, i18n_data: dict,
+                                         settings: Settings,
+                                         session: AsyncSession):
+    """Leave the export filter prompt and go back to the payments list."""
+    await state.clear()
+    await payments_pagination_handler(callback, i18n_data, settings, session)
+
+
+@router.callback_query(F.data.startswith("payments_page:"),
+                       flags={READ_ONLY_DB_FLAG: True})
 async def payments_pagination_handler(callback: types.CallbackQuery, i18n_data: dict, 
                                     settings: Settings, session: AsyncSession):
     """Handle pagination for payments list."""
-    try:
-        page = int(callback.data.split(":")[1])
-        await view_payments_handler(callback, i18n_data, settings, session, page)
-    except (ValueError, IndexError):
-        await callback.answer("Error processing pagination.", show_alert=True)
+    page_ref = parse_page_ref(callback.data.split(":", 1)[1])
+    await view_payments_handler(callback, i18n_data, settings, session, page_ref)
 
 
 @router.callback_query(F.data == "payments_export_csv")
-async def export_payments_csv_handler(callback: types.CallbackQuery, i18n_data: dict, 
-                                    settings: Settings, session: AsyncSession):
-    """Export all successful payments to CSV file."""
+async def export_payments_csv_handler(callback: types.CallbackQuery, i18n_data: dict,
+                                    settings: Settings):
+    """Ask which file format the payments export should use."""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
-    if not i18n:
+    if not i18n or not callback.message:
         await callback.answer("Language service error.", show_alert=True)
         return
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
 
+    await callback.message.edit_text(
+        _("admin_payments_export_format_prompt"),
+        reply_markup=get_payments_export_format_keyboard(
+            i18n, current_lang, available_export_formats()))
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("payments_export_format:"))
+async def payments_export_format_handler(callback: types.CallbackQuery,
+                                         state: FSMContext, i18n_data: dict,
+                                         settings: Settings):
+    """Remember the chosen format and ask for period/provider filters."""
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    export_format = callback.data.split(":", 1)[1]
+    if not i18n or not callback.message or export_format not in available_export_formats():
+        await callback.answer("Error processing export.", show_alert=True)
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    await state.set_state(AdminStates.waiting_for_payments_export_filters)
+    await state.update_data(payments_export_format=export_format)
+    await callback.message.edit_text(
+        _("admin_payments_export_filters_prompt"),
+        reply_markup=get_payments_export_period_keyboard(i18n, current_lang))
+    await callback.answer()
+
+
+def _payment_row_for_export(row, traffic_mode: bool) -> list:
+    units_val = row.subscription_duration_months
+    if traffic_mode and units_val is not None:
+        try:
+            units_val = int(units_val) if float(units_val).is_integer() else float(units_val)
+        except Exception:
+            pass
+    return [
+        row.payment_id,
+        row.user_id,
+        row.username or "",
+        row.first_name or "",
+        row.amount,
+        row.currency,
+        row.provider or "",
+        row.status,
+        row.description or "",
+        units_val,
+        row.created_at,
+        row.provider_payment_id or "",
+    ]
+
+
+async def _export_payments_job(bot: Bot, chat_id: int,
+                               read_only_session_factory: ReadOnlySessionFactory,
+                               i18n: JsonI18n, current_lang: str,
+                               settings: Settings, export_format: str,
+                               date_from: Optional[datetime],
+                               date_to: Optional[datetime],
+                               providers: List[str]):
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    headers = [
+        _("admin_csv_payment_id"),
+        _("admin_csv_user_id"),
+        _("admin_csv_username"),
+        _("admin_csv_first_name"),
+        _("admin_csv_amount"),
+        _("admin_csv_currency"),
+        _("admin_csv_provider"),
+        _("admin_csv_status"),
+        _("admin_csv_description"),
+        _("admin_csv_units"),
+        _("admin_csv_created_at"),
+        _("admin_csv_provider_payment_id")
+    ]
+    traffic_mode = getattr(settings, "traffic_sale_mode", False)
+    current_time = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    # Units are fractional in traffic mode; None (no units) stays a null
+    column_types = [int, int, str, str, float, str, str, str, str,
+                    float if traffic_mode else int, datetime, str]
+    writer = create_export_writer(export_format,
+                                  f"payments_export_{current_time}", headers,
+                                  column_types=column_types)
+
     try:
-        # Get all successful payments
-        all_payments = await payment_dal.get_all_succeeded_payments_with_user(session)
-        
-        if not all_payments:
-            await callback.answer(
-                _("admin_no_payments_to_export"),
-                show_alert=True
-            )
+        async with read_only_session_factory() as session:
+            async for batch in payment_dal.stream_succeeded_payments_for_export(
+                    session,
+                    date_from=date_from,
+                    date_to=date_to,
+                    providers=providers):
+                rows = [_payment_row_for_export(row, traffic_mode) for row in batch]
+                # Compression and disk writes stay off the event loop
+                await asyncio.to_thread(writer.writerows, rows)
+
+        parts = await asyncio.to_thread(writer.close)
+        if writer.total_rows == 0:
+            await bot.send_message(chat_id, _("admin_no_payments_to_export"))
             return
 
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            _("admin_csv_payment_id"),
-            _("admin_csv_user_id"),
-            _("admin_csv_username"),
-            _("admin_csv_first_name"),
-            _("admin_csv_amount"),
-            _("admin_csv_currency"),
-            _("admin_csv_provider"),
-            _("admin_csv_status"),
-            _("admin_csv_description"),
-            _("admin_csv_units"),
-            _("admin_csv_created_at"),
-            _("admin_csv_provider_payment_id")
-        ])
-
-        traffic_mode = getattr(settings, "traffic_sale_mode", False)
-        
-        # Write payment data
-        for payment in all_payments:
-            units_val = payment.subscription_duration_months or ""
-            if traffic_mode and units_val not in ("", None):
-                try:
-                    units_val = str(int(units_val)) if float(units_val).is_integer() else f"{units_val:g}"
-                except Exception:
-                    units_val = payment.subscription_duration_months or ""
-            writer.writerow([
-                payment.payment_id,
-                payment.user_id,
-                payment.user.username if payment.user and payment.user.username else "",
-                payment.user.first_name if payment.user and payment.user.first_name else "",
-                payment.amount,
-                payment.currency,
-                payment.provider or "",
-                payment.status,
-                payment.description or "",
-                units_val,
-                payment.created_at.strftime('%Y-%m-%d %H:%M:%S') if payment.created_at else "",
-                payment.provider_payment_id or ""
-            ])
-        
-        # Prepare file
-        csv_content = output.getvalue().encode('utf-8-sig')  # UTF-8 with BOM for Excel
-        output.close()
-        
-        # Generate filename with current date
-        current_time = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        filename = f"payments_export_{current_time}.csv"
-        
-        # Send file
-        from aiogram.types import BufferedInputFile
-        file = BufferedInputFile(csv_content, filename=filename)
-        
-        await callback.message.reply_document(
-            document=file,
-            caption=_("admin_payments_export_success",
-                     count=len(all_payments))
+        for index, part in enumerate(parts, start=1):
+            await bot.send_document(
+                chat_id,
+                types.FSInputFile(part.path, filename=part.filename),
+                caption=_("admin_payments_export_success",
+                          count=part.rows,
+                          total=writer.total_rows,
+                          part=index,
+                          parts=len(parts)))
+        logging.info(
+            f"Payments export ({export_format}) for chat {chat_id} finished: "
+            f"{writer.total_rows} rows in {len(parts)} file(s)."
         )
-        
-        await callback.answer(
-            _("admin_export_sent"),
-            show_alert=False
-        )
-        
     except Exception as e:
-        logging.error(f"Failed to export payments CSV: {e}", exc_info=True)
-        await callback.answer(f"❌ Ошибка экспорта: {str(e)}", show_alert=True)
+        logging.error(f"Failed to export payments: {e}", exc_info=True)
+        try:
+            await bot.send_message(
+                chat_id, _("admin_payments_export_failed", error=str(e)))
+        except Exception:
+            pass
+    finally:
+        writer.cleanup()
+
+
+async def _start_payments_export(state: FSMContext, bot: Bot, chat_id: int,
+                                 read_only_session_factory: ReadOnlySessionFactory,
+                                 i18n: JsonI18n, current_lang: str,
+                                 settings: Settings,
+                                 date_from: Optional[datetime],
+                                 date_to: Optional[datetime],
+                                 providers: List[str]) -> None:
+    state_data = await state.get_data()
+    export_format = state_data.get("payments_export_format", EXPORT_FORMAT_CSV)
+    await state.clear()
+    run_in_background(
+        _export_payments_job(bot, chat_id, read_only_session_factory, i18n,
+                             current_lang, settings, export_format, date_from,
+                             date_to, providers),
+        name=f"payments_export_{chat_id}")
+
+
+@router.callback_query(F.data.startswith("payments_export_run:"),
+                       AdminStates.waiting_for_payments_export_filters)
+async def payments_export_preset_handler(callback: types.CallbackQuery,
+                                         state: FSMContext, bot: Bot,
+                                         i18n_data: dict, settings: Settings,
+                                         read_only_session_factory: ReadOnlySessionFactory):
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    preset = callback.data.split(":", 1)[1]
+    if not i18n or not callback.message or preset not in PAYMENTS_EXPORT_PRESET_DAYS:
+        await callback.answer("Error processing export.", show_alert=True)
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
 
+    days = PAYMENTS_EXPORT_PRESET_DAYS[preset]
+    date_from = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    await _start_payments_export(state, bot, callback.message.chat.id,
+                                 read_only_session_factory, i18n, current_lang,
+                                 settings, date_from, None, [])
+    await callback.message.edit_text(
+        _("admin_payments_export_started"),
+        reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n))
+    await callback.answer()
+
+
+@router.message(AdminStates.waiting_for_payments_export_filters, F.text)
+async def payments_export_filters_handler(message: types.Message,
+                                          state: FSMContext, bot: Bot,
+                                          i18n_data: dict, settings: Settings,
+                                          read_only_session_factory: ReadOnlySessionFactory):
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    if not i18n:
+        await message.reply("Language service error.")
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    parsed = parse_export_filters(message.text or "")
+    if parsed is None:
+        await message.answer(
+            _("admin_payments_export_filters_invalid"),
+            reply_markup=get_payments_export_period_keyboard(i18n, current_lang))
+        return
+
+    date_from, date_to, provider_tokens = parsed
+    providers = [
+        PAYMENT_PROVIDER_ALIASES.get(token.lower(), token.lower())
+        for token in provider_tokens
+    ]
+    await _start_payments_export(state, bot, message.chat.id,
+                                 read_only_session_factory, i18n, current_lang,
+                                 settings, date_from, date_to, providers)
+    await message.answer(
+        _("admin_payments_export_started"),
+        reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n))
 
 @router.callback_query(F.data == "noop")
 async def noop_handler(callback: types.CallbackQuery):
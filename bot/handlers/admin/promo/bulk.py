@@ -1,14 +1,16 @@
+import asyncio
 import logging
 import random
 import string
-import csv
-import io
-from aiogram import Router, F, types
+import time
+from aiogram import Bot, Router, F, types
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
+from aiogram.utils.text_decorations import html_decoration as hd
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
 from db.dal import promo_code_dal
@@ -16,6 +18,16 @@ from bot.states.admin_states import AdminStates
 from bot.keyboards.inline.admin_keyboards import get_back_to_admin_panel_keyboard, get_admin_panel_keyboard
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 from bot.middlewares.i18n import JsonI18n
+from bot.services.bot_identity_service import BotIdentityService
+from bot.utils.background_tasks import run_in_background
+from bot.utils.export_writer import CsvPartWriter
+
+BULK_PROMO_MAX_QUANTITY = 100_000
+# Codes per multi-row INSERT (8 bind parameters each, PostgreSQL allows 32767)
+BULK_PROMO_INSERT_CHUNK_SIZE = 1000
+# Chunks in a row that insert nothing before giving up
+BULK_PROMO_MAX_IDLE_CHUNKS = 5
+BULK_PROMO_PROGRESS_INTERVAL_SECONDS = 3
 
 router = Router(name="promo_bulk_router")
 
@@ -34,7 +46,8 @@ async def create_bulk_promo_prompt_handler(callback: types.CallbackQuery,
 
     # Step 1: Ask for quantity
     prompt_text = _(
-        "admin_bulk_promo_step1_quantity"
+        "admin_bulk_promo_step1_quantity",
+        max_quantity=BULK_PROMO_MAX_QUANTITY
     )
 
     try:
@@ -74,9 +87,10 @@ async def process_bulk_promo_quantity_handler(message: types.Message,
 
     try:
         quantity = int(message.text.strip())
-        if not (1 <= quantity <= 100):
+        if not (1 <= quantity <= BULK_PROMO_MAX_QUANTITY):
             await message.answer(_(
-                "admin_bulk_promo_invalid_quantity"
+                "admin_bulk_promo_invalid_quantity",
+                max_quantity=BULK_PROMO_MAX_QUANTITY
             ))
             return
         
@@ -226,9 +240,11 @@ async def process_bulk_promo_unlimited_validity(callback: types.CallbackQuery,
                                                state: FSMContext,
                                                i18n_data: dict,
                                                settings: Settings,
-                                               session: AsyncSession):
+                                               bot_identity_service: BotIdentityService,
+                                               async_session_factory: sessionmaker):
     await state.update_data(validity_days=None)
-    await create_bulk_promo_codes_final(callback, state, i18n_data, settings, session)
+    await create_bulk_promo_codes_final(callback, state, i18n_data, settings,
+                                        bot_identity_service, async_session_factory)
 
 
 # Step 4: Handle set validity
@@ -273,7 +289,8 @@ async def process_bulk_promo_validity_days_handler(message: types.Message,
                                                   state: FSMContext,
                                                   i18n_data: dict,
                                                   settings: Settings,
-                                                  session: AsyncSession):
+                                                  bot_identity_service: BotIdentityService,
+                                                  async_session_factory: sessionmaker):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
     if not i18n:
@@ -290,7 +307,8 @@ async def process_bulk_promo_validity_days_handler(message: types.Message,
             return
         
         await state.update_data(validity_days=validity_days)
-        await create_bulk_promo_codes_final(message, state, i18n_data, settings, session)
+        await create_bulk_promo_codes_final(message, state, i18n_data, settings,
+                                            bot_identity_service, async_session_factory)
         
     except ValueError:
         await message.answer(_(
@@ -301,12 +319,148 @@ async def process_bulk_promo_validity_days_handler(message: types.Message,
         await message.answer(_("error_occurred_try_again"))
 
 
+def _generate_promo_code_candidates(count: int, seen: Set[str]) -> List[str]:
+    """``count`` codes not generated before in this run (``seen`` is updated)."""
+    candidates: List[str] = []
+    while len(candidates) < count:
+        code = generate_unique_promo_code()
+        if code not in seen:
+            seen.add(code)
+            candidates.append(code)
+    return candidates
+
+
+async def _show_bulk_promo_status(bot: Bot, chat_id: int, message_id: int,
+                                  text: str, reply_markup=None) -> None:
+    try:
+        await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id,
+                                    reply_markup=reply_markup, parse_mode="HTML")
+    except Exception as e:
+        logging.debug(f"Could not update bulk promo status message: {e}")
+        if reply_markup is None:
+            return
+        # Never fatal: the job still has to send the CSV afterwards
+        try:
+            await bot.send_message(chat_id, text, reply_markup=reply_markup,
+                                   parse_mode="HTML")
+        except Exception as e_send:
+            logging.warning(f"Could not send bulk promo status message: {e_send}")
+
+
+async def _create_bulk_promo_codes_job(bot: Bot,
+                                       chat_id: int,
+                                       status_message_id: int,
+                                       async_session_factory: sessionmaker,
+                                       i18n: JsonI18n,
+                                       current_lang: str,
+                                       quantity: int,
+                                       validity_days: Optional[int],
+                                       promo_data: Dict[str, Any],
+                                       bot_username: str):
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    valid_until = promo_data["valid_until"]
+    valid_until_text = (valid_until.strftime("%Y-%m-%d %H:%M:%S")
+                        if valid_until else "Без ограничений")
+    writer = CsvPartWriter(
+        filename_prefix=f"bulk_promo_codes_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        header=[
+            "Промокод", "Бонусные дни", "Макс. активации", "Действителен до",
+            "Команда для старта", "Ссылка для активации"
+        ])
+    created = 0
+    seen: Set[str] = set()
+    idle_chunks = 0
+    last_progress_at = time.monotonic()
+    error: Optional[Exception] = None
+
+    try:
+        try:
+            while created < quantity:
+                codes = _generate_promo_code_candidates(
+                    min(quantity - created, BULK_PROMO_INSERT_CHUNK_SIZE), seen)
+                # A short transaction per chunk; codes already in the table
+                # are skipped by the insert and topped up by the next chunk
+                async with async_session_factory() as session:
+                    inserted = await promo_code_dal.insert_promo_codes(
+                        session, codes, promo_data)
+                    await session.commit()
+                created += len(inserted)
+                await asyncio.to_thread(writer.writerows, [[
+                    code,
+                    promo_data["bonus_days"],
+                    promo_data["max_activations"],
+                    valid_until_text,
+                    f"/start promo_{code}",
+                    f"https://t.me/{bot_username}?start=promo_{code}",
+                ] for code in inserted])
+
+                idle_chunks = 0 if inserted else idle_chunks + 1
+                if idle_chunks >= BULK_PROMO_MAX_IDLE_CHUNKS:
+                    raise RuntimeError("no new codes could be inserted")
+
+                if (created < quantity and time.monotonic() - last_progress_at
+                        >= BULK_PROMO_PROGRESS_INTERVAL_SECONDS):
+                    last_progress_at = time.monotonic()
+                    await _show_bulk_promo_status(
+                        bot, chat_id, status_message_id,
+                        _("admin_bulk_promo_progress", created=created,
+                          quantity=quantity))
+        except Exception as e:
+            # Codes of committed chunks exist; still send them below
+            logging.error(f"Error creating bulk promo codes: {e}", exc_info=True)
+            error = e
+
+        parts = await asyncio.to_thread(writer.close)
+
+        # The CSV below is sent whatever happens to the summary
+        try:
+            if validity_days:
+                validity_text = _("admin_bulk_promo_validity_days", days=validity_days)
+            else:
+                validity_text = _("admin_promo_unlimited")
+            summary_lines = [
+                _("admin_bulk_promo_created_title"),
+                _("admin_bulk_promo_created_stats", created=created, total=quantity),
+                _("admin_bulk_promo_settings",
+                  bonus_days=promo_data["bonus_days"],
+                  max_activations=promo_data["max_activations"],
+                  validity=validity_text),
+            ]
+            if error is not None:
+                summary_lines.append(_("admin_bulk_promo_failed",
+                                       error=hd.quote(str(error)[:200])))
+            await _show_bulk_promo_status(
+                bot, chat_id, status_message_id, "\n".join(summary_lines),
+                reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n))
+        except Exception as e:
+            logging.error(f"Failed to report bulk promo creation result: {e}", exc_info=True)
+
+        if created:
+            for index, part in enumerate(parts, start=1):
+                await bot.send_document(
+                    chat_id,
+                    types.FSInputFile(part.path, filename=part.filename),
+                    caption=_("admin_bulk_promo_csv_caption",
+                              count=part.rows,
+                              total=created,
+                              part=index,
+                              parts=len(parts),
+                              bonus_days=promo_data["bonus_days"]))
+        logging.info(
+            f"Bulk promo creation for chat {chat_id} finished: {created}/{quantity} codes."
+        )
+    finally:
+        writer.cleanup()
+
+
 async def create_bulk_promo_codes_final(callback_or_message,
                                        state: FSMContext,
                                        i18n_data: dict,
                                        settings: Settings,
-                                       session: AsyncSession):
-    """Final step - create multiple promo codes in database"""
+                                       bot_identity_service: BotIdentityService,
+                                       async_session_factory: sessionmaker):
+    """Final step - start creating the promo codes in the background"""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
     if not i18n:
@@ -317,194 +471,50 @@ async def create_bulk_promo_codes_final(callback_or_message,
         data = await state.get_data()
         quantity = data["quantity"]
         
-        # Show progress message
+        # Show progress message; the job keeps updating it
         progress_text = _(
             "admin_bulk_promo_creating",
             quantity=quantity
         )
         
-        if hasattr(callback_or_message, 'message'):  # CallbackQuery
+        if isinstance(callback_or_message, types.CallbackQuery):
             try:
-                await callback_or_message.message.edit_text(progress_text, parse_mode="HTML")
+                status_message = await callback_or_message.message.edit_text(
+                    progress_text, parse_mode="HTML")
             except Exception:
-                await callback_or_message.message.answer(progress_text, parse_mode="HTML")
+                status_message = await callback_or_message.message.answer(
+                    progress_text, parse_mode="HTML")
             await callback_or_message.answer()
         else:  # Message
-            await callback_or_message.answer(progress_text, parse_mode="HTML")
-        
-        # Generate and create promo codes
-        created_codes = []
-        failed_codes = []
-        
-        for i in range(quantity):
-            try:
-                # Generate unique code
-                attempts = 0
-                while attempts < 10:  # Max 10 attempts to generate unique code
-                    promo_code = generate_unique_promo_code()
-                    existing_promo = await promo_code_dal.get_promo_code_by_code(session, promo_code)
-                    if not existing_promo:
-                        break
-                    attempts += 1
-                
-                if attempts >= 10:
-                    failed_codes.append(f"Код #{i+1} (не удалось сгенерировать уникальный)")
-                    continue
-                
-                # Prepare promo code data
-                promo_data = {
-                    "code": promo_code,
-                    "bonus_days": data["bonus_days"],
-                    "max_activations": data["max_activations"],
-                    "current_activations": 0,
-                    "is_active": True,
-                    "created_by_admin_id": callback_or_message.from_user.id,
-                    "created_at": datetime.now(timezone.utc)
-                }
-                
-                # Set validity
-                if data.get("validity_days"):
-                    promo_data["valid_until"] = datetime.now(timezone.utc) + timedelta(days=data["validity_days"])
-                else:
-                    promo_data["valid_until"] = None
-                
-                # Create promo code
-                created_promo = await promo_code_dal.create_promo_code(session, promo_data)
-                created_codes.append(created_promo.code)
-                
-            except Exception as e:
-                logging.error(f"Error creating bulk promo code #{i+1}: {e}")
-                failed_codes.append(f"Код #{i+1} ({str(e)[:50]})")
-        
-        await session.commit()
-        
-        # Success message
-        success_lines = [
-            _(
-                "admin_bulk_promo_created_title"
-            ),
-            _(
-                "admin_bulk_promo_created_stats",
-                created=len(created_codes),
-                total=quantity
-            )
-        ]
-        
-        if data.get("validity_days"):
-            validity_text = f"{data['validity_days']} дней"
-        else:
-            validity_text = _("admin_promo_unlimited")
-        
-        success_lines.append(
-            _(
-                "admin_bulk_promo_settings",
-                bonus_days=data["bonus_days"],
-                max_activations=data["max_activations"],
-                validity=validity_text
-            )
-        )
-        
-        # Create CSV file with promo codes if any were created
-        csv_file = None
-        if created_codes:
-            success_lines.append(f"\n🎟 <b>Создано {len(created_codes)} промокодов</b>")
-            success_lines.append("📄 CSV файл с промокодами отправлен отдельным сообщением")
-            
-            # Create CSV file
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # CSV headers
-            writer.writerow([
-                "Промокод", "Бонусные дни", "Макс. активации", "Действителен до", 
-                "Команда для старта", "Ссылка для активации"
-            ])
-            
-            # Get real bot username
-            bot_username = 'your_bot'  # fallback
-            try:
-                if hasattr(callback_or_message, 'message'):
-                    bot = callback_or_message.message.bot
-                else:
-                    bot = callback_or_message.bot
-                
-                bot_info = await bot.get_me()
-                bot_username = bot_info.username or 'your_bot'
-            except Exception as e:
-                logging.error(f"Failed to get bot username for CSV links: {e}")
-                bot_username = 'your_bot'
-            
-            for code in created_codes:
-                # Determine validity info
-                if data.get("validity_days"):
-                    valid_until = (datetime.now(timezone.utc) + timedelta(days=data["validity_days"])).strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    valid_until = "Без ограничений"
-                
-                start_command = f"/start promo_{code}"
-                telegram_link = f"https://t.me/{bot_username}?start=promo_{code}"
-                
-                writer.writerow([
-                    code,
-                    data["bonus_days"],
-                    data["max_activations"], 
-                    valid_until,
-                    start_command,
-                    telegram_link
-                ])
-            
-            output.seek(0)
-            
-            # Create file for sending
-            filename = f"bulk_promo_codes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            csv_file = types.BufferedInputFile(
-                output.getvalue().encode('utf-8-sig'),  # BOM for correct Excel display
-                filename=filename
-            )
-        
-        if failed_codes:
-            success_lines.append(f"\n❌ <b>Ошибки ({len(failed_codes)}):</b>")
-            for error in failed_codes[:5]:  # Show first 5 errors
-                success_lines.append(error)
-            if len(failed_codes) > 5:
-                success_lines.append(f"... и еще {len(failed_codes) - 5} ошибок")
-        
-        success_text = "\n".join(success_lines)
-        
-        if hasattr(callback_or_message, 'message'):  # CallbackQuery
-            try:
-                await callback_or_message.message.edit_text(
-                    success_text,
-                    reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n),
-                    parse_mode="HTML"
-                )
-                message_obj = callback_or_message.message
-            except Exception:
-                message_obj = await callback_or_message.message.answer(
-                    success_text,
-                    reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n),
-                    parse_mode="HTML"
-                )
-            await callback_or_message.answer()
-        else:  # Message
-            message_obj = await callback_or_message.answer(
-                success_text,
-                reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n),
-                parse_mode="HTML"
-            )
-        
-        # Send CSV file if created
-        if csv_file:
-            csv_caption = f"📄 Промокоды для массового создания\n💫 Всего: {len(created_codes)} промокодов\n🎁 Бонус: {data['bonus_days']} дней каждый"
-            await message_obj.answer_document(csv_file, caption=csv_caption)
-        
+            status_message = await callback_or_message.answer(progress_text, parse_mode="HTML")
+
+        now = datetime.now(timezone.utc)
+        validity_days = data.get("validity_days")
+        promo_data = {
+            "bonus_days": data["bonus_days"],
+            "max_activations": data["max_activations"],
+            "current_activations": 0,
+            "is_active": True,
+            "created_by_admin_id": callback_or_message.from_user.id,
+            "created_at": now,
+            "valid_until": now + timedelta(days=validity_days) if validity_days else None,
+        }
+        bot_username = await bot_identity_service.get_username() or 'your_bot'
         await state.clear()
+
+        chat_id = status_message.chat.id
+        run_in_background(
+            _create_bulk_promo_codes_job(
+                callback_or_message.bot, chat_id, status_message.message_id,
+                async_session_factory, i18n, current_lang, quantity,
+                validity_days, promo_data, bot_username),
+            name=f"bulk_promo_{chat_id}")
         
     except Exception as e:
-        logging.error(f"Error creating bulk promo codes: {e}")
+        logging.error(f"Error starting bulk promo creation: {e}")
         error_text = _("error_occurred_try_again")
         
-        if hasattr(callback_or_message, 'message'):  # CallbackQuery
+        if isinstance(callback_or_message, types.CallbackQuery):
             await callback_or_message.message.answer(error_text)
         else:  # Message
             await callback_or_message.answer(error_text)
@@ -28,6 +28,12 @@ from bot.utils.telegram_markup import (
     is_profile_link_error,
     remove_profile_link_buttons,
 )
+from bot.utils.keyset_cursor import (
+    PageRef,
+    current_page_index,
+    format_count,
+    format_total_pages,
+)
 
 router = Router(name="admin_user_management_router")
 USERNAME_REGEX = re.compile(r"^[a-zA-Z0-9_]{5,32}$")
@@ -35,7 +41,8 @@ USERNAME_REGEX = re.compile(r"^[a-zA-Z0-9_]{5,32}$")
 
 async def users_list_handler(callback: types.CallbackQuery,
                               i18n_data: dict, settings: Settings,
-                              session: AsyncSession, page: int = 0):
+                              session: AsyncSession,
+                              page_ref: Optional[PageRef] = None):
     """Display paginated list of all users"""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -49,19 +56,21 @@ async def users_list_handler(callback: types.CallbackQuery,
         from bot.keyboards.inline.admin_keyboards import get_users_list_keyboard
         from db.dal import user_dal
         
-        users = await user_dal.get_all_users_paginated(session, page=page, page_size=15)
+        page_ref = page_ref or PageRef()
+        users_page = await user_dal.get_all_users_paginated(
+            session, page_size=15, after=page_ref.after, before=page_ref.before
+        )
         total_users = await user_dal.count_all_users(session)
-        total_pages = max(1, (total_users + 14) // 15)
         
         # Format message
         header_text = _(
             "admin_users_list_header",
-            current=page + 1,
-            total=total_pages,
-            total_users=total_users
+            current=current_page_index(page_ref, users_page) + 1,
+            total=format_total_pages(total_users, 15, page_ref, users_page),
+            total_users=format_count(total_users)
         )
         
-        keyboard = get_users_list_keyboard(users, page, total_users, i18n, current_lang, page_size=15)
+        keyboard = get_users_list_keyboard(users_page, page_ref, i18n, current_lang)
         
         await callback.message.edit_text(
             header_text,
@@ -277,7 +286,7 @@ async def format_user_card(user: User, session: AsyncSession,
     try:
         # Count user logs
         logs_count = await message_log_dal.count_user_message_logs(session, user.user_id)
-        card_parts.append(f"{_('admin_user_actions_count_label')} {hcode(str(logs_count))}")
+        card_parts.append(f"{_('admin_user_actions_count_label')} {hcode(format_count(logs_count))}")
         
         # Check if user had any subscriptions
         had_subscriptions = await subscription_service.has_had_any_subscription(session, user.user_id)
@@ -546,7 +555,8 @@ async def handle_view_user_logs(callback: types.CallbackQuery, user: User,
     
     try:
         # Get recent logs for user
-        logs = await message_log_dal.get_user_message_logs(session, user.user_id, limit=10, offset=0)
+        logs_page = await message_log_dal.get_user_message_logs(session, user.user_id, limit=10)
+        logs = logs_page.items
         
         if not logs:
             await callback.answer(_(
@@ -660,7 +670,7 @@ async def handle_delete_user_prompt(callback: types.CallbackQuery, state: FSMCon
 
     admin = callback.from_user
     admin_id = admin.id if admin else None
-    if not admin_id or admin_id not in settings.ADMIN_IDS:
+    if not admin_id or not settings.is_admin(admin_id):
         logging.warning(
             f"Unauthorized delete attempt by user {admin_id} targeting {user.user_id}."
         )
@@ -743,7 +753,7 @@ async def process_delete_user_confirmation_handler(message: types.Message,
 
     admin = message.from_user
     admin_id = admin.id if admin else None
-    if not admin_id or admin_id not in settings.ADMIN_IDS:
+    if not admin_id or not settings.is_admin(admin_id):
         logging.warning(
             f"Unauthorized delete confirmation attempt by user {admin_id}."
         )
@@ -1276,7 +1286,7 @@ async def user_card_from_list_handler(callback: types.CallbackQuery,
     try:
         parts = callback.data.split(":")
         user_id = int(parts[1])
-        page = int(parts[2])
+        page_ref_str = parts[2]
     except (IndexError, ValueError):
         await callback.answer("Invalid user data", show_alert=True)
         return
@@ -1303,7 +1313,7 @@ async def user_card_from_list_handler(callback: types.CallbackQuery,
     )
     keyboard.button(
         text=_("admin_user_back_to_list_button"),
-        callback_data=f"admin_action:users_list:{page}"
+        callback_data=f"admin_action:users_list:{page_ref_str}"
     )
     quick_links_width = 2 if user.referred_by_id else 1
     keyboard.adjust(2, 2, 2, quick_links_width, 1, 2, 1)
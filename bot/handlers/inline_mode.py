@@ -1,5 +1,5 @@
 import logging
-from aiogram import Router, types, Bot
+from aiogram import Router, types
 from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import Settings
 from db.dal import user_dal, payment_dal
 from bot.services.referral_service import ReferralService
+from bot.services.bot_identity_service import BotIdentityService
 from bot.middlewares.i18n import JsonI18n
 
 router = Router(name="inline_mode_router")
@@ -17,7 +18,7 @@ async def inline_query_handler(inline_query: InlineQuery,
                                settings: Settings,
                                i18n_data: dict,
                                referral_service: ReferralService,
-                               bot: Bot,
+                               bot_identity_service: BotIdentityService,
                                session: AsyncSession):
     """Handle inline queries for referral links and admin statistics"""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
@@ -32,14 +33,14 @@ async def inline_query_handler(inline_query: InlineQuery,
     results: List[InlineQueryResultArticle] = []
     
     # Check if user is admin
-    is_admin = user_id in settings.ADMIN_IDS if settings.ADMIN_IDS else False
+    is_admin = settings.is_admin(user_id)
     
     try:
         # For all users: referral functionality
         if not query or "реф" in query or "ref" in query or "друг" in query or "friend" in query:
             referral_result = await create_referral_result(
                 inline_query,
-                bot,
+                bot_identity_service,
                 referral_service,
                 i18n,
                 current_lang,
@@ -75,7 +76,7 @@ async def inline_query_handler(inline_query: InlineQuery,
 
 async def create_referral_result(
     inline_query: InlineQuery,
-    bot: Bot,
+    bot_identity_service: BotIdentityService,
     referral_service: ReferralService,
     i18n_instance,
     lang: str,
@@ -86,8 +87,7 @@ async def create_referral_result(
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     
     try:
-        bot_info = await bot.get_me()
-        bot_username = bot_info.username
+        bot_username = await bot_identity_service.get_username()
         if not bot_username:
             return None
         
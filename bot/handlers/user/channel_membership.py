@@ -0,0 +1,16 @@
+from aiogram import Router, types
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.services.channel_membership_service import ChannelMembershipService
+
+# Included only when REQUIRED_CHANNEL_ID is set, so chat_member updates are
+# requested from Telegram only then
+router = Router(name="user_channel_membership_router")
+
+
+@router.chat_member()
+async def required_channel_member_update_handler(
+        event: types.ChatMemberUpdated,
+        channel_membership_service: ChannelMembershipService,
+        session: AsyncSession):
+    await channel_membership_service.handle_member_update(session, event)
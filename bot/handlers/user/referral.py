@@ -1,11 +1,12 @@
 import logging
-from aiogram import Router, F, types, Bot
+from aiogram import Router, F, types
 from aiogram.filters import Command
 from typing import Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
 from bot.services.referral_service import ReferralService
+from bot.services.bot_identity_service import BotIdentityService
 
 from bot.keyboards.inline.user_keyboards import get_back_to_main_menu_markup
 from bot.middlewares.i18n import JsonI18n
@@ -16,7 +17,8 @@ router = Router(name="user_referral_router")
 async def referral_command_handler(event: Union[types.Message,
                                                 types.CallbackQuery],
                                    settings: Settings, i18n_data: dict,
-                                   referral_service: ReferralService, bot: Bot,
+                                   referral_service: ReferralService,
+                                   bot_identity_service: BotIdentityService,
                                    session: AsyncSession):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -43,16 +45,7 @@ async def referral_command_handler(event: Union[types.Message,
 
     _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
 
-    try:
-        bot_info = await bot.get_me()
-        bot_username = bot_info.username
-    except Exception as e_bot_info:
-        logging.error(
-            f"Failed to get bot info for referral link: {e_bot_info}")
-        await target_message_obj.answer(_("error_generating_referral_link"))
-        if isinstance(event, types.CallbackQuery): await event.answer()
-        return
-
+    bot_username = await bot_identity_service.get_username()
     if not bot_username:
         logging.error("Bot username is None, cannot generate referral link.")
         await target_message_obj.answer(_("error_generating_referral_link"))
@@ -74,15 +67,16 @@ async def referral_command_handler(event: Union[types.Message,
         return
 
     bonus_info_parts = []
-    if getattr(settings, "traffic_sale_mode", False):
+    snapshot = settings.snapshot
+    if snapshot.traffic_sale_mode:
         bonus_details_str = _("referral_not_available_for_traffic")
     else:
-        if settings.subscription_options:
+        if snapshot.subscription_options:
             for months_period_key, _price in sorted(
-                    settings.subscription_options.items()):
+                    snapshot.subscription_options.items()):
 
-                inv_bonus = settings.referral_bonus_inviter.get(months_period_key)
-                ref_bonus = settings.referral_bonus_referee.get(months_period_key)
+                inv_bonus = snapshot.referral_bonus_inviter.get(months_period_key)
+                ref_bonus = snapshot.referral_bonus_referee.get(months_period_key)
                 if inv_bonus is not None or ref_bonus is not None:
                     bonus_info_parts.append(
                         _("referral_bonus_per_period",
@@ -129,7 +123,8 @@ async def referral_command_handler(event: Union[types.Message,
 @router.callback_query(F.data.startswith("referral_action:"))
 async def referral_action_handler(callback: types.CallbackQuery, settings: Settings, 
                                  i18n_data: dict, referral_service: ReferralService, 
-                                 bot: Bot, session: AsyncSession):
+                                 bot_identity_service: BotIdentityService,
+                                 session: AsyncSession):
     action = callback.data.split(":")[1]
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n = i18n_data.get("i18n_instance")
@@ -137,8 +132,7 @@ async def referral_action_handler(callback: types.CallbackQuery, settings: Setti
 
     if action == "share_message":
         try:
-            bot_info = await bot.get_me()
-            bot_username = bot_info.username
+            bot_username = await bot_identity_service.get_username()
             if not bot_username:
                 await callback.answer("Ошибка получения имени бота", show_alert=True)
                 return
@@ -20,6 +20,8 @@ from bot.keyboards.inline.user_keyboards import (
 from bot.services.subscription_service import SubscriptionService
 from bot.services.panel_api_service import PanelApiService
 from bot.services.referral_service import ReferralService
+from bot.services.bot_identity_service import BotIdentityService
+from bot.services.channel_membership_service import ChannelMembershipService, is_channel_member
 from bot.services.promo_code_service import PromoCodeService
 from config.settings import Settings
 from bot.middlewares.i18n import JsonI18n
@@ -129,10 +131,12 @@ async def ensure_required_channel_subscription(
         i18n: Optional[JsonI18n],
         current_lang: str,
         session: AsyncSession,
-        db_user: Optional[User] = None) -> bool:
+        db_user: Optional[User] = None,
+        membership_service: Optional[ChannelMembershipService] = None) -> bool:
     """
     Verify that the user is a member of the required channel (if configured).
     Returns True when access can proceed, False when user must subscribe first.
+    A membership cached by ``membership_service`` skips the API call.
     """
     required_channel_id = settings.REQUIRED_CHANNEL_ID
     if not required_channel_id:
@@ -155,7 +159,10 @@ async def ensure_required_channel_subscription(
         )
         return False
 
-    if user_id in settings.ADMIN_IDS:
+    if settings.is_admin(user_id):
+        return True
+
+    if membership_service and membership_service.get_cached(user_id):
         return True
 
     if db_user is None:
@@ -195,9 +202,7 @@ async def ensure_required_channel_subscription(
         member = await bot_instance.get_chat_member(required_channel_id, user_id)
         status = getattr(member, "status", None)
         status_value = getattr(status, "value", status)
-        allowed_statuses = {"creator", "administrator", "member", "restricted"}
-        if status_value in allowed_statuses:
-            is_member = True
+        is_member = is_channel_member(member)
     except TelegramBadRequest as bad_request:
         logging.info(
             "Required channel check: user %s not subscribed (details: %s)",
@@ -259,6 +264,8 @@ async def ensure_required_channel_subscription(
             update_error,
             exc_info=True,
         )
+    if membership_service:
+        membership_service.remember(user_id, is_member)
 
     if is_member:
         logging.info(
@@ -313,7 +320,8 @@ async def start_command_handler(message: types.Message,
                                 session: AsyncSession,
                                 ref_match: Optional[re.Match] = None,
                                 promo_match: Optional[re.Match] = None,
-                                ad_param_match: Optional[re.Match] = None):
+                                ad_param_match: Optional[re.Match] = None,
+                                channel_membership_service: Optional[ChannelMembershipService] = None):
     await state.clear()
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -455,7 +463,8 @@ async def start_command_handler(message: types.Message,
 
     if not await ensure_required_channel_subscription(message, settings, i18n,
                                                       current_lang, session,
-                                                      db_user):
+                                                      db_user,
+                                                      channel_membership_service):
         return
 
     # Send welcome message if not disabled
@@ -528,14 +537,16 @@ async def verify_channel_subscription_callback(
         settings: Settings,
         i18n_data: dict,
         subscription_service: SubscriptionService,
-        session: AsyncSession):
+        session: AsyncSession,
+        channel_membership_service: Optional[ChannelMembershipService] = None):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
 
     db_user = await user_dal.get_user_by_id(session, callback.from_user.id)
 
     verified = await ensure_required_channel_subscription(
-        callback, settings, i18n, current_lang, session, db_user)
+        callback, settings, i18n, current_lang, session, db_user,
+        channel_membership_service)
     if not verified:
         return
 
@@ -660,7 +671,8 @@ async def main_action_callback_handler(
         callback: types.CallbackQuery, state: FSMContext, settings: Settings,
         i18n_data: dict, bot: Bot, subscription_service: SubscriptionService,
         referral_service: ReferralService, panel_service: PanelApiService,
-        promo_code_service: PromoCodeService, session: AsyncSession):
+        promo_code_service: PromoCodeService,
+        bot_identity_service: BotIdentityService, session: AsyncSession):
     action = callback.data.split(":")[1]
     user_id = callback.from_user.id
 
@@ -686,7 +698,8 @@ async def main_action_callback_handler(
             session, bot)
     elif action == "referral":
         await user_referral_handlers.referral_command_handler(
-            callback, settings, i18n_data, referral_service, bot, session)
+            callback, settings, i18n_data, referral_service,
+            bot_identity_service, session)
     elif action == "apply_promo":
         await user_promo_handlers.prompt_promo_code_input(
             callback, state, i18n_data, settings, session)
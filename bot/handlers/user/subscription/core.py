@@ -57,9 +57,10 @@ async def display_subscription_options(event: Union[types.Message, types.Callbac
         return
 
     currency_symbol_val = settings.DEFAULT_CURRENCY_SYMBOL
-    traffic_packages = getattr(settings, "traffic_packages", {}) or {}
-    stars_traffic_packages = getattr(settings, "stars_traffic_packages", {}) or {}
-    traffic_mode = bool(getattr(settings, "traffic_sale_mode", False) or stars_traffic_packages)
+    snapshot = settings.snapshot
+    traffic_packages = snapshot.traffic_packages
+    stars_traffic_packages = snapshot.stars_traffic_packages
+    traffic_mode = snapshot.traffic_sale_mode
 
     if traffic_mode:
         if traffic_packages:
@@ -70,7 +71,7 @@ async def display_subscription_options(event: Union[types.Message, types.Callbac
         else:
             options = {}
     else:
-        options = settings.subscription_options
+        options = snapshot.subscription_options
 
     if options:
         text_content = get_text("select_traffic_package") if traffic_mode else get_text("select_subscription_period")
@@ -29,9 +29,10 @@ async def select_subscription_period_callback_handler(
             pass
         return
 
-    traffic_packages = getattr(settings, "traffic_packages", {}) or {}
-    stars_traffic_packages = getattr(settings, "stars_traffic_packages", {}) or {}
-    traffic_mode = bool(getattr(settings, "traffic_sale_mode", False) or stars_traffic_packages)
+    snapshot = settings.snapshot
+    traffic_packages = snapshot.traffic_packages
+    stars_traffic_packages = snapshot.stars_traffic_packages
+    traffic_mode = snapshot.traffic_sale_mode
     try:
         months = float(callback.data.split(":")[-1])
     except (ValueError, IndexError):
@@ -42,8 +43,8 @@ async def select_subscription_period_callback_handler(
             pass
         return
 
-    price_source = traffic_packages if traffic_mode else settings.subscription_options
-    stars_price_source = stars_traffic_packages if traffic_mode else settings.stars_subscription_options
+    price_source = traffic_packages if traffic_mode else snapshot.subscription_options
+    stars_price_source = stars_traffic_packages if traffic_mode else snapshot.stars_subscription_options
 
     price_rub = price_source.get(months)
     stars_price = stars_price_source.get(months)
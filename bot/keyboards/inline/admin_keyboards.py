@@ -5,9 +5,14 @@ import math
 
 from config.settings import Settings
 from bot.middlewares.i18n import JsonI18n
+from bot.keyboards.inline.keyboard_cache import cached_keyboard, static_keyboard
 from db.models import User
+from db.dal.pagination import KeysetPage
+from bot.utils.keyset_cursor import (PageRef, current_page_index, next_page_ref,
+                                     prev_page_ref)
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang, settings))
 def get_admin_panel_keyboard(i18n_instance, lang: str,
                              settings: Settings) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
@@ -37,6 +42,7 @@ def get_admin_panel_keyboard(i18n_instance, lang: str,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_stats_monitoring_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -54,6 +60,7 @@ def get_stats_monitoring_keyboard(i18n_instance, lang: str) -> InlineKeyboardMar
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_user_management_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -71,6 +78,7 @@ def get_user_management_keyboard(i18n_instance, lang: str) -> InlineKeyboardMark
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_ban_management_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -88,6 +96,7 @@ def get_ban_management_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarku
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_promo_marketing_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -105,6 +114,7 @@ def get_promo_marketing_keyboard(i18n_instance, lang: str) -> InlineKeyboardMark
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_system_functions_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -122,6 +132,7 @@ def get_system_functions_keyboard(i18n_instance, lang: str) -> InlineKeyboardMar
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_ads_menu_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -136,41 +147,44 @@ def get_ads_menu_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
 def get_ads_list_keyboard(
     i18n_instance,
     lang: str,
-    campaigns: list,
-    current_page: int,
-    total_pages: int,
+    campaigns_page: KeysetPage,
+    page_ref: PageRef,
+    total_pages: str,
 ) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
+    page_ref_str = page_ref.encode()
 
-    for c in campaigns:
+    for c in campaigns_page.items:
         title = f"{c.source}"
         builder.button(
             text=title,
-            callback_data=f"admin_ads:card:{c.ad_campaign_id}:{current_page}",
+            callback_data=f"admin_ads:card:{c.ad_campaign_id}:{page_ref_str}",
         )
 
     # Pagination row (only when needed)
-    if total_pages > 1:
+    prev_ref = prev_page_ref(page_ref, campaigns_page)
+    next_ref = next_page_ref(page_ref, campaigns_page)
+    if prev_ref is not None or next_ref is not None:
         row = []
-        if current_page > 0:
+        if prev_ref is not None:
             row.append(
                 InlineKeyboardButton(
                     text="⬅️ " + _("prev_page_button"),
-                    callback_data=f"admin_ads:page:{current_page - 1}",
+                    callback_data=f"admin_ads:page:{prev_ref.encode()}",
                 )
             )
         row.append(
             InlineKeyboardButton(
-                text=f"{current_page + 1}/{total_pages}",
+                text=f"{current_page_index(page_ref, campaigns_page) + 1}/{total_pages}",
                 callback_data="ads_page_display",
             )
         )
-        if current_page < total_pages - 1:
+        if next_ref is not None:
             row.append(
                 InlineKeyboardButton(
                     text=_("next_page_button") + " ➡️",
-                    callback_data=f"admin_ads:page:{current_page + 1}",
+                    callback_data=f"admin_ads:page:{next_ref.encode()}",
                 )
             )
         if row:
@@ -184,7 +198,7 @@ def get_ads_list_keyboard(
     return builder.as_markup()
 
 
-def get_ad_card_keyboard(i18n_instance, lang: str, campaign_id: int, back_page: int) -> InlineKeyboardMarkup:
+def get_ad_card_keyboard(i18n_instance, lang: str, campaign_id: int, back_page: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
     # Dangerous action: Delete campaign
@@ -198,6 +212,7 @@ def get_ad_card_keyboard(i18n_instance, lang: str, campaign_id: int, back_page:
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_logs_menu_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -214,9 +229,59 @@ def get_logs_menu_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
+def get_logs_export_keyboard(i18n_instance, lang: str) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    builder.button(text=_(key="admin_logs_export_7d_button"),
+                   callback_data="admin_logs:export_run:7d")
+    builder.button(text=_(key="admin_logs_export_30d_button"),
+                   callback_data="admin_logs:export_run:30d")
+    builder.button(text=_(key="admin_logs_export_all_button"),
+                   callback_data="admin_logs:export_run:all")
+    builder.row(
+        InlineKeyboardButton(text=_(key="admin_logs_menu_title"),
+                             callback_data="admin_action:view_logs_menu"))
+    builder.adjust(2, 1, 1)
+    return builder.as_markup()
+
+
+@cached_keyboard
+def get_payments_export_format_keyboard(i18n_instance, lang: str,
+                                        formats: List[str]) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    for export_format in formats:
+        builder.button(text=_(key=f"admin_payments_export_format_{export_format}"),
+                       callback_data=f"payments_export_format:{export_format}")
+    builder.adjust(len(formats) or 1)
+    builder.row(
+        InlineKeyboardButton(text=_(key="back_to_payments_list_button"),
+                             callback_data="payments_page:0"))
+    return builder.as_markup()
+
+
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
+def get_payments_export_period_keyboard(i18n_instance,
+                                        lang: str) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    builder.button(text=_(key="admin_payments_export_30d_button"),
+                   callback_data="payments_export_run:30d")
+    builder.button(text=_(key="admin_payments_export_365d_button"),
+                   callback_data="payments_export_run:365d")
+    builder.button(text=_(key="admin_payments_export_all_button"),
+                   callback_data="payments_export_run:all")
+    builder.row(
+        InlineKeyboardButton(text=_(key="back_to_payments_list_button"),
+                             callback_data="payments_page:0"))
+    builder.adjust(2, 1, 1)
+    return builder.as_markup()
+
+
 def get_logs_pagination_keyboard(
-        current_page: int,
-        total_pages: int,
+        prev_page_ref: Optional[PageRef],
+        next_page_ref: Optional[PageRef],
         base_callback_data: str,
         i18n_instance,
         lang: str,
@@ -224,16 +289,16 @@ def get_logs_pagination_keyboard(
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
     row_buttons = []
-    if current_page > 0:
+    if prev_page_ref is not None:
         row_buttons.append(
             InlineKeyboardButton(
                 text="⬅️ " + _("prev_page_button"),
-                callback_data=f"{base_callback_data}:{current_page - 1}"))
-    if current_page < total_pages - 1:
+                callback_data=f"{base_callback_data}:{prev_page_ref.encode()}"))
+    if next_page_ref is not None:
         row_buttons.append(
             InlineKeyboardButton(
                 text=_("next_page_button") + " ➡️",
-                callback_data=f"{base_callback_data}:{current_page + 1}"))
+                callback_data=f"{base_callback_data}:{next_page_ref.encode()}"))
 
     if row_buttons: builder.row(*row_buttons)
 
@@ -307,15 +372,15 @@ def get_banned_users_keyboard(banned_users: List[User], current_page: int,
     return builder.as_markup()
 
 
-def get_users_list_keyboard(users: List[User], current_page: int,
-                            total_users: int, i18n_instance, lang: str,
-                            page_size: int = 15) -> InlineKeyboardMarkup:
+def get_users_list_keyboard(users_page: KeysetPage, page_ref: PageRef,
+                            i18n_instance, lang: str) -> InlineKeyboardMarkup:
     """Generate keyboard for paginated user list"""
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
+    page_ref_str = page_ref.encode()
     
     # Add user buttons
-    for user in users:
+    for user in users_page.items:
         user_display_parts = []
         if user.username:
             user_display_parts.append(f"@{user.username}")
@@ -327,36 +392,36 @@ def get_users_list_keyboard(users: List[User], current_page: int,
         builder.row(
             InlineKeyboardButton(
                 text=button_text,
-                callback_data=f"admin_user_card_from_list:{user.user_id}:{current_page}"
+                callback_data=f"admin_user_card_from_list:{user.user_id}:{page_ref_str}"
             )
         )
     
     # Pagination buttons
-    if total_users > page_size:
-        total_pages = math.ceil(total_users / page_size)
+    prev_ref = prev_page_ref(page_ref, users_page)
+    next_ref = next_page_ref(page_ref, users_page)
+    if prev_ref is not None or next_ref is not None:
         pagination_buttons = []
-        if current_page > 0:
+        if prev_ref is not None:
             pagination_buttons.append(
                 InlineKeyboardButton(
                     text=_("prev_page_button"),
-                    callback_data=f"admin_action:users_list:{current_page - 1}"
+                    callback_data=f"admin_action:users_list:{prev_ref.encode()}"
                 )
             )
         pagination_buttons.append(
             InlineKeyboardButton(
-                text=f"{current_page + 1}/{total_pages}",
+                text=str(current_page_index(page_ref, users_page) + 1),
                 callback_data="stub_page_display"
             )
         )
-        if current_page < total_pages - 1:
+        if next_ref is not None:
             pagination_buttons.append(
                 InlineKeyboardButton(
                     text=_("next_page_button"),
-                    callback_data=f"admin_action:users_list:{current_page + 1}"
+                    callback_data=f"admin_action:users_list:{next_ref.encode()}"
                 )
             )
-        if pagination_buttons:
-            builder.row(*pagination_buttons)
+        builder.row(*pagination_buttons)
     
     # Back button
     builder.row(
@@ -409,6 +474,7 @@ def get_confirmation_keyboard(yes_callback_data: str, no_callback_data: str,
     return builder.as_markup()
 
 
+@cached_keyboard
 def get_broadcast_confirmation_keyboard(lang: str,
                                         i18n_instance,
                                         target: str = "all") -> InlineKeyboardMarkup:
@@ -453,6 +519,7 @@ def get_broadcast_confirmation_keyboard(lang: str,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_back_to_admin_panel_keyboard(lang: str,
                                      i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
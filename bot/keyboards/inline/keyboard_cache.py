@@ -0,0 +1,171 @@
+import functools
+import inspect
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from bot.middlewares.i18n import JsonI18n
+from bot.utils.metrics import Metric, register_metrics_collector
+from config.settings import Settings, add_settings_reload_listener
+
+DEFAULT_KEYBOARD_CACHE_SIZE = 1024
+
+KeyboardBuilderFunc = TypeVar("KeyboardBuilderFunc", bound=Callable[..., Any])
+
+_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+_max_size = DEFAULT_KEYBOARD_CACHE_SIZE
+_hits = 0
+_misses = 0
+_invalidations = 0
+
+# Builders with no per-user arguments, rendered for every language at startup
+_static_builders: List[Tuple[Callable[..., Any], Callable[[str, JsonI18n, Settings], tuple]]] = []
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _cache_token(value: Any) -> Any:
+    # Settings and the i18n instance are process-wide; key them by identity
+    # (plus the catalog version, so a locale reload misses automatically).
+    if isinstance(value, JsonI18n):
+        return ("i18n", id(value), value.catalog_version)
+    if isinstance(value, Settings):
+        return ("settings", id(value))
+    if isinstance(value, Mapping):
+        # dicts and the read-only maps of the settings snapshot
+        return ("dict", tuple((_cache_token(key), _cache_token(item))
+                              for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return ("seq", tuple(_cache_token(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        raise _Uncacheable()
+    # 1, 1.0 and True hash alike but render differently
+    return (value.__class__, value)
+
+
+def cached_keyboard(builder: KeyboardBuilderFunc) -> KeyboardBuilderFunc:
+    """
+    Memoize a keyboard builder by its arguments in a process-wide LRU.
+
+    Markups are frozen Telegram objects and are shared between callers: build
+    a new markup from ``.inline_keyboard`` rather than mutating its rows.
+    Arguments that cannot be hashed bypass the cache.
+    """
+    parameters = [(parameter.name, parameter.default)
+                  for parameter in inspect.signature(builder).parameters.values()]
+    parameter_names = frozenset(name for name, _ in parameters)
+
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        global _hits, _misses
+        if _max_size <= 0:
+            return builder(*args, **kwargs)
+        if len(args) > len(parameters) or not parameter_names.issuperset(kwargs):
+            return builder(*args, **kwargs)
+        # Positional, keyword and defaulted spellings of one call share an entry
+        values = args + tuple(kwargs.get(name, default)
+                              for name, default in parameters[len(args):])
+        try:
+            key = (builder.__qualname__, _cache_token(values))
+        except _Uncacheable:
+            return builder(*args, **kwargs)
+        try:
+            markup = _cache[key]
+        except KeyError:
+            pass
+        else:
+            _cache.move_to_end(key)
+            _hits += 1
+            return markup
+
+        _misses += 1
+        markup = builder(*args, **kwargs)
+        _cache[key] = markup
+        if len(_cache) > _max_size:
+            _cache.popitem(last=False)
+        return markup
+
+    wrapper.uncached = builder
+    return wrapper
+
+
+def static_keyboard(args_factory: Callable[[str, JsonI18n, Settings], tuple]):
+    """
+    ``cached_keyboard`` for builders whose output depends only on language and
+    settings; ``args_factory(lang, i18n, settings)`` returns the positional
+    arguments used to prerender them in ``warm_keyboard_cache``.
+    """
+
+    def decorator(builder: KeyboardBuilderFunc) -> KeyboardBuilderFunc:
+        cached = cached_keyboard(builder)
+        _static_builders.append((cached, args_factory))
+        return cached
+
+    return decorator
+
+
+def configure_keyboard_cache(max_size: int) -> None:
+    global _max_size
+    _max_size = max_size
+    while len(_cache) > max(_max_size, 0):
+        _cache.popitem(last=False)
+    register_metrics_collector("keyboard_cache", _collect_keyboard_cache_metrics)
+    add_settings_reload_listener(_on_settings_reload)
+
+
+def invalidate_keyboard_cache() -> None:
+    """Drop every memoized keyboard; call after settings or locales change."""
+    global _invalidations
+    _cache.clear()
+    _invalidations += 1
+
+
+def _on_settings_reload(settings: Settings) -> None:
+    # Same Settings object, new prices/options: the identity key no longer applies
+    invalidate_keyboard_cache()
+
+
+def warm_keyboard_cache(i18n_instance: JsonI18n, settings: Settings) -> int:
+    """Render the static keyboards for every loaded language; returns how many were built."""
+    if _max_size <= 0:
+        return 0
+    rendered = 0
+    for lang in i18n_instance.locales_data:
+        for builder, args_factory in _static_builders:
+            try:
+                builder(*args_factory(lang, i18n_instance, settings))
+                rendered += 1
+            except Exception as e:
+                logging.error(
+                    f"Keyboard cache: failed to prerender {builder.__qualname__} for '{lang}': {e}",
+                    exc_info=True)
+    return rendered
+
+
+def keyboard_cache_stats() -> Dict[str, int]:
+    return {
+        "size": len(_cache),
+        "max_size": _max_size,
+        "hits": _hits,
+        "misses": _misses,
+        "invalidations": _invalidations,
+    }
+
+
+def _collect_keyboard_cache_metrics() -> List[Metric]:
+    stats = keyboard_cache_stats()
+    return [
+        Metric("bot_keyboard_cache_entries", "gauge",
+               "Memoized inline keyboards", [({}, stats["size"])]),
+        Metric("bot_keyboard_cache_hits_total", "counter",
+               "Keyboard renders served from the cache", [({}, stats["hits"])]),
+        Metric("bot_keyboard_cache_misses_total", "counter",
+               "Keyboard renders that ran the builder", [({}, stats["misses"])]),
+        Metric("bot_keyboard_cache_invalidations_total", "counter",
+               "Times the keyboard cache was cleared", [({}, stats["invalidations"])]),
+    ]
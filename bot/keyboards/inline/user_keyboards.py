@@ -3,8 +3,10 @@ from aiogram.types import InlineKeyboardMarkup, WebAppInfo
 from typing import Dict, Optional, List, Tuple
 
 from config.settings import Settings
+from bot.keyboards.inline.keyboard_cache import cached_keyboard, static_keyboard
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n, settings))
 def get_main_menu_inline_keyboard(
         lang: str,
         i18n_instance,
@@ -63,6 +65,7 @@ def get_main_menu_inline_keyboard(
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (i18n, lang))
 def get_language_selection_keyboard(i18n_instance,
                                     current_lang: str) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(current_lang, key, **kwargs
@@ -78,6 +81,7 @@ def get_language_selection_keyboard(i18n_instance,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_trial_confirmation_keyboard(lang: str,
                                     i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
@@ -90,6 +94,7 @@ def get_trial_confirmation_keyboard(lang: str,
     return builder.as_markup()
 
 
+@cached_keyboard
 def get_subscription_options_keyboard(subscription_options: Dict[
     float, Optional[float]], currency_symbol_val: str, lang: str,
                                       i18n_instance, traffic_mode: bool = False) -> InlineKeyboardMarkup:
@@ -123,6 +128,7 @@ def get_subscription_options_keyboard(subscription_options: Dict[
     return builder.as_markup()
 
 
+@cached_keyboard
 def get_payment_method_keyboard(months: int, price: float,
                                 stars_price: Optional[int],
                                 currency_symbol_val: str, lang: str,
@@ -133,7 +139,7 @@ def get_payment_method_keyboard(months: int, price: float,
         return str(int(val)) if float(val).is_integer() else f"{val:g}"
     value_str = _format_value(months)
     mode_suffix = f":{sale_mode}"
-    for method in settings.payment_methods_order:
+    for method in settings.snapshot.payment_methods_order:
         if method == "severpay" and getattr(settings, "SEVERPAY_ENABLED", False):
             builder.button(
                 text=_("pay_with_severpay_button"),
@@ -289,6 +295,7 @@ def get_yk_saved_cards_keyboard(
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_referral_link_keyboard(lang: str,
                                i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
@@ -301,6 +308,7 @@ def get_referral_link_keyboard(lang: str,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_back_to_main_menu_markup(lang: str,
                                  i18n_instance,
                                  callback_data: Optional[str] = None) -> InlineKeyboardMarkup:
@@ -315,6 +323,7 @@ def get_back_to_main_menu_markup(lang: str,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_subscribe_only_markup(lang: str, i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -323,6 +332,7 @@ def get_subscribe_only_markup(lang: str, i18n_instance) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (settings.SUPPORT_LINK, lang, i18n))
 def get_user_banned_keyboard(support_link: Optional[str], lang: str,
                              i18n_instance) -> Optional[InlineKeyboardMarkup]:
     if not support_link:
@@ -333,6 +343,7 @@ def get_user_banned_keyboard(support_link: Optional[str], lang: str,
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n, settings.REQUIRED_CHANNEL_LINK))
 def get_channel_subscription_keyboard(
         lang: str,
         i18n_instance,
@@ -412,6 +423,7 @@ def get_connect_and_main_keyboard(
     return builder.as_markup()
 
 
+@cached_keyboard
 def get_payment_methods_manage_keyboard(lang: str, i18n_instance, has_card: bool) -> InlineKeyboardMarkup:
     """Deprecated in favor of get_payment_methods_list_keyboard. Kept for backward compatibility."""
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
@@ -496,6 +508,7 @@ def get_bind_url_keyboard(bind_url: str, lang: str, i18n_instance) -> InlineKeyb
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_back_to_payment_methods_keyboard(lang: str, i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
@@ -511,6 +524,7 @@ def get_back_to_payment_method_details_keyboard(pm_id: str, lang: str, i18n_inst
     return builder.as_markup()
 
 
+@static_keyboard(lambda lang, i18n, settings: (lang, i18n))
 def get_autorenew_cancel_keyboard(lang: str, i18n_instance) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
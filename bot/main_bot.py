@@ -14,7 +14,9 @@ from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
 
-from db.database_setup import init_db_connection
+from db.database_setup import init_db_connection, init_replica_connection
+from db.read_replica import ReadOnlySessionFactory
+from db.invalidation_bus import close_invalidation_bus, init_invalidation_bus
 
 from bot.middlewares.i18n import I18nMiddleware, get_i18n_instance, JsonI18n
 from bot.middlewares.db_session import DBSessionMiddleware
@@ -28,6 +30,7 @@ from bot.app.web.web_server import build_and_start_web_app
 from bot.routers import build_root_router
 
 from bot.services.yookassa_service import YooKassaService
+from bot.services.bot_identity_service import BotIdentityService
 from bot.services.panel_api_service import PanelApiService
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
@@ -38,6 +41,9 @@ from bot.services.crypto_pay_service import CryptoPayService, cryptopay_webhook_
 from bot.handlers.user import payment as user_payment_webhook_module
 from bot.handlers.admin.sync_admin import perform_sync
 from bot.utils.message_queue import init_queue_manager
+from bot.utils.background_tasks import run_in_background
+from bot.utils.message_log_maintenance import message_log_maintenance_loop
+from bot.utils.tracing import setup_tracing, shutdown_tracing
 
 
 async def register_all_routers(dp: Dispatcher, settings: Settings):
@@ -143,12 +149,32 @@ async def on_startup_configured(dispatcher: Dispatcher):
 
     # Initialize message queue manager
     try:
-        queue_manager = init_queue_manager(bot)
+        queue_manager = init_queue_manager(
+            bot,
+            shared_quota_session_factory=(async_session_factory
+                                          if settings.TELEGRAM_SHARED_RATE_LIMIT_ENABLED else None),
+            shared_quota_lease_size=settings.TELEGRAM_SHARED_RATE_LIMIT_LEASE_SIZE,
+        )
         dispatcher["queue_manager"] = queue_manager
-        logging.info("STARTUP: Message queue manager initialized")
+        logging.info(
+            "STARTUP: Message queue manager initialized"
+            + (" (rate limits shared through the database)"
+               if settings.TELEGRAM_SHARED_RATE_LIMIT_ENABLED else "")
+        )
     except Exception as e:
         logging.error(f"STARTUP: Failed to initialize message queue manager: {e}", exc_info=True)
 
+    # Background re-check of verified members of the required channel
+    channel_membership_service = dispatcher.get("channel_membership_service")
+    if channel_membership_service:
+        channel_membership_service.start()
+
+    # Monthly message_logs partitions and retention, then once a day
+    dispatcher["message_log_maintenance_task"] = run_in_background(
+        message_log_maintenance_loop(async_session_factory, settings),
+        name="MessageLogMaintenance",
+    )
+
     # Automatic sync on startup
     try:
         logging.info("STARTUP: Running automatic panel sync...")
@@ -196,6 +222,8 @@ async def on_shutdown_configured(dispatcher: Dispatcher):
                     logging.warning(f"Failed to close session for {key}: {e}")
 
     for service_key in (
+        # Flushes pending descriptions, so before the panel session closes
+        "panel_description_sync_service",
         "panel_service",
         "cryptopay_service",
         "freekassa_service",
@@ -207,9 +235,15 @@ async def on_shutdown_configured(dispatcher: Dispatcher):
         "referral_service",
         "platega_service",
         "severpay_service",
+        "bot_identity_service",
+        "channel_membership_service",
     ):
         await close_service(service_key)
 
+    maintenance_task = dispatcher.get("message_log_maintenance_task")
+    if maintenance_task and not maintenance_task.done():
+        maintenance_task.cancel()
+
     bot: Bot = dispatcher["bot_instance"]
     if bot and bot.session:
         try:
@@ -218,12 +252,25 @@ async def on_shutdown_configured(dispatcher: Dispatcher):
         except Exception as e:
             logging.warning(f"SHUTDOWN: Failed to close bot session: {e}")
 
+    try:
+        await dispatcher.storage.close()
+    except Exception as e:
+        logging.warning(f"SHUTDOWN: Failed to close FSM storage: {e}")
+
+    await close_invalidation_bus()
+
     from db.database_setup import async_engine as global_async_engine
+    from db.database_setup import replica_engine as global_replica_engine
 
     if global_async_engine:
         logging.info("SHUTDOWN: Disposing SQLAlchemy engine...")
         await global_async_engine.dispose()
         logging.info("SHUTDOWN: SQLAlchemy engine disposed.")
+    if global_replica_engine:
+        await global_replica_engine.dispose()
+        logging.info("SHUTDOWN: Read replica engine disposed.")
+
+    shutdown_tracing()
 
     logging.info("SHUTDOWN: Bot on_shutdown_configured completed.")
 
@@ -235,18 +282,25 @@ async def run_bot(settings_param: Settings):
             "Failed to initialize database connection and session factory. Exiting."
         )
         return
+    # Evicts in-process caches when another bot instance changes the rows
+    await init_invalidation_bus(settings_param)
+    # Before build_dispatcher, which adds the tracing middlewares only when enabled
+    setup_tracing(settings_param)
     dp, bot, extra = build_dispatcher(settings_param, local_async_session_factory)
     i18n_instance = extra["i18n_instance"]
 
-    # Get bot username for YooKassa default return URL if needed
+    # Resolved once here and served from memory to referral links, inline
+    # queries and promo CSVs; also the YooKassa default return URL
+    bot_identity_service = BotIdentityService(
+        bot, settings_param.BOT_IDENTITY_REFRESH_SECONDS)
     actual_bot_username = "your_bot_username"
-    try:
-        bot_info = await bot.get_me()
-        actual_bot_username = bot_info.username
+    await bot_identity_service.load()
+    if bot_identity_service.username:
+        actual_bot_username = bot_identity_service.username
         logging.info(f"Bot username resolved: @{actual_bot_username}")
-    except Exception as e:
+    else:
         logging.error(
-            f"Failed to get bot info (e.g., for YooKassa default URL): {e}. Using fallback: {actual_bot_username}"
+            f"Failed to get bot info (e.g., for YooKassa default URL). Using fallback: {actual_bot_username}"
         )
 
     services = build_core_services(
@@ -259,7 +313,16 @@ async def run_bot(settings_param: Settings):
     for key, service in services.items():
         dp[key] = service
     dp["panel_service"] = services["panel_service"]
+    dp["bot_identity_service"] = bot_identity_service
     dp["async_session_factory"] = local_async_session_factory
+    # Admin statistics, listings, exports and broadcast targets; falls back
+    # to the primary without a (healthy, fresh enough) replica
+    dp["read_only_session_factory"] = ReadOnlySessionFactory(
+        local_async_session_factory,
+        init_replica_connection(settings_param),
+        max_lag_seconds=settings_param.REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds=settings_param.REPLICA_HEALTH_CHECK_SECONDS,
+    )
 
     # Wrap startup/shutdown handlers to satisfy aiogram event signature (no args passed)
     async def _on_startup_wrapper():
@@ -36,17 +36,19 @@ class ActionLoggerMiddleware(BaseMiddleware):
             user_id = event_user.id
             telegram_username = event_user.username
             telegram_first_name = event_user.first_name
-            if user_id in self.settings.ADMIN_IDS:
+            if self.settings.is_admin(user_id):
                 is_admin_event_flag = True
 
         raw_update_snippet = None
-        try:
-            raw_update_snippet = event.model_dump_json(exclude_none=True,
-                                                       indent=None)[:1000]
-        except AttributeError:
-            raw_update_snippet = str(event)[:1000]
-        except Exception:
-            raw_update_snippet = str(event)[:1000]
+        # Compact mode keeps the raw preview (the bulk of a row) for admin events only
+        if is_admin_event_flag or not self.settings.MESSAGE_LOGS_COMPACT:
+            try:
+                raw_update_snippet = event.model_dump_json(exclude_none=True,
+                                                           indent=None)[:1000]
+            except AttributeError:
+                raw_update_snippet = str(event)[:1000]
+            except Exception:
+                raw_update_snippet = str(event)[:1000]
 
         current_event_type = event.event_type
 
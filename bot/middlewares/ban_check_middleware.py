@@ -30,7 +30,7 @@ class BanCheckMiddleware(BaseMiddleware):
         if not event_user:
             return await handler(event, data)
 
-        if event_user.id in self.settings.ADMIN_IDS:
+        if self.settings.is_admin(event_user.id):
             return await handler(event, data)
 
         try:
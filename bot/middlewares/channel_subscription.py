@@ -37,7 +37,17 @@ class ChannelSubscriptionMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         event_user = data.get("event_from_user")
-        if not event_user or event_user.id in self.settings.ADMIN_IDS:
+        if not event_user or self.settings.is_admin(event_user.id):
+            return await handler(event, data)
+
+        # Join/leave notifications of the channel itself feed the membership cache
+        if event.chat_member is not None:
+            return await handler(event, data)
+
+        membership_service = data.get("channel_membership_service")
+        cached_membership = (membership_service.get_cached(event_user.id)
+                             if membership_service else None)
+        if cached_membership:
             return await handler(event, data)
 
         callback_query = event.callback_query
@@ -72,11 +82,12 @@ class ChannelSubscriptionMiddleware(BaseMiddleware):
         if not db_user:
             return await handler(event, data)
 
-        if (
-            db_user.channel_subscription_verified
-            and db_user.channel_subscription_verified_for == required_channel_id
-        ):
-            return await handler(event, data)
+        if db_user.channel_subscription_verified_for == required_channel_id:
+            if membership_service and db_user.channel_subscription_verified is not None:
+                membership_service.remember(event_user.id,
+                                            bool(db_user.channel_subscription_verified))
+            if db_user.channel_subscription_verified:
+                return await handler(event, data)
 
         i18n_payload: Dict[str, Any] = data.get("i18n_data", {})
         current_lang: str = i18n_payload.get(
@@ -5,8 +5,16 @@ from aiogram import BaseMiddleware
 from aiogram.types import Update
 from sqlalchemy.orm import sessionmaker
 
+from bot.utils.query_stats import current_update_stats
+from db.database_setup import session_needs_commit, session_used_connection
+
 
 class DBSessionMiddleware(BaseMiddleware):
+    """
+    One session per update. The session checks out a connection only on its
+    first statement, and is committed only when something was written;
+    read-only transactions just end when the session closes.
+    """
 
     def __init__(self, async_session_factory: sessionmaker):
         super().__init__()
@@ -24,12 +32,15 @@ class DBSessionMiddleware(BaseMiddleware):
                 "async_session_factory not provided to DBSessionMiddleware"
             )
 
+        committed = False
         async with self.async_session_factory() as session:
             data["session"] = session
             try:
                 result = await handler(event, data)
 
-                await session.commit()
+                if session_needs_commit(session):
+                    await session.commit()
+                    committed = True
                 return result
             except Exception:
                 await session.rollback()
@@ -37,4 +48,8 @@ class DBSessionMiddleware(BaseMiddleware):
                     "DBSessionMiddleware: Exception caused rollback.", exc_info=True
                 )
                 raise
-
+            finally:
+                stats = current_update_stats()
+                if stats is not None:
+                    stats.used_connection = session_used_connection(session)
+                    stats.committed = committed
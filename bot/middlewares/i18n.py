@@ -1,7 +1,9 @@
 import logging
 import json
 import os
-from typing import Any, Awaitable, Callable, Dict, Optional
+import re
+import string
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import User, Update
@@ -11,6 +13,38 @@ from db.dal import user_dal
 from config.settings import Settings
 
 
+# Last resort of the fallback chain lang -> default -> en
+FALLBACK_LANGUAGE = "en"
+
+_FORMATTER = string.Formatter()
+_FIELD_NAME_REGEX = re.compile(r"[.\[]")
+
+
+class CompiledMessage:
+    """
+    A locale string parsed once at load time. ``static_text`` is set for
+    strings without placeholders, so formatting them is a no-op.
+    """
+
+    __slots__ = ("text", "fields", "static_text", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.error: Optional[str] = None
+        self.static_text: Optional[str] = None
+        try:
+            parsed = list(_FORMATTER.parse(text))
+        except ValueError as e:
+            parsed = []
+            self.error = str(e)
+        self.fields = frozenset(
+            _FIELD_NAME_REGEX.split(field_name, 1)[0]
+            for _, field_name, _, _ in parsed if field_name is not None)
+        if not self.fields and self.error is None:
+            # Unescapes {{ and }} like a real format call would
+            self.static_text = "".join(literal for literal, _, _, _ in parsed)
+
+
 class JsonI18n:
 
     def __init__(self, path: str, default: str = "en", domain: str = "bot"):
@@ -18,7 +52,13 @@ class JsonI18n:
         self.path = path
         self.default_lang = default
         self.locales_data: Dict[str, Dict[str, str]] = {}
+        # Per language: every known key already resolved through the fallback chain
+        self._catalogs: Dict[str, Dict[str, CompiledMessage]] = {}
+        self._fallback_catalog: Dict[str, CompiledMessage] = {}
+        # Bumped on every (re)compile; caches of rendered strings key on it
+        self.catalog_version = 0
         self._load_locales()
+        self._compile_catalogs()
         logging.info(
             f"JsonI18n initialized. Loaded languages: {list(self.locales_data.keys())}. Default: {self.default_lang}"
         )
@@ -44,57 +84,131 @@ class JsonI18n:
                         f"Error loading locale {lang_code} from {file_path}: {e_load}",
                         exc_info=True)
 
-    def gettext(self, lang_code: Optional[str], key: str, **kwargs) -> str:
-        # Determine effective language with robust fallback
-        if lang_code and lang_code in self.locales_data:
-            effective_lang_code = lang_code
-        elif self.default_lang in self.locales_data:
-            effective_lang_code = self.default_lang
-        elif 'en' in self.locales_data:
-            effective_lang_code = 'en'
-        else:
-            effective_lang_code = lang_code or self.default_lang
-
-        lang_data = self.locales_data.get(effective_lang_code)
-        if lang_data is None:
-            # Try explicit fallback to English if available
-            fallback_data = self.locales_data.get('en')
-            if fallback_data is not None:
-                text = fallback_data.get(key)
-                if text is not None:
-                    try:
-                        return text.format(**kwargs) if kwargs else text
-                    except Exception:
-                        return text
-            logging.warning(
-                f"No language data for '{effective_lang_code}' (default '{self.default_lang}' also missing). Key '{key}' will be returned as is."
-            )
-            return key.format(**kwargs) if kwargs else key
+    def reload(self) -> None:
+        """Re-read the locale files and recompile the catalog."""
+        previous_data = self.locales_data
+        self.locales_data = {}
+        self._load_locales()
+        if not self.locales_data:
+            logging.error("Locale reload found no languages; keeping the loaded catalog.")
+            self.locales_data = previous_data
+            return
+        self._compile_catalogs()
+        logging.info(
+            f"JsonI18n reloaded. Languages: {list(self.locales_data.keys())}, catalog version {self.catalog_version}"
+        )
+
+    def _fallback_chain(self, lang_code: Optional[str]) -> List[str]:
+        chain: List[str] = []
+        for candidate in (lang_code, self.default_lang, FALLBACK_LANGUAGE):
+            if candidate in self.locales_data and candidate not in chain:
+                chain.append(candidate)
+        return chain
+
+    def _effective_lang(self, lang_code: Optional[str]) -> str:
+        chain = self._fallback_chain(lang_code)
+        return chain[0] if chain else (lang_code or self.default_lang)
+
+    def _compile_catalogs(self) -> None:
+        compiled: Dict[str, Dict[str, CompiledMessage]] = {
+            lang_code: {
+                key: CompiledMessage(text)
+                for key, text in lang_data.items() if isinstance(text, str)
+            }
+            for lang_code, lang_data in self.locales_data.items()
+        }
+        catalogs: Dict[str, Dict[str, CompiledMessage]] = {}
+        for lang_code in compiled:
+            catalog: Dict[str, CompiledMessage] = {}
+            # Least preferred first, so the language's own strings win
+            for chain_lang in reversed(self._fallback_chain(lang_code)):
+                catalog.update(compiled[chain_lang])
+            catalogs[lang_code] = catalog
+        self._catalogs = catalogs
+        fallback_chain = self._fallback_chain(None)
+        self._fallback_catalog = catalogs[fallback_chain[0]] if fallback_chain else {}
+        self.catalog_version += 1
 
-        text = lang_data.get(key)
-        if text is None:
-            if effective_lang_code != self.default_lang:
-                default_lang_data = self.locales_data.get(
-                    self.default_lang, {})
-                text = default_lang_data.get(key)
-
-            if text is None:
-                logging.warning(
-                    f"Translation key '{key}' not found for lang '{effective_lang_code}' or default '{self.default_lang}'. Returning key."
-                )
-                return key.format(**kwargs) if kwargs else key
+    def gettext(self, lang_code: Optional[str], key: str, **kwargs) -> str:
+        catalog = self._catalogs.get(lang_code, self._fallback_catalog)
+        message = catalog.get(key)
+        if message is None:
+            return self._missing_key(lang_code, key, kwargs)
+        if not kwargs:
+            return message.text
+        if message.static_text is not None:
+            return message.static_text
         try:
-            return text.format(**kwargs) if kwargs else text
+            return message.text.format_map(kwargs)
         except KeyError as e_format:
             logging.warning(
-                f"Missing format key '{e_format}' for i18n key '{key}' (lang: {effective_lang_code}). Original text: '{text}'"
+                f"Missing format key '{e_format}' for i18n key '{key}' (lang: {self._effective_lang(lang_code)}). Original text: '{message.text}'"
             )
-            return text
+            return message.text
         except Exception as e_general_format:
             logging.error(
-                f"General error formatting i18n key '{key}' (lang: {effective_lang_code}): {e_general_format}. Original text: '{text}'",
+                f"General error formatting i18n key '{key}' (lang: {self._effective_lang(lang_code)}): {e_general_format}. Original text: '{message.text}'",
                 exc_info=True)
-            return text
+            return message.text
+
+    def _missing_key(self, lang_code: Optional[str], key: str,
+                     kwargs: Dict[str, Any]) -> str:
+        if not self._catalogs:
+            logging.warning(
+                f"No language data for '{self._effective_lang(lang_code)}' (default '{self.default_lang}' also missing). Key '{key}' will be returned as is."
+            )
+        else:
+            logging.warning(
+                f"Translation key '{key}' not found for lang '{self._effective_lang(lang_code)}' or its fallbacks {self._fallback_chain(lang_code)[1:]}. Returning key."
+            )
+        try:
+            return key.format(**kwargs) if kwargs else key
+        except Exception:
+            return key
+
+    def validate_catalog(self) -> List[str]:
+        """
+        Problems a translator should fix: keys missing from a language
+        (served from the fallback chain), placeholders that differ from the
+        reference language and strings that are not valid format templates.
+        """
+        problems: List[str] = []
+        reference_chain = self._fallback_chain(None)
+        if not reference_chain:
+            return ["no locales loaded"]
+        reference_lang = reference_chain[0]
+        reference = {
+            key: CompiledMessage(text)
+            for key, text in self.locales_data[reference_lang].items()
+            if isinstance(text, str)
+        }
+        for lang_code, lang_data in sorted(self.locales_data.items()):
+            for key, text in lang_data.items():
+                if not isinstance(text, str):
+                    problems.append(f"{lang_code}: '{key}' is not a string")
+                    continue
+                message = CompiledMessage(text)
+                if message.error:
+                    problems.append(
+                        f"{lang_code}: '{key}' is not a valid template ({message.error})")
+                    continue
+                if lang_code == reference_lang:
+                    continue
+                reference_message = reference.get(key)
+                if reference_message is None:
+                    problems.append(
+                        f"{lang_code}: '{key}' is missing from reference language '{reference_lang}'")
+                elif (reference_message.error is None
+                      and message.fields != reference_message.fields):
+                    problems.append(
+                        f"{lang_code}: '{key}' placeholders {sorted(message.fields)} "
+                        f"differ from '{reference_lang}' {sorted(reference_message.fields)}")
+            if lang_code != reference_lang:
+                for key in sorted(reference.keys() - lang_data.keys()):
+                    problems.append(
+                        f"{lang_code}: '{key}' is missing, falls back to "
+                        f"{self._fallback_chain(lang_code)[1:]}")
+        return problems
 
 
 _i18n_instance_singleton: Optional[JsonI18n] = None
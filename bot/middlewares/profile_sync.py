@@ -1,4 +1,5 @@
 import logging
+from collections import OrderedDict
 from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
@@ -6,11 +7,39 @@ from aiogram.types import Update, User as TgUser
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.dal import user_dal
+from db.invalidation_bus import ENTITY_USER, register_invalidation_handler
 from bot.utils.text_sanitizer import sanitize_username, sanitize_display_name, username_for_display
 
+# Users whose last seen Telegram profile is remembered as in sync with the DB
+PROFILE_FINGERPRINT_CACHE_SIZE = 50_000
+
+
+def _profile_fingerprint(tg_user: TgUser) -> int:
+    return hash((tg_user.username, tg_user.first_name, tg_user.last_name))
+
 
 class ProfileSyncMiddleware(BaseMiddleware):
 
+    def __init__(self, cache_size: int = PROFILE_FINGERPRINT_CACHE_SIZE):
+        super().__init__()
+        self.cache_size = cache_size
+        # user_id -> fingerprint of the raw Telegram profile the DB row matches
+        self._fingerprints: "OrderedDict[int, int]" = OrderedDict()
+        # Another instance may have changed the row the fingerprint vouches for
+        register_invalidation_handler(ENTITY_USER, self._on_user_invalidated)
+
+    def _on_user_invalidated(self, user_id: Optional[str]) -> None:
+        if user_id is None:
+            self._fingerprints.clear()
+        else:
+            self._fingerprints.pop(int(user_id), None)
+
+    def _remember(self, user_id: int, fingerprint: int) -> None:
+        self._fingerprints[user_id] = fingerprint
+        self._fingerprints.move_to_end(user_id)
+        if len(self._fingerprints) > self.cache_size:
+            self._fingerprints.popitem(last=False)
+
     async def __call__(
         self,
         handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
@@ -21,6 +50,9 @@ class ProfileSyncMiddleware(BaseMiddleware):
         tg_user: Optional[TgUser] = data.get("event_from_user")
 
         if session and tg_user:
+            fingerprint = _profile_fingerprint(tg_user)
+            if self._fingerprints.get(tg_user.id) == fingerprint:
+                return await handler(event, data)
             try:
                 db_user = await user_dal.get_user_by_id(session, tg_user.id)
                 if db_user:
@@ -36,29 +68,28 @@ class ProfileSyncMiddleware(BaseMiddleware):
                     if db_user.last_name != sanitized_last_name:
                         update_payload["last_name"] = sanitized_last_name
 
-                    if update_payload:
-                        await user_dal.update_user(session, tg_user.id, update_payload)
+                    if not update_payload:
+                        self._remember(tg_user.id, fingerprint)
+                    else:
+                        # The row is already loaded; the session commit after the
+                        # handler writes the change. The fingerprint is recorded
+                        # on the next update, once the commit has happened.
+                        for key, value in update_payload.items():
+                            setattr(db_user, key, value)
+                        self._fingerprints.pop(tg_user.id, None)
                         logging.info(
                             f"ProfileSyncMiddleware: Updated user {tg_user.id} profile fields: {list(update_payload.keys())}"
                         )
 
                         # Also update description on panel if linked
-                        try:
-                            panel_service = data.get("panel_service")
-                            if panel_service and db_user.panel_user_uuid:
-                                description_text = "\n".join([
-                                    username_for_display(tg_user.username, with_at=False) if sanitized_username is not None else "",
-                                    sanitized_first_name or "",
-                                    sanitized_last_name or "",
-                                ]).strip()
-                                await panel_service.update_user_details_on_panel(
-                                    db_user.panel_user_uuid,
-                                    {"description": description_text},
-                                )
-                        except Exception as e_upd_desc:
-                            logging.warning(
-                                f"ProfileSyncMiddleware: Failed to update panel description for user {tg_user.id}: {e_upd_desc}"
-                            )
+                        if db_user.panel_user_uuid:
+                            description_text = "\n".join([
+                                username_for_display(tg_user.username, with_at=False) if sanitized_username is not None else "",
+                                sanitized_first_name or "",
+                                sanitized_last_name or "",
+                            ]).strip()
+                            self._schedule_panel_description(
+                                data, db_user.panel_user_uuid, description_text, tg_user.id)
             except Exception as e:
                 logging.error(
                     f"ProfileSyncMiddleware: Failed to sync profile for user {getattr(tg_user, 'id', 'N/A')}: {e}",
@@ -67,3 +98,14 @@ class ProfileSyncMiddleware(BaseMiddleware):
 
         return await handler(event, data)
 
+    @staticmethod
+    def _schedule_panel_description(data: Dict[str, Any], panel_user_uuid: str,
+                                    description_text: str, user_id: int) -> None:
+        description_sync = data.get("panel_description_sync_service")
+        if description_sync is None:
+            logging.warning(
+                f"ProfileSyncMiddleware: panel_description_sync_service is not configured; "
+                f"panel description of user {user_id} not updated"
+            )
+            return
+        description_sync.schedule(panel_user_uuid, description_text)
@@ -0,0 +1,85 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from bot.utils.query_stats import (
+    aggregate_update_stats,
+    begin_update_stats,
+    current_update_stats,
+    end_update_stats,
+)
+from config.settings import Settings
+
+
+def _fallback_label(event: Update) -> str:
+    # Used when no handler matched. Only the update type: labels built from
+    # user input (command text, callback data) would be unbounded.
+    return event.event_type
+
+
+class QueryStatsMiddleware(BaseMiddleware):
+    """
+    Scopes SQL statement accounting to one update (outer middleware on
+    dp.update). Updates over the configured statement count or DB time, or
+    repeating one statement shape too often, are logged; all updates feed
+    the per-handler aggregates exposed on the metrics endpoint.
+    """
+
+    def __init__(self, settings: Settings):
+        super().__init__()
+        self.settings = settings
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        stats, token = begin_update_stats(_fallback_label(event))
+        try:
+            return await handler(event, data)
+        finally:
+            end_update_stats(token)
+            self._report(event, stats)
+
+    def _report(self, event: Update, stats) -> None:
+        max_statements = self.settings.QUERY_STATS_MAX_STATEMENTS
+        max_db_ms = self.settings.QUERY_STATS_MAX_DB_MS
+        db_ms = stats.db_seconds * 1000
+        threshold_exceeded = ((max_statements > 0 and stats.statements > max_statements)
+                              or (max_db_ms > 0 and db_ms > max_db_ms))
+        repeated = stats.repeated_shapes(self.settings.QUERY_STATS_REPEAT_THRESHOLD)
+        aggregate_update_stats(stats, threshold_exceeded, repeated)
+
+        if threshold_exceeded:
+            logging.warning(
+                f"Query stats: update {event.update_id} ({stats.handler}) ran "
+                f"{stats.statements} SQL statements taking {db_ms:.1f} ms "
+                f"(+{stats.pool_wait_seconds * 1000:.1f} ms waiting for a connection)")
+        for shape, count in repeated:
+            logging.warning(
+                f"Query stats: update {event.update_id} ({stats.handler}) repeated "
+                f"a statement {count} times, possible N+1: {shape[:300]}")
+
+
+class QueryStatsHandlerLabelMiddleware(BaseMiddleware):
+    """
+    Inner middleware that names the update's statistics after the handler
+    aiogram resolved (``module.function``).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        stats = current_update_stats()
+        handler_object = data.get("handler")
+        if stats is not None and handler_object is not None:
+            callback = handler_object.callback
+            stats.handler = (f"{getattr(callback, '__module__', '?')}."
+                             f"{getattr(callback, '__qualname__', repr(callback))}")
+        return await handler(event, data)
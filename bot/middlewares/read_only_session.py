@@ -0,0 +1,35 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+# Handler flag: the handler only reads, so its ``session`` may come from the replica
+READ_ONLY_DB_FLAG = "read_only_db"
+
+
+class ReadOnlySessionMiddleware(BaseMiddleware):
+    """
+    Inner middleware that hands handlers flagged ``read_only_db`` a session
+    from ``read_only_session_factory`` (the read replica when usable)
+    instead of the update's primary session.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        factory = data.get("read_only_session_factory")
+        if (factory is None or not factory.has_replica
+                or not get_flag(data, READ_ONLY_DB_FLAG)):
+            return await handler(event, data)
+
+        primary_session = data.get("session")
+        async with factory.read_session(primary_session) as session:
+            data["session"] = session
+            try:
+                return await handler(event, data)
+            finally:
+                data["session"] = primary_session
@@ -0,0 +1,103 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from bot.utils.tracing import current_span, is_tracing_enabled, start_span
+
+ROOT_SPAN_DATA_KEY = "tracing_root_span"
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """
+    Outermost middleware on dp.update: one root span per update. The span
+    starts as ``update.<type>`` and is renamed to ``<router>:<handler>`` once
+    aiogram resolves the handler.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        with start_span(f"update.{event.event_type}", {
+                "telegram.update_id": event.update_id,
+                "telegram.update_type": event.event_type,
+        }):
+            data[ROOT_SPAN_DATA_KEY] = current_span()
+            return await handler(event, data)
+
+
+class TracedMiddleware(BaseMiddleware):
+    """Runs a wrapped outer middleware (and everything after it) in a ``middleware.<name>`` span."""
+
+    def __init__(self, middleware: BaseMiddleware, name: str):
+        super().__init__()
+        self.middleware = middleware
+        self.span_name = f"middleware.{name}"
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with start_span(self.span_name):
+            return await self.middleware(handler, event, data)
+
+
+def traced_middleware(middleware: BaseMiddleware) -> BaseMiddleware:
+    """The middleware itself when tracing is off, so there is no extra call layer."""
+    if not is_tracing_enabled():
+        return middleware
+    return TracedMiddleware(middleware, type(middleware).__name__)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """
+    Inner middleware: names the update's root span after the resolved router
+    and handler and wraps the handler call in its own span.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        if handler_object is None:
+            return await handler(event, data)
+        callback = handler_object.callback
+        router = data.get("event_router")
+        router_name = router.name if router is not None else "?"
+        span_name = f"{router_name}:{getattr(callback, '__qualname__', repr(callback))}"
+
+        root_span = data.get(ROOT_SPAN_DATA_KEY)
+        if root_span is not None:
+            root_span.update_name(span_name)
+        with start_span(f"handler.{span_name}", {
+                "code.namespace": getattr(callback, "__module__", "?"),
+                "code.function": getattr(callback, "__qualname__", "?"),
+        }):
+            return await handler(event, data)
+
+
+class TelegramRequestTracingMiddleware(BaseRequestMiddleware):
+    """Bot API calls as ``telegram.<method>`` spans (registered on ``bot.session``)."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with start_span(f"telegram.{method.__api_method__}"):
+            return await make_request(bot, method)
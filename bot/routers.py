@@ -1,6 +1,7 @@
 from aiogram import Router, F
 
 from bot.handlers.user import user_router_aggregate
+from bot.handlers.user import channel_membership
 from bot.handlers import inline_mode
 from bot.handlers.admin import admin_router_aggregate
 from bot.filters.admin_filter import AdminFilter
@@ -17,10 +18,12 @@ def build_root_router(settings: Settings) -> Router:
     # Public routers
     root.include_router(user_router_aggregate)
     root.include_router(inline_mode.router)
+    if settings.REQUIRED_CHANNEL_ID:
+        root.include_router(channel_membership.router)
 
     # Admin routers behind filter
     admin_main_router = Router(name="admin_main_filtered_router")
-    admin_filter_instance = AdminFilter(admin_ids=settings.ADMIN_IDS)
+    admin_filter_instance = AdminFilter(admin_ids=settings.snapshot.admin_id_set)
     admin_main_router.message.filter(admin_filter_instance)
     admin_main_router.callback_query.filter(admin_filter_instance)
     admin_main_router.include_router(admin_router_aggregate)
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import User
+
+from bot.utils.background_tasks import run_in_background
+
+
+class BotIdentityService:
+    """
+    The bot's own Telegram account (``get_me``), fetched once at startup and
+    served from memory. With ``refresh_seconds`` > 0 a stale identity is
+    still returned immediately while a refresh runs in the background.
+    """
+
+    def __init__(self, bot: Bot, refresh_seconds: float = 0.0):
+        self.bot = bot
+        self.refresh_seconds = max(refresh_seconds, 0.0)
+        self._me: Optional[User] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def me(self) -> Optional[User]:
+        return self._me
+
+    @property
+    def username(self) -> Optional[str]:
+        return self._me.username if self._me else None
+
+    async def load(self) -> Optional[User]:
+        """Fetch the identity now; keeps the previous one if Telegram fails."""
+        async with self._lock:
+            try:
+                self._me = await self.bot.get_me()
+                self._fetched_at = time.monotonic()
+            except Exception as e:
+                logging.error(f"BotIdentityService: Failed to fetch bot info: {e}")
+        return self._me
+
+    async def get_me(self) -> Optional[User]:
+        if self._me is None:
+            return await self.load()
+        if self._is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = run_in_background(self.load(), name="BotIdentityRefresh")
+        return self._me
+
+    async def get_username(self) -> Optional[str]:
+        me = await self.get_me()
+        return me.username if me else None
+
+    def _is_stale(self) -> bool:
+        return (self.refresh_seconds > 0
+                and time.monotonic() - self._fetched_at >= self.refresh_seconds)
+
+    async def close(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
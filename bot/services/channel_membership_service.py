@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import ChatMemberUpdated
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import Settings
+from db.dal import user_dal
+from db.invalidation_bus import ENTITY_USER, register_invalidation_handler
+from bot.utils.background_tasks import run_in_background
+from bot.utils.metrics import Metric, register_metrics_collector
+
+CHANNEL_MEMBERSHIP_CACHE_MAX_SIZE = 100_000
+CHANNEL_MEMBERSHIP_REVALIDATE_BATCH = 200
+# Pause between passes once every verified member is fresh
+CHANNEL_MEMBERSHIP_IDLE_SLEEP_SECONDS = 300
+
+MEMBER_STATUSES = frozenset({"creator", "administrator", "member", "restricted"})
+
+
+def is_channel_member(member: Any) -> bool:
+    status = getattr(member, "status", None)
+    status_value = getattr(status, "value", status)
+    if status_value not in MEMBER_STATUSES:
+        return False
+    # A restricted user may already have left the channel
+    return status_value != "restricted" or bool(getattr(member, "is_member", True))
+
+
+class ChannelMembershipService:
+    """
+    Membership of users in ``REQUIRED_CHANNEL_ID``, kept in a TTL cache.
+
+    The cache is fed by verification checks and by ``chat_member`` updates of
+    the channel (the bot must be an admin there), so joins, leaves and kicks
+    apply without an API call. Verified users are re-checked in the background
+    once their last check is older than ``CHANNEL_MEMBERSHIP_REVALIDATE_SECONDS``,
+    at most ``CHANNEL_MEMBERSHIP_REVALIDATE_RATE`` requests per second.
+    """
+
+    def __init__(self, bot: Bot, settings: Settings,
+                 async_session_factory: sessionmaker,
+                 max_size: int = CHANNEL_MEMBERSHIP_CACHE_MAX_SIZE):
+        self.bot = bot
+        self.settings = settings
+        self.async_session_factory = async_session_factory
+        self.ttl_seconds = max(settings.CHANNEL_MEMBERSHIP_CACHE_TTL_SECONDS, 0.0)
+        self.revalidate_seconds = max(settings.CHANNEL_MEMBERSHIP_REVALIDATE_SECONDS, 0.0)
+        self.revalidate_rate = max(settings.CHANNEL_MEMBERSHIP_REVALIDATE_RATE, 0.1)
+        self.max_size = max_size
+        # user_id -> (is_member, monotonic time the entry expires)
+        self._cache: "OrderedDict[int, Tuple[bool, float]]" = OrderedDict()
+        self._revalidate_task: Optional[asyncio.Task] = None
+        self._hits = 0
+        self._misses = 0
+        self._member_updates = 0
+        self._revalidated = 0
+        register_metrics_collector("channel_membership", self._collect_metrics)
+        # chat_member updates reach only one instance; the others evict on its write
+        register_invalidation_handler(ENTITY_USER, self._on_user_invalidated)
+
+    @property
+    def channel_id(self) -> Optional[int]:
+        return self.settings.REQUIRED_CHANNEL_ID
+
+    def get_cached(self, user_id: int) -> Optional[bool]:
+        """Cached membership, or None when unknown or expired."""
+        entry = self._cache.get(user_id)
+        if entry is None or entry[1] <= time.monotonic():
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry[0]
+
+    def remember(self, user_id: int, is_member: bool) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._cache[user_id] = (is_member, time.monotonic() + self.ttl_seconds)
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def forget(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    def _on_user_invalidated(self, user_id: Optional[str]) -> None:
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self.forget(int(user_id))
+
+    async def fetch_membership(self, user_id: int) -> bool:
+        """Ask Telegram and cache the answer; API errors other than 'not found' propagate."""
+        try:
+            member = await self.bot.get_chat_member(self.channel_id, user_id)
+            is_member = is_channel_member(member)
+        except TelegramBadRequest:
+            is_member = False
+        self.remember(user_id, is_member)
+        return is_member
+
+    async def handle_member_update(self, session: AsyncSession,
+                                   event: ChatMemberUpdated) -> None:
+        if not self.channel_id or event.chat.id != self.channel_id:
+            return
+        user_id = event.new_chat_member.user.id
+        is_member = is_channel_member(event.new_chat_member)
+        self._member_updates += 1
+        # Other instances evict the user on this write; this one keeps the answer
+        await user_dal.update_user(session, user_id, {
+            "channel_subscription_checked_at": datetime.now(timezone.utc),
+            "channel_subscription_verified_for": self.channel_id,
+            "channel_subscription_verified": is_member,
+        })
+        self.remember(user_id, is_member)
+        logging.info(
+            "Required channel %s: user %s is %s (chat_member update).",
+            self.channel_id,
+            user_id,
+            "a member" if is_member else "no longer a member",
+        )
+
+    def start(self) -> None:
+        if not self.channel_id or self.revalidate_seconds <= 0:
+            return
+        if self._revalidate_task is None or self._revalidate_task.done():
+            self._revalidate_task = run_in_background(
+                self._revalidate_loop(), name="ChannelMembershipRevalidation")
+
+    async def _revalidate_loop(self) -> None:
+        while True:
+            try:
+                checked = await self.revalidate_due()
+            except Exception as e:
+                logging.error(f"Channel membership revalidation failed: {e}", exc_info=True)
+                checked = 0
+            # A full batch means more may be due; failures wait for the next pass
+            if checked < CHANNEL_MEMBERSHIP_REVALIDATE_BATCH:
+                await asyncio.sleep(min(self.revalidate_seconds,
+                                        CHANNEL_MEMBERSHIP_IDLE_SLEEP_SECONDS))
+
+    async def revalidate_due(self) -> int:
+        """Re-check one batch of verified users with a stale check; returns how many succeeded."""
+        checked_before = datetime.now(timezone.utc) - timedelta(seconds=self.revalidate_seconds)
+        async with self.async_session_factory() as session:
+            user_ids = await user_dal.get_user_ids_due_for_channel_recheck(
+                session, self.channel_id, checked_before,
+                CHANNEL_MEMBERSHIP_REVALIDATE_BATCH)
+        if not user_ids:
+            return 0
+
+        results: List[Tuple[int, bool]] = []
+        interval = 1.0 / self.revalidate_rate
+        for user_id in user_ids:
+            is_member = await self._fetch_with_retry(user_id)
+            if is_member is not None:
+                results.append((user_id, is_member))
+            await asyncio.sleep(interval)
+
+        now = datetime.now(timezone.utc)
+        still_members = [user_id for user_id, is_member in results if is_member]
+        left = [user_id for user_id, is_member in results if not is_member]
+        async with self.async_session_factory() as session:
+            try:
+                await user_dal.set_channel_subscription_checked(
+                    session, still_members, True, now)
+                await user_dal.set_channel_subscription_checked(
+                    session, left, False, now)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        self._revalidated += len(results)
+        if left:
+            logging.info(
+                f"Channel membership revalidation: {len(left)} of {len(results)} users left channel {self.channel_id}."
+            )
+        return len(results)
+
+    async def _fetch_with_retry(self, user_id: int) -> Optional[bool]:
+        try:
+            return await self.fetch_membership(user_id)
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            try:
+                return await self.fetch_membership(user_id)
+            except TelegramAPIError as retry_error:
+                logging.warning(f"Channel membership recheck of user {user_id} failed: {retry_error}")
+        except TelegramAPIError as e:
+            logging.warning(f"Channel membership recheck of user {user_id} failed: {e}")
+        return None
+
+    async def close(self) -> None:
+        if self._revalidate_task is not None and not self._revalidate_task.done():
+            self._revalidate_task.cancel()
+            try:
+                await self._revalidate_task
+            except asyncio.CancelledError:
+                pass
+        self._revalidate_task = None
+
+    def _collect_metrics(self) -> List[Metric]:
+        return [
+            Metric("bot_channel_membership_cache_entries", "gauge",
+                   "Cached required-channel memberships", [({}, len(self._cache))]),
+            Metric("bot_channel_membership_cache_hits_total", "counter",
+                   "Channel gate checks answered from the cache", [({}, self._hits)]),
+            Metric("bot_channel_membership_cache_misses_total", "counter",
+                   "Channel gate checks that fell back to the database", [({}, self._misses)]),
+            Metric("bot_channel_membership_updates_total", "counter",
+                   "chat_member updates received for the required channel",
+                   [({}, self._member_updates)]),
+            Metric("bot_channel_membership_revalidated_total", "counter",
+                   "Memberships re-checked by the background job", [({}, self._revalidated)]),
+        ]
@@ -10,6 +10,7 @@ from aiocryptopay import AioCryptoPay, Networks
 from aiocryptopay.models.update import Update
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from bot.middlewares.i18n import JsonI18n
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
@@ -57,6 +58,7 @@ class CryptoPayService:
             except Exception as e:
                 logging.warning(f"Failed to close CryptoPay client: {e}")
 
+    @traced("payment.cryptopay.create_invoice")
     async def create_invoice(
         self,
         session: AsyncSession,
@@ -13,6 +13,7 @@ from aiogram import Bot
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from bot.middlewares.i18n import JsonI18n
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
@@ -66,6 +67,7 @@ class FreeKassaService:
         quantized = Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
         return f"{quantized:.2f}"
 
+    @traced("payment.freekassa.create_order")
     async def create_order(
         self,
         *,
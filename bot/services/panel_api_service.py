@@ -5,11 +5,13 @@ import re
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, timezone
 import asyncio
+import time
 from urllib.parse import urlencode
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from db.dal import panel_sync_dal
 from db.models import PanelSyncStatus
 
@@ -22,6 +24,9 @@ class PanelApiService:
         self.api_key = settings.PANEL_API_KEY
         self._session: Optional[aiohttp.ClientSession] = None
         self.default_client_ip = "127.0.0.1"
+        self._dashboard_stats_cache: Optional[Dict[str, Any]] = None
+        self._dashboard_stats_cached_at: float = 0.0
+        self._dashboard_stats_refresh_task: Optional[asyncio.Task] = None
 
     async def __aenter__(self):
         """Context manager entry"""
@@ -59,6 +64,11 @@ class PanelApiService:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
 
+    @traced("panel.request",
+            attributes=lambda self, method, endpoint, *args, **kwargs: {
+                "http.request.method": method.upper(),
+                "panel.endpoint": endpoint,
+            })
     async def _request(self,
                        method: str,
                        endpoint: str,
@@ -563,6 +573,66 @@ class PanelApiService:
             return response_data.get("response")
         return None
 
+    async def _refresh_dashboard_stats(self) -> Dict[str, Any]:
+        system_stats, bandwidth_stats, nodes_stats = await asyncio.gather(
+            self.get_system_stats(),
+            self.get_bandwidth_stats(),
+            self.get_nodes_statistics(),
+        )
+        snapshot = {
+            "system": system_stats,
+            "bandwidth": bandwidth_stats,
+            "nodes": nodes_stats,
+        }
+        logging.debug(f"Panel dashboard stats refreshed: {snapshot}")
+
+        if system_stats is None and bandwidth_stats is None and nodes_stats is None:
+            # Keep serving the previous snapshot rather than caching a total failure
+            if self._dashboard_stats_cache is not None:
+                logging.warning(
+                    "Panel dashboard stats refresh failed, keeping previous snapshot.")
+                return self._dashboard_stats_cache
+            return snapshot
+
+        self._dashboard_stats_cache = snapshot
+        self._dashboard_stats_cached_at = time.monotonic()
+        return snapshot
+
+    async def get_dashboard_stats(self) -> Dict[str, Any]:
+        """Get system, bandwidth and nodes statistics in one call.
+
+        The three panel requests run concurrently and the result is cached for
+        PANEL_STATS_CACHE_TTL_SECONDS. When the cache is expired and the panel
+        does not answer within PANEL_STATS_STALE_TIMEOUT_SECONDS, the previous
+        snapshot is returned while the refresh finishes in the background.
+        Keys: ``system``, ``bandwidth``, ``nodes`` (each may be None).
+        """
+        ttl = self.settings.PANEL_STATS_CACHE_TTL_SECONDS
+        cached = self._dashboard_stats_cache
+        if (cached is not None and ttl > 0
+                and time.monotonic() - self._dashboard_stats_cached_at < ttl):
+            return cached
+
+        refresh_task = self._dashboard_stats_refresh_task
+        if refresh_task is None or refresh_task.done():
+            refresh_task = asyncio.create_task(self._refresh_dashboard_stats())
+            self._dashboard_stats_refresh_task = refresh_task
+
+        if cached is None:
+            return await asyncio.shield(refresh_task)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(refresh_task),
+                timeout=self.settings.PANEL_STATS_STALE_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logging.warning(
+                "Panel dashboard stats refresh is slow, serving cached snapshot "
+                f"from {time.monotonic() - self._dashboard_stats_cached_at:.0f}s ago."
+            )
+            return cached
+
     async def encrypt_happ_link(self, link_to_encrypt: str) -> Optional[str]:
         """Encrypt a subscription link using the panel's happ crypt4 API.
 
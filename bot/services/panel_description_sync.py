@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from bot.services.panel_api_service import PanelApiService
+from bot.utils.background_tasks import run_in_background
+
+
+class PanelDescriptionSyncService:
+    """
+    Debounced queue of panel user description updates. Each user keeps only
+    the latest description and is pushed once it has been stable for
+    ``debounce_seconds``, outside the update that changed it.
+    """
+
+    def __init__(self, panel_service: PanelApiService, debounce_seconds: float):
+        self.panel_service = panel_service
+        self.debounce_seconds = max(debounce_seconds, 0.0)
+        # panel user uuid -> (description, monotonic time it is due)
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    def schedule(self, panel_user_uuid: str, description: str) -> None:
+        self._pending[panel_user_uuid] = (description,
+                                          time.monotonic() + self.debounce_seconds)
+        if self._worker is None or self._worker.done():
+            self._worker = run_in_background(self._run(),
+                                             name="PanelDescriptionSync")
+        self._wakeup.set()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = min(due for _, due in self._pending.values()) - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._push_due(time.monotonic())
+
+    async def _push_due(self, now: float) -> None:
+        due_uuids = [uuid for uuid, (_, due) in self._pending.items() if due <= now]
+        for panel_user_uuid in due_uuids:
+            entry = self._pending.get(panel_user_uuid)
+            if entry is None or entry[1] > now:
+                continue
+            # Dequeued only once pushed: a push cancelled at shutdown is
+            # retried by flush(), and a newer description scheduled during
+            # the push stays queued
+            await self._push(panel_user_uuid, entry[0])
+            if self._pending.get(panel_user_uuid) is entry:
+                del self._pending[panel_user_uuid]
+
+    async def _push(self, panel_user_uuid: str, description: str) -> None:
+        try:
+            await self.panel_service.update_user_details_on_panel(
+                panel_user_uuid,
+                {"description": description},
+                log_response=False,
+            )
+        except Exception as e:
+            logging.warning(
+                f"PanelDescriptionSync: Failed to update description of panel user {panel_user_uuid}: {e}"
+            )
+
+    async def flush(self) -> None:
+        """Push every pending description now, regardless of the debounce."""
+        await self._push_due(float("inf"))
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        if self._pending:
+            logging.info(
+                f"PanelDescriptionSync: Flushing {len(self._pending)} pending description(s) on shutdown."
+            )
+            await self.flush()
@@ -8,6 +8,7 @@ from aiogram import Bot
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from bot.middlewares.i18n import JsonI18n
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
@@ -66,6 +67,7 @@ class PlategaService:
         if self._session and not self._session.closed:
             await self._session.close()
 
+    @traced("payment.platega.create_transaction")
     async def create_transaction(
         self,
         *,
@@ -93,9 +93,9 @@ class ReferralService:
                 and inviter_user_model.first_name else self.i18n.gettext(
                     default_lang_for_placeholder, "friend_placeholder"))
 
-            inviter_bonus_days = self.settings.referral_bonus_inviter.get(
+            inviter_bonus_days = self.settings.snapshot.referral_bonus_inviter.get(
                 purchased_subscription_months)
-            referee_bonus_days = self.settings.referral_bonus_referee.get(
+            referee_bonus_days = self.settings.snapshot.referral_bonus_referee.get(
                 purchased_subscription_months)
 
             if inviter_bonus_days and inviter_bonus_days > 0:
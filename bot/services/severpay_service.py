@@ -11,6 +11,7 @@ from aiogram import Bot
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from bot.middlewares.i18n import JsonI18n
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
@@ -90,6 +91,7 @@ class SeverPayService:
         expected_sign = self._sign_payload(data)
         return hmac.compare_digest(provided_sign, expected_sign)
 
+    @traced("payment.severpay.create_payment")
     async def create_payment(
         self,
         *,
@@ -6,6 +6,7 @@ from aiogram.types import LabeledPrice
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 from db.dal import payment_dal, user_dal
 from .subscription_service import SubscriptionService
 from .referral_service import ReferralService
@@ -26,6 +27,7 @@ class StarsService:
         self.subscription_service = subscription_service
         self.referral_service = referral_service
 
+    @traced("payment.stars.create_invoice")
     async def create_invoice(self, session: AsyncSession, user_id: int, months: int,
                              stars_price: int, description: str, sale_mode: str = "subscription") -> Optional[int]:
         payment_record_data = {
@@ -65,6 +67,7 @@ class StarsService:
                           exc_info=True)
             return None
 
+    @traced("payment.stars.process_successful_payment")
     async def process_successful_payment(self, session: AsyncSession,
                                          message: types.Message,
                                          payment_db_id: int,
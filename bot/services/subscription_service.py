@@ -986,7 +986,7 @@ class SubscriptionService:
             return False
 
         months = sub.duration_months or 1
-        amount = self.settings.subscription_options.get(months)
+        amount = self.settings.snapshot.subscription_options.get(months)
         if not amount:
             logging.error(f"Auto-renew price missing for {months} months")
             return False
@@ -8,6 +8,7 @@ from yookassa.domain.request.payment_request_builder import PaymentRequestBuilde
 from yookassa.domain.common.confirmation_type import ConfirmationType
 
 from config.settings import Settings
+from bot.utils.tracing import traced
 
 
 class YooKassaService:
@@ -57,6 +58,7 @@ class YooKassaService:
             f"YooKassa Service effective return_url for payments: {self.return_url}"
         )
 
+    @traced("payment.yookassa.create_payment")
     async def create_payment(
             self,
             amount: float,
@@ -205,6 +207,7 @@ class YooKassaService:
                           exc_info=True)
             return None
 
+    @traced("payment.yookassa.get_payment_info")
     async def get_payment_info(
             self, payment_id_in_yookassa: str) -> Optional[Dict[str, Any]]:
         if not self.configured:
@@ -270,6 +273,7 @@ class YooKassaService:
                 exc_info=True)
             return None
 
+    @traced("payment.yookassa.cancel_payment")
     async def cancel_payment(self, payment_id_in_yookassa: str) -> bool:
         if not self.configured:
             logging.error("YooKassa is not configured. Cannot cancel payment.")
@@ -23,6 +23,8 @@ class AdminStates(StatesGroup):
     waiting_for_user_id_to_unban = State()
 
     waiting_for_user_id_for_logs = State()
+    waiting_for_logs_export_filters = State()
+    waiting_for_payments_export_filters = State()
     
     # User management states
     waiting_for_user_search = State()
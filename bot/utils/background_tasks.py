@@ -0,0 +1,25 @@
+import asyncio
+import logging
+from typing import Coroutine, Any, Set
+
+# Strong references so running jobs are not garbage-collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _on_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if task.cancelled():
+        logging.info(f"Background task '{task.get_name()}' was cancelled.")
+        return
+    exc = task.exception()
+    if exc is not None:
+        logging.error(f"Background task '{task.get_name()}' failed: {exc}",
+                      exc_info=exc)
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any], name: str) -> asyncio.Task:
+    """Schedule a long-running job (exports, bulk generation) outside the update handler."""
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
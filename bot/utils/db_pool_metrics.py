@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot.utils.metrics import Metric, register_metrics_collector
+from bot.utils.query_stats import current_update_stats
+from db.database_setup import set_pool_wait_observer
+
+
+@dataclass
+class PoolCheckoutStats:
+    checkouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    invalidations: int = 0
+
+
+_stats = PoolCheckoutStats()
+
+
+def _observe_checkout(seconds: float, timed_out: bool) -> None:
+    _stats.checkouts += 1
+    _stats.wait_seconds += seconds
+    _stats.max_wait_seconds = max(_stats.max_wait_seconds, seconds)
+    if timed_out:
+        _stats.timeouts += 1
+    update_stats = current_update_stats()
+    if update_stats is not None:
+        update_stats.record_pool_wait(seconds)
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception) -> None:
+    _stats.invalidations += 1
+
+
+def install_pool_metrics(engine: AsyncEngine) -> None:
+    """
+    Time every checkout from ``engine``'s pool (per update too, when query
+    stats are on) and publish the pool occupancy as metrics.
+    """
+    sync_engine = engine.sync_engine
+    set_pool_wait_observer(_observe_checkout)
+    if not event.contains(sync_engine, "invalidate", _on_invalidate):
+        event.listen(sync_engine, "invalidate", _on_invalidate)
+
+    def collect() -> List[Metric]:
+        pool = sync_engine.pool
+        size = pool.size() if hasattr(pool, "size") else 0
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        overflow = max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0
+        return [
+            Metric("bot_db_pool_size", "gauge",
+                   "Connections the pool keeps open", [({}, size)]),
+            Metric("bot_db_pool_checked_out", "gauge",
+                   "Connections currently in use", [({}, checked_out)]),
+            Metric("bot_db_pool_overflow", "gauge",
+                   "Connections open above the pool size", [({}, overflow)]),
+            Metric("bot_db_pool_checkouts_total", "counter",
+                   "Connections handed out by the pool", [({}, _stats.checkouts)]),
+            Metric("bot_db_pool_checkout_wait_seconds_total", "counter",
+                   "Time spent waiting for (or opening) a connection",
+                   [({}, _stats.wait_seconds)]),
+            Metric("bot_db_pool_checkout_wait_seconds_max", "gauge",
+                   "Longest single checkout", [({}, _stats.max_wait_seconds)]),
+            Metric("bot_db_pool_timeouts_total", "counter",
+                   "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS",
+                   [({}, _stats.timeouts)]),
+            Metric("bot_db_pool_invalidations_total", "counter",
+                   "Connections discarded after errors or disconnects",
+                   [({}, _stats.invalidations)]),
+        ]
+
+    register_metrics_collector("db_pool", collect)
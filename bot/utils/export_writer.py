@@ -0,0 +1,370 @@
+import csv
+import gzip
+import importlib.util
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+# Bots may upload documents up to 50 MB; keep headroom for the gzip trailer
+# and multipart overhead.
+TELEGRAM_DOCUMENT_MAX_BYTES = 48 * 1024 * 1024
+
+# XLSX is zipped only on save, so its size is unknown while writing; split by
+# rows instead (payments compress to well under 100 bytes per row).
+XLSX_MAX_ROWS_PER_PART = 400_000
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_XLSX = "xlsx"
+EXPORT_FORMAT_PARQUET = "parquet"
+
+# Optional formats and the module that has to be installed for them
+_OPTIONAL_FORMAT_MODULES = {
+    EXPORT_FORMAT_XLSX: "openpyxl",
+    EXPORT_FORMAT_PARQUET: "pyarrow",
+}
+
+
+@dataclass
+class ExportPart:
+    path: str
+    filename: str
+    rows: int
+
+
+class ExportPartWriter:
+    """
+    Base class for writers that stream rows into temporary files and start a
+    new part (with its own header) before a Telegram document would get too
+    large. Call ``close()`` to get the finished parts and ``cleanup()`` to
+    remove them from disk once they have been sent.
+
+    ``writerows`` does blocking I/O; call it via ``asyncio.to_thread``.
+    Missing values should be ``None``; text formats write them as empty
+    cells. ``column_types`` (``int``, ``float``, ``bool``, ``datetime`` or
+    ``str`` per column) is used by typed formats instead of guessing.
+    """
+
+    extension = ""
+
+    def __init__(self,
+                 filename_prefix: str,
+                 header: Sequence[Any],
+                 max_part_bytes: int = TELEGRAM_DOCUMENT_MAX_BYTES,
+                 max_part_rows: Optional[int] = None,
+                 column_types: Optional[Sequence[type]] = None):
+        self.filename_prefix = filename_prefix
+        self.header = list(header)
+        self.column_types = list(column_types) if column_types else None
+        self.max_part_bytes = max_part_bytes
+        self.max_part_rows = max_part_rows
+        self.parts: List[ExportPart] = []
+        self.total_rows = 0
+        self._part_open = False
+        self._closed = False
+
+    def _new_part_path(self) -> str:
+        fd, path = tempfile.mkstemp(prefix=f"{self.filename_prefix}_",
+                                    suffix=self.extension)
+        os.close(fd)
+        self.parts.append(ExportPart(path=path, filename="", rows=0))
+        return path
+
+    def _open_part(self) -> None:
+        raise NotImplementedError
+
+    def _write_row(self, row: Sequence[Any]) -> None:
+        raise NotImplementedError
+
+    def _current_part_bytes(self) -> int:
+        return 0
+
+    def _close_part(self) -> None:
+        raise NotImplementedError
+
+    def _part_is_full(self) -> bool:
+        part = self.parts[-1]
+        if self.max_part_rows is not None and part.rows >= self.max_part_rows:
+            return True
+        return self._current_part_bytes() >= self.max_part_bytes
+
+    def writerows(self, rows: Iterable[Sequence[Any]]) -> None:
+        if self._closed:
+            raise ValueError("Writer is already closed.")
+        for row in rows:
+            if not self._part_open:
+                self._open_part()
+                self._part_open = True
+            self._write_row(row)
+            self.parts[-1].rows += 1
+            self.total_rows += 1
+            if self._part_is_full():
+                self._close_part()
+                self._part_open = False
+
+    def close(self) -> List[ExportPart]:
+        if not self._closed:
+            if not self.parts:
+                self._open_part()
+                self._part_open = True
+            if self._part_open:
+                self._close_part()
+                self._part_open = False
+            self._closed = True
+            total = len(self.parts)
+            for index, part in enumerate(self.parts, start=1):
+                suffix = f"_part{index}of{total}" if total > 1 else ""
+                part.filename = f"{self.filename_prefix}{suffix}{self.extension}"
+        return self.parts
+
+    def cleanup(self) -> None:
+        if self._part_open:
+            try:
+                self._close_part()
+            except Exception:
+                pass
+            self._part_open = False
+        for part in self.parts:
+            try:
+                os.remove(part.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Failed to remove export file {part.path}: {e}")
+
+
+class CsvPartWriter(ExportPartWriter):
+    """CSV rows written into plain parts."""
+
+    extension = ".csv"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._raw_file = None
+        self._text_stream: Optional[io.TextIOWrapper] = None
+        self._csv_writer = None
+
+    def _wrap(self, raw_file):
+        return raw_file
+
+    def _open_part(self) -> None:
+        path = self._new_part_path()
+        self._raw_file = open(path, "wb")
+        # BOM keeps Excel happy (once a compressed part is unpacked)
+        self._text_stream = io.TextIOWrapper(self._wrap(self._raw_file),
+                                             encoding="utf-8-sig",
+                                             newline="")
+        self._csv_writer = csv.writer(self._text_stream,
+                                      delimiter=',',
+                                      quotechar='"',
+                                      quoting=csv.QUOTE_MINIMAL)
+        self._csv_writer.writerow(self.header)
+
+    def _write_row(self, row: Sequence[Any]) -> None:
+        self._csv_writer.writerow([
+            value.strftime('%Y-%m-%d %H:%M:%S')
+            if isinstance(value, datetime) else value for value in row
+        ])
+
+    def _current_part_bytes(self) -> int:
+        # Only bytes already flushed by the text (and zlib) buffers are
+        # visible here, which lags by a few KB at most.
+        return self._raw_file.tell()
+
+    def _close_part(self) -> None:
+        self._text_stream.close()  # closes the wrapped streams as well
+        self._raw_file.close()
+        self._text_stream = None
+        self._raw_file = None
+        self._csv_writer = None
+
+
+class GzipCsvPartWriter(CsvPartWriter):
+    """CSV rows written into gzip-compressed parts."""
+
+    extension = ".csv.gz"
+
+    def _wrap(self, raw_file):
+        return gzip.GzipFile(fileobj=raw_file, mode="wb")
+
+
+class XlsxPartWriter(ExportPartWriter):
+    """Rows written into XLSX parts using openpyxl's streaming write-only mode."""
+
+    extension = ".xlsx"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_part_rows", XLSX_MAX_ROWS_PER_PART)
+        super().__init__(*args, **kwargs)
+        from openpyxl import Workbook
+
+        self._workbook_cls = Workbook
+        self._workbook = None
+        self._sheet = None
+
+    def _open_part(self) -> None:
+        self._new_part_path()
+        self._workbook = self._workbook_cls(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(self.header)
+
+    def _write_row(self, row: Sequence[Any]) -> None:
+        # Excel cannot store timezone-aware datetimes
+        self._sheet.append([
+            value.astimezone(timezone.utc).replace(tzinfo=None)
+            if isinstance(value, datetime) and value.tzinfo else value
+            for value in row
+        ])
+
+    def _close_part(self) -> None:
+        self._workbook.save(self.parts[-1].path)
+        self._workbook = None
+        self._sheet = None
+
+
+class ParquetPartWriter(ExportPartWriter):
+    """
+    Rows written into Parquet parts, one row group per ``row_group_size`` rows.
+    Column types come from ``column_types`` or, without it, are inferred from
+    the first row group.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, *args, row_group_size: int = 10_000, **kwargs):
+        super().__init__(*args, **kwargs)
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self._schema = None
+        self._writer = None
+        self._buffer: List[Sequence[Any]] = []
+
+    def _arrow_type(self, python_type: Optional[type]):
+        # bool before int: bool is a subclass of int
+        if python_type is not None and issubclass(python_type, bool):
+            return self._pa.bool_()
+        if python_type is not None and issubclass(python_type, int):
+            return self._pa.int64()
+        if python_type is not None and issubclass(python_type, float):
+            return self._pa.float64()
+        if python_type is not None and issubclass(python_type, datetime):
+            return self._pa.timestamp("us", tz="UTC")
+        return self._pa.string()
+
+    def _infer_schema(self):
+        fields = []
+        for index, name in enumerate(self.header):
+            if self.column_types is not None:
+                python_type = self.column_types[index]
+            else:
+                sample = next((row[index] for row in self._buffer
+                               if row[index] is not None), None)
+                python_type = type(sample) if sample is not None else None
+            fields.append(self._pa.field(str(name), self._arrow_type(python_type)))
+        return self._pa.schema(fields)
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._schema is None:
+            self._schema = self._infer_schema()
+        columns = {
+            field.name: [row[index] for row in self._buffer]
+            for index, field in enumerate(self._schema)
+        }
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.parts[-1].path,
+                                                  self._schema,
+                                                  compression="zstd")
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _open_part(self) -> None:
+        self._new_part_path()
+
+    def _write_row(self, row: Sequence[Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _current_part_bytes(self) -> int:
+        try:
+            return os.path.getsize(self.parts[-1].path)
+        except OSError:
+            return 0
+
+    def _close_part(self) -> None:
+        self._flush()
+        if self._writer is None:
+            # Empty export: still produce a valid file with the header columns
+            self._schema = self._schema or self._pa.schema(
+                [self._pa.field(str(name), self._pa.string()) for name in self.header])
+            self._writer = self._pq.ParquetWriter(self.parts[-1].path,
+                                                  self._schema)
+        self._writer.close()
+        self._writer = None
+
+
+_WRITERS = {
+    EXPORT_FORMAT_CSV: GzipCsvPartWriter,
+    EXPORT_FORMAT_XLSX: XlsxPartWriter,
+    EXPORT_FORMAT_PARQUET: ParquetPartWriter,
+}
+
+
+def available_export_formats() -> List[str]:
+    """CSV is always available; XLSX and Parquet need openpyxl / pyarrow."""
+    formats = [EXPORT_FORMAT_CSV]
+    for export_format, module_name in _OPTIONAL_FORMAT_MODULES.items():
+        if importlib.util.find_spec(module_name) is not None:
+            formats.append(export_format)
+    return formats
+
+
+def create_export_writer(export_format: str, filename_prefix: str,
+                         header: Sequence[Any],
+                         column_types: Optional[Sequence[type]] = None) -> ExportPartWriter:
+    writer_cls = _WRITERS.get(export_format)
+    if writer_cls is None:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    return writer_cls(filename_prefix=filename_prefix, header=header,
+                      column_types=column_types)
+
+
+def parse_export_filters(
+    text: str
+) -> Optional[Tuple[Optional[datetime], Optional[datetime], List[str]]]:
+    """
+    Parse "FROM TO [VALUE ...]" where dates are YYYY-MM-DD (UTC) and "-"
+    leaves a bound open. TO is inclusive, so the returned upper bound is the
+    start of the following day. Remaining tokens are returned as-is.
+    """
+    tokens = text.split()
+    if len(tokens) < 2:
+        return None
+
+    bounds: List[Optional[datetime]] = []
+    for token in tokens[:2]:
+        if token == "-":
+            bounds.append(None)
+            continue
+        try:
+            bounds.append(
+                datetime.strptime(token, "%Y-%m-%d").replace(tzinfo=timezone.utc))
+        except ValueError:
+            return None
+
+    date_from, date_to = bounds
+    if date_to is not None:
+        date_to += timedelta(days=1)
+    if date_from and date_to and date_from >= date_to:
+        return None
+    return date_from, date_to, tokens[2:]
@@ -0,0 +1,173 @@
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from importlib.util import find_spec
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from pydantic import BaseModel
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import Settings
+from db.dal import fsm_dal
+from bot.utils.background_tasks import run_in_background
+
+FSM_STORAGE_MEMORY = "memory"
+FSM_STORAGE_POSTGRES = "postgres"
+FSM_STORAGE_REDIS = "redis"
+
+# How often PostgresStorage deletes expired records (piggybacks on writes)
+FSM_PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+def _json_default(value: Any) -> Any:
+    # Telegram objects (e.g. message entities of a broadcast draft) are stored
+    # as plain dicts; aiogram validates them back when they are sent.
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"FSM data value of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_fsm_data(data: Mapping[str, Any]) -> str:
+    """Compact JSON: no whitespace, non-ASCII text kept as is."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False,
+                      default=_json_default)
+
+
+def loads_fsm_data(raw: str) -> Dict[str, Any]:
+    return json.loads(raw)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage in the ``fsm_storage`` table of the bot database, shared by
+    every bot instance. State and data of a chat/user share one row; with
+    ``ttl_seconds`` > 0 a row expires that long after its last write.
+    """
+
+    def __init__(self, async_session_factory: sessionmaker, ttl_seconds: int = 0,
+                 key_builder: Optional[KeyBuilder] = None):
+        self.async_session_factory = async_session_factory
+        self.ttl_seconds = max(ttl_seconds, 0)
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True)
+        self._last_purge = time.monotonic()
+
+    def _expires_at(self, now: datetime) -> Optional[datetime]:
+        if self.ttl_seconds <= 0:
+            return None
+        return now + timedelta(seconds=self.ttl_seconds)
+
+    async def _write(self, key: StorageKey, values: Dict[str, Any]) -> None:
+        storage_key = self.key_builder.build(key)
+        now = datetime.now(timezone.utc)
+        async with self.async_session_factory() as session:
+            try:
+                await fsm_dal.upsert_fsm_record(session, storage_key, values,
+                                                now, self._expires_at(now))
+                if any(value is None for value in values.values()):
+                    await fsm_dal.delete_empty_fsm_record(session, storage_key)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        self._maybe_purge()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state_value = state.state if isinstance(state, State) else state
+        await self._write(key, {"state": state_value})
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with self.async_session_factory() as session:
+            return await fsm_dal.get_fsm_state(
+                session, self.key_builder.build(key), datetime.now(timezone.utc))
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        await self._write(key, {"data": dumps_fsm_data(data) if data else None})
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with self.async_session_factory() as session:
+            raw = await fsm_dal.get_fsm_data(
+                session, self.key_builder.build(key), datetime.now(timezone.utc))
+        return loads_fsm_data(raw) if raw else {}
+
+    def _maybe_purge(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        if time.monotonic() - self._last_purge < FSM_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        run_in_background(self.purge_expired(), name="FsmStoragePurge")
+
+    async def purge_expired(self) -> int:
+        async with self.async_session_factory() as session:
+            try:
+                deleted = await fsm_dal.delete_expired_fsm_records(
+                    session, datetime.now(timezone.utc))
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        if deleted:
+            logging.info(f"FSM storage: deleted {deleted} expired record(s).")
+        return deleted
+
+    async def close(self) -> None:
+        # The engine is shared with the rest of the bot and disposed separately
+        pass
+
+
+def redis_storage_available() -> bool:
+    return find_spec("redis") is not None
+
+
+def _build_redis_storage(settings: Settings) -> Optional[BaseStorage]:
+    if not settings.FSM_REDIS_URL:
+        logging.critical("FSM_STORAGE=redis requires FSM_REDIS_URL; using in-memory FSM storage.")
+        return None
+    if not redis_storage_available():
+        logging.critical(
+            "FSM_STORAGE=redis but the 'redis' package is not installed "
+            "(pip install redis); using in-memory FSM storage.")
+        return None
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    ttl = settings.FSM_STATE_TTL_SECONDS or None
+    return RedisStorage.from_url(
+        settings.FSM_REDIS_URL,
+        key_builder=DefaultKeyBuilder(with_bot_id=True),
+        state_ttl=ttl,
+        data_ttl=ttl,
+        json_dumps=dumps_fsm_data,
+        json_loads=loads_fsm_data,
+    )
+
+
+def build_fsm_storage(settings: Settings, async_session_factory: sessionmaker) -> BaseStorage:
+    """
+    The FSM storage selected by ``FSM_STORAGE``. Only the postgres and redis
+    backends let several bot instances serve the same users and keep
+    in-progress flows across restarts.
+    """
+    backend = (settings.FSM_STORAGE or FSM_STORAGE_MEMORY).strip().lower()
+    storage: Optional[BaseStorage] = None
+    if backend == FSM_STORAGE_POSTGRES:
+        storage = PostgresStorage(async_session_factory, settings.FSM_STATE_TTL_SECONDS)
+    elif backend == FSM_STORAGE_REDIS:
+        storage = _build_redis_storage(settings)
+    elif backend != FSM_STORAGE_MEMORY:
+        logging.critical(f"Unknown FSM_STORAGE '{settings.FSM_STORAGE}'; using in-memory FSM storage.")
+
+    if storage is None:
+        backend = FSM_STORAGE_MEMORY
+        storage = MemoryStorage()
+    logging.info(f"FSM storage: {backend}")
+    return storage
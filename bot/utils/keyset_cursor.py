@@ -0,0 +1,110 @@
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from db.dal.pagination import KeysetKey, KeysetPage, RowCount
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# "<page>" or "<page><n|p><timestamp>_<id>"; contains no ":" so it fits into
+# the page slot of existing callback data formats.
+_PAGE_REF_REGEX = re.compile(r"^(\d+)(?:([np])([0-9a-z]+)_([0-9a-z]+))?$")
+
+DIRECTION_AFTER = "n"
+DIRECTION_BEFORE = "p"
+
+
+def _to_base36(value: int) -> str:
+    if value == 0:
+        return "0"
+    digits = []
+    while value:
+        value, remainder = divmod(value, 36)
+        digits.append(_BASE36_DIGITS[remainder])
+    return "".join(reversed(digits))
+
+
+@dataclass(frozen=True)
+class PageRef:
+    """
+    Position in a keyset-paginated list as carried in callback data: the page
+    number (for display only) and the key the page starts after or before.
+    """
+
+    page: int = 0
+    direction: Optional[str] = None
+    key: Optional[KeysetKey] = None
+
+    @property
+    def after(self) -> Optional[KeysetKey]:
+        return self.key if self.direction == DIRECTION_AFTER else None
+
+    @property
+    def before(self) -> Optional[KeysetKey]:
+        return self.key if self.direction == DIRECTION_BEFORE else None
+
+    def encode(self) -> str:
+        if self.key is None or self.direction is None:
+            return str(self.page)
+        timestamp, row_id = self.key
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        micros = (timestamp - _EPOCH) // timedelta(microseconds=1)
+        return f"{self.page}{self.direction}{_to_base36(micros)}_{_to_base36(row_id)}"
+
+
+def parse_page_ref(value: Optional[str]) -> PageRef:
+    """Decode a page reference; anything unreadable points at the first page."""
+    match = _PAGE_REF_REGEX.match(value or "")
+    if not match:
+        return PageRef()
+    page_str, direction, micros_str, row_id_str = match.groups()
+    if direction is None:
+        # A bare page number without a key (e.g. from an old message) cannot
+        # be resolved without OFFSET, so start over from the top.
+        return PageRef()
+    timestamp = _EPOCH + timedelta(microseconds=int(micros_str, 36))
+    return PageRef(page=int(page_str),
+                   direction=direction,
+                   key=(timestamp, int(row_id_str, 36)))
+
+
+def current_page_index(ref: PageRef, page: KeysetPage) -> int:
+    """Page number to show; a backwards page that reached the top is page 0."""
+    return ref.page if page.has_prev else 0
+
+
+def next_page_ref(ref: PageRef, page: KeysetPage) -> Optional[PageRef]:
+    if not page.has_next or page.last_key is None:
+        return None
+    return PageRef(page=current_page_index(ref, page) + 1,
+                   direction=DIRECTION_AFTER,
+                   key=page.last_key)
+
+
+def prev_page_ref(ref: PageRef, page: KeysetPage) -> Optional[PageRef]:
+    if not page.has_prev or page.first_key is None:
+        return None
+    page_index = current_page_index(ref, page)
+    if page_index <= 1:
+        return PageRef()
+    return PageRef(page=page_index - 1,
+                   direction=DIRECTION_BEFORE,
+                   key=page.first_key)
+
+
+def format_total_pages(count: RowCount, page_size: int, ref: PageRef,
+                       page: KeysetPage) -> str:
+    """Total page count for headers, prefixed with "~" when estimated."""
+    total_pages = max(1, math.ceil(count.value / max(page_size, 1)))
+    # Estimates can lag behind; never show fewer pages than we can reach.
+    page_index = current_page_index(ref, page)
+    total_pages = max(total_pages, page_index + (2 if page.has_next else 1))
+    return f"~{total_pages}" if count.is_estimate else str(total_pages)
+
+
+def format_count(count: RowCount) -> str:
+    return f"~{count.value}" if count.is_estimate else str(count.value)
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import Settings
+from db.dal import message_log_dal
+
+MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS = 24 * 60 * 60
+MESSAGE_LOG_PARTITIONS_AHEAD_MONTHS = 2
+
+
+async def run_message_log_maintenance(async_session_factory: sessionmaker,
+                                      settings: Settings) -> None:
+    """Create upcoming monthly partitions of message_logs and apply retention."""
+    async with async_session_factory() as session:
+        try:
+            created = await message_log_dal.ensure_message_log_partitions(
+                session, MESSAGE_LOG_PARTITIONS_AHEAD_MONTHS)
+            dropped = await message_log_dal.drop_expired_message_log_partitions(
+                session, settings.MESSAGE_LOGS_RETENTION_MONTHS)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    if created:
+        logging.info(f"message_logs: created partitions {', '.join(created)}")
+    if dropped:
+        logging.info(
+            f"message_logs: dropped partitions past retention {', '.join(dropped)}"
+        )
+
+
+async def message_log_maintenance_loop(async_session_factory: sessionmaker,
+                                       settings: Settings) -> None:
+    while True:
+        try:
+            await run_message_log_maintenance(async_session_factory, settings)
+        except Exception as e:
+            logging.error(f"message_logs maintenance failed: {e}", exc_info=True)
+        await asyncio.sleep(MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS)
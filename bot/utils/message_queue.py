@@ -6,11 +6,13 @@ from datetime import datetime, timedelta
 from collections import deque
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
+from sqlalchemy.orm import sessionmaker
 
 from bot.utils.telegram_markup import (
     is_profile_link_error,
     remove_profile_link_buttons,
 )
+from bot.utils.shared_rate_limit import DEFAULT_LEASE_SIZE, SharedRateLimiter
 
 
 @dataclass
@@ -25,9 +27,12 @@ class QueuedMessage:
 class MessageQueue:
     """Message queue with rate limiting for Telegram API"""
     
-    def __init__(self, messages_per_second: float, burst_size: int = 5):
+    def __init__(self, messages_per_second: float, burst_size: int = 5,
+                 shared_limiter: Optional[SharedRateLimiter] = None):
         self.messages_per_second = messages_per_second
         self.burst_size = burst_size
+        # Quota shared with the other bot instances, on top of the local pacing
+        self.shared_limiter = shared_limiter
         self.queue: deque[QueuedMessage] = deque()
         self.last_send_times: deque[datetime] = deque()
         self.is_processing = False
@@ -51,7 +56,7 @@ class MessageQueue:
         try:
             while self.queue:
                 # Check if we need to wait
-                await self._wait_if_needed()
+                await self._acquire_send_slot()
                 
                 # Get and process next message
                 message = self.queue.popleft()
@@ -69,6 +74,7 @@ class MessageQueue:
                             getattr(exc, "message", "") or str(exc),
                         )
                         try:
+                            await self._acquire_send_slot()
                             await self._send_message(fallback_message)
                             self._record_send_time()
                             continue
@@ -101,6 +107,11 @@ class MessageQueue:
             wait_time = self.delay_between_messages - time_since_last
             await asyncio.sleep(wait_time)
 
+    async def _acquire_send_slot(self) -> None:
+        await self._wait_if_needed()
+        if self.shared_limiter is not None:
+            await self.shared_limiter.acquire()
+
     def _record_send_time(self) -> None:
         """Track sent message timestamps and purge old entries for rate limiting."""
         now = datetime.now()
@@ -141,8 +152,9 @@ class MessageQueue:
 class TelegramMessageQueue(MessageQueue):
     """Telegram-specific message queue"""
     
-    def __init__(self, bot: Bot, messages_per_second: float, burst_size: int = 5):
-        super().__init__(messages_per_second, burst_size)
+    def __init__(self, bot: Bot, messages_per_second: float, burst_size: int = 5,
+                 shared_limiter: Optional[SharedRateLimiter] = None):
+        super().__init__(messages_per_second, burst_size, shared_limiter)
         self.bot = bot
     
     async def _send_message(self, message: QueuedMessage) -> Any:
@@ -160,20 +172,35 @@ class TelegramMessageQueue(MessageQueue):
 class MessageQueueManager:
     """Manager for different types of message queues"""
     
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot,
+                 shared_quota_session_factory: Optional[sessionmaker] = None,
+                 shared_quota_lease_size: int = DEFAULT_LEASE_SIZE):
         self.bot = bot
+
+        # With a session factory, the limits below hold for all bot instances
+        # together rather than for each process
+        group_limiter = user_limiter = None
+        if shared_quota_session_factory is not None:
+            group_limiter = SharedRateLimiter(
+                shared_quota_session_factory, "group", limit=15,
+                window_seconds=60, lease_size=1)
+            user_limiter = SharedRateLimiter(
+                shared_quota_session_factory, "user", limit=25,
+                window_seconds=1, lease_size=shared_quota_lease_size)
         
         # Different queues for different types of chats
         self.group_queue = TelegramMessageQueue(
             bot=bot,
             messages_per_second=15/60,  # 15 messages per minute for groups
-            burst_size=3
+            burst_size=3,
+            shared_limiter=group_limiter,
         )
         
         self.user_queue = TelegramMessageQueue(
             bot=bot, 
             messages_per_second=25,  # 25 messages per second for users
-            burst_size=10
+            burst_size=10,
+            shared_limiter=user_limiter,
         )
     
     def _is_group_chat(self, chat_id: int) -> bool:
@@ -297,6 +324,10 @@ class MessageQueueManager:
             "user_failed_messages": self.user_queue.total_failed,
             "group_sent_messages": self.group_queue.total_sent,
             "user_sent_messages": self.user_queue.total_sent,
+            "group_shared_quota": (self.group_queue.shared_limiter.get_stats()
+                                   if self.group_queue.shared_limiter else None),
+            "user_shared_quota": (self.user_queue.shared_limiter.get_stats()
+                                  if self.user_queue.shared_limiter else None),
         }
 
 
@@ -304,10 +335,13 @@ class MessageQueueManager:
 _queue_manager: Optional[MessageQueueManager] = None
 
 
-def init_queue_manager(bot: Bot) -> MessageQueueManager:
+def init_queue_manager(bot: Bot,
+                       shared_quota_session_factory: Optional[sessionmaker] = None,
+                       shared_quota_lease_size: int = DEFAULT_LEASE_SIZE) -> MessageQueueManager:
     """Initialize global queue manager"""
     global _queue_manager
-    _queue_manager = MessageQueueManager(bot)
+    _queue_manager = MessageQueueManager(bot, shared_quota_session_factory,
+                                         shared_quota_lease_size)
     return _queue_manager
 
 
@@ -0,0 +1,69 @@
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+# (labels, value)
+MetricSample = Tuple[Dict[str, str], float]
+
+
+@dataclass
+class Metric:
+    name: str
+    kind: str  # "counter" or "gauge"
+    help: str
+    samples: List[MetricSample] = field(default_factory=list)
+
+
+# Collectors are called on every scrape and return the current values
+MetricsCollector = Callable[[], List[Metric]]
+
+_collectors: Dict[str, MetricsCollector] = {}
+
+
+def register_metrics_collector(name: str, collector: MetricsCollector) -> None:
+    """Add (or replace) a named source of metrics for the /metrics endpoint."""
+    _collectors[name] = collector
+
+
+def unregister_metrics_collector(name: str) -> None:
+    _collectors.pop(name, None)
+
+
+def collect_metrics() -> List[Metric]:
+    metrics: List[Metric] = []
+    for name, collector in list(_collectors.items()):
+        try:
+            metrics.extend(collector())
+        except Exception as e:
+            logging.error(f"Metrics collector '{name}' failed: {e}", exc_info=True)
+    return metrics
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(metrics: List[Metric]) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in metric.samples:
+            if labels:
+                label_str = ",".join(
+                    f'{key}="{_escape_label_value(str(label_value))}"'
+                    for key, label_value in labels.items())
+                lines.append(f"{metric.name}{{{label_str}}} {_format_value(value)}")
+            else:
+                lines.append(f"{metric.name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
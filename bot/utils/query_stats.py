@@ -0,0 +1,233 @@
+import contextvars
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot.utils.metrics import Metric, register_metrics_collector
+
+# Distinct repeated shapes remembered per handler for the JSON metrics view
+MAX_TRACKED_SHAPES_PER_HANDLER = 20
+SHAPE_PREVIEW_LENGTH = 300
+
+_current_stats: contextvars.ContextVar[Optional["UpdateQueryStats"]] = (
+    contextvars.ContextVar("update_query_stats", default=None))
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+_BIND_PARAM_REGEX = re.compile(r"\$\d+|%\(\w+\)s|:\w+\b|\?")
+_STRING_LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_REGEX = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_PARAM_LIST_REGEX = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """
+    SQL with literals and bind parameters replaced by ``?`` and IN lists
+    collapsed, so the same query issued for different rows has one shape.
+    """
+    shape = _STRING_LITERAL_REGEX.sub("?", statement)
+    shape = _BIND_PARAM_REGEX.sub("?", shape)
+    shape = _NUMBER_LITERAL_REGEX.sub("?", shape)
+    shape = _PARAM_LIST_REGEX.sub("?", shape)
+    return _WHITESPACE_REGEX.sub(" ", shape).strip()
+
+
+@dataclass
+class UpdateQueryStats:
+    """SQL activity of one update; filled by the engine listeners."""
+
+    handler: str
+    statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    # Set by DBSessionMiddleware when the update's session is done
+    used_connection: bool = False
+    committed: bool = False
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def record_pool_wait(self, seconds: float) -> None:
+        self.pool_wait_seconds += seconds
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        if threshold <= 0:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count >= threshold]
+
+
+@dataclass
+class HandlerQueryAggregate:
+    updates: int = 0
+    statements: int = 0
+    db_seconds: float = 0.0
+    max_statements: int = 0
+    max_db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    max_pool_wait_seconds: float = 0.0
+    connection_updates: int = 0
+    commits: int = 0
+    threshold_exceeded: int = 0
+    repeated_statement_updates: int = 0
+    repeated_shapes: Counter = field(default_factory=Counter)
+
+
+_aggregates: Dict[str, HandlerQueryAggregate] = {}
+
+
+def begin_update_stats(handler: str) -> Tuple[UpdateQueryStats, contextvars.Token]:
+    stats = UpdateQueryStats(handler=handler)
+    return stats, _current_stats.set(stats)
+
+
+def end_update_stats(token: contextvars.Token) -> None:
+    _current_stats.reset(token)
+
+
+def current_update_stats() -> Optional[UpdateQueryStats]:
+    return _current_stats.get()
+
+
+def aggregate_update_stats(stats: UpdateQueryStats,
+                           threshold_exceeded: bool,
+                           repeated: List[Tuple[str, int]]) -> None:
+    aggregate = _aggregates.setdefault(stats.handler, HandlerQueryAggregate())
+    aggregate.updates += 1
+    aggregate.statements += stats.statements
+    aggregate.db_seconds += stats.db_seconds
+    aggregate.max_statements = max(aggregate.max_statements, stats.statements)
+    aggregate.max_db_seconds = max(aggregate.max_db_seconds, stats.db_seconds)
+    aggregate.pool_wait_seconds += stats.pool_wait_seconds
+    aggregate.connection_updates += int(stats.used_connection)
+    aggregate.commits += int(stats.committed)
+    aggregate.max_pool_wait_seconds = max(aggregate.max_pool_wait_seconds,
+                                          stats.pool_wait_seconds)
+    if threshold_exceeded:
+        aggregate.threshold_exceeded += 1
+    if repeated:
+        aggregate.repeated_statement_updates += 1
+        for shape, count in repeated:
+            if (shape in aggregate.repeated_shapes
+                    or len(aggregate.repeated_shapes) < MAX_TRACKED_SHAPES_PER_HANDLER):
+                aggregate.repeated_shapes[shape] = max(
+                    aggregate.repeated_shapes[shape], count)
+
+
+def query_stats_snapshot() -> Dict[str, dict]:
+    """Per-handler aggregates including the worst repeated statements (for JSON output)."""
+    return {
+        handler: {
+            "updates": aggregate.updates,
+            "statements": aggregate.statements,
+            "db_seconds": round(aggregate.db_seconds, 6),
+            "max_statements": aggregate.max_statements,
+            "max_db_seconds": round(aggregate.max_db_seconds, 6),
+            "pool_wait_seconds": round(aggregate.pool_wait_seconds, 6),
+            "max_pool_wait_seconds": round(aggregate.max_pool_wait_seconds, 6),
+            "connection_updates": aggregate.connection_updates,
+            "commits": aggregate.commits,
+            "threshold_exceeded": aggregate.threshold_exceeded,
+            "repeated_statement_updates": aggregate.repeated_statement_updates,
+            "repeated_shapes": [{
+                "shape": shape[:SHAPE_PREVIEW_LENGTH],
+                "max_count": count
+            } for shape, count in aggregate.repeated_shapes.most_common()],
+        }
+        for handler, aggregate in sorted(_aggregates.items())
+    }
+
+
+def _collect_query_metrics() -> List[Metric]:
+    per_handler = sorted(_aggregates.items())
+
+    def samples(attribute: str):
+        return [({
+            "handler": handler
+        }, getattr(aggregate, attribute)) for handler, aggregate in per_handler]
+
+    return [
+        Metric("bot_updates_total", "counter",
+               "Updates handled, by handler", samples("updates")),
+        Metric("bot_update_db_statements_total", "counter",
+               "SQL statements run while handling updates",
+               samples("statements")),
+        Metric("bot_update_db_seconds_total", "counter",
+               "Time spent in SQL statements while handling updates",
+               samples("db_seconds")),
+        Metric("bot_update_db_statements_max", "gauge",
+               "Most SQL statements run by a single update",
+               samples("max_statements")),
+        Metric("bot_update_db_seconds_max", "gauge",
+               "Longest total SQL time of a single update",
+               samples("max_db_seconds")),
+        Metric("bot_update_db_pool_wait_seconds_total", "counter",
+               "Time spent waiting for a database connection while handling updates",
+               samples("pool_wait_seconds")),
+        Metric("bot_update_db_pool_wait_seconds_max", "gauge",
+               "Longest total connection wait of a single update",
+               samples("max_pool_wait_seconds")),
+        Metric("bot_update_db_connection_used_total", "counter",
+               "Updates that checked out a database connection",
+               samples("connection_updates")),
+        Metric("bot_update_db_commits_total", "counter",
+               "Updates whose session had writes to commit",
+               samples("commits")),
+        Metric("bot_update_db_threshold_exceeded_total", "counter",
+               "Updates over the statement count or DB time threshold",
+               samples("threshold_exceeded")),
+        Metric("bot_update_db_repeated_statements_total", "counter",
+               "Updates that repeated one statement shape (likely N+1)",
+               samples("repeated_statement_updates")),
+    ]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_stats_started_at", []).append(
+            time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started_stack = conn.info.get("query_stats_started_at")
+    if not started_stack:
+        return
+    stats.record(statement, time.perf_counter() - started_stack.pop())
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not fire for failed statements
+    connection = exception_context.connection
+    if connection is not None:
+        started_stack = connection.info.get("query_stats_started_at")
+        if started_stack:
+            started_stack.pop()
+
+
+def install_query_stats(engine: AsyncEngine) -> None:
+    """
+    Attach the per-update statement listeners to ``engine`` and publish the
+    aggregates as metrics. Statements outside an update scope (startup,
+    background jobs) are ignored.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute",
+                          _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+    register_metrics_collector("query_stats", _collect_query_metrics)
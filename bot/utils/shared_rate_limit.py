@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy.orm import sessionmaker
+
+from db.dal import rate_quota_dal
+
+DEFAULT_LEASE_SIZE = 5
+# Windows kept in telegram_rate_quota before they are deleted
+QUOTA_WINDOWS_RETAINED = 10
+QUOTA_CLEANUP_INTERVAL_SECONDS = 60
+# How long to send with local limits only after the database failed
+QUOTA_FAILURE_BACKOFF_SECONDS = 5
+
+
+class SharedRateLimiter:
+    """
+    Send quota shared by every bot instance through the ``telegram_rate_quota``
+    table: at most ``limit`` sends per ``window_seconds`` across the cluster.
+
+    Instances lease the quota in blocks of ``lease_size`` sends. A lease is
+    only valid until its window ends, so quota leased by an instance that
+    died is simply gone with the window. If the database is unavailable the
+    caller's own (per-process) limits keep applying.
+    """
+
+    def __init__(self, async_session_factory: sessionmaker, bucket: str,
+                 limit: int, window_seconds: float,
+                 lease_size: int = DEFAULT_LEASE_SIZE):
+        self.async_session_factory = async_session_factory
+        self.bucket = bucket
+        self.limit = max(int(limit), 1)
+        self.window_seconds = window_seconds
+        self.lease_size = max(1, min(lease_size, self.limit))
+        self._tokens = 0
+        self._lease_expires = 0.0
+        self._lock = asyncio.Lock()
+        self._last_cleanup = 0.0
+        self._failed_until = 0.0
+        self.leases = 0
+        self.leased_sends = 0
+        self.waits = 0
+        self.failures = 0
+
+    async def acquire(self) -> None:
+        """Wait until this instance may make one more send."""
+        while True:
+            if self._take_token():
+                return
+            async with self._lock:
+                if self._take_token():
+                    return
+                if time.monotonic() < self._failed_until:
+                    return
+                wait_seconds = await self._lease()
+            if wait_seconds > 0:
+                self.waits += 1
+                await asyncio.sleep(wait_seconds)
+
+    def _take_token(self) -> bool:
+        if self._tokens > 0 and time.monotonic() < self._lease_expires:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def _lease(self) -> float:
+        """Lease a block; returns how long to wait before trying again (0 = leased)."""
+        try:
+            async with self.async_session_factory() as session:
+                lease = await rate_quota_dal.lease_quota(
+                    session, self.bucket, self.limit, self.window_seconds,
+                    self.lease_size)
+                if lease is not None:
+                    await self._cleanup(session, lease[0])
+                await session.commit()
+        except Exception as e:
+            self.failures += 1
+            self._failed_until = time.monotonic() + QUOTA_FAILURE_BACKOFF_SECONDS
+            logging.warning(
+                f"Shared rate limit '{self.bucket}': failed to lease quota, "
+                f"using local limits for {QUOTA_FAILURE_BACKOFF_SECONDS}s: {e}")
+            return 0.0
+
+        if lease is None:
+            # Window used up by the cluster; its end is at most one window away
+            return max(self.window_seconds - (time.time() % self.window_seconds), 0.01)
+        _, leased, seconds_left = lease
+        self._tokens = leased
+        self._lease_expires = time.monotonic() + max(seconds_left, 0.0)
+        self.leases += 1
+        self.leased_sends += leased
+        return 0.0
+
+    async def _cleanup(self, session, window_id: int) -> None:
+        now = time.monotonic()
+        if now - self._last_cleanup < QUOTA_CLEANUP_INTERVAL_SECONDS:
+            return
+        self._last_cleanup = now
+        await rate_quota_dal.delete_quota_windows_before(
+            session, self.bucket, window_id - QUOTA_WINDOWS_RETAINED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "leases": self.leases,
+            "leased_sends": self.leased_sends,
+            "waits": self.waits,
+            "failures": self.failures,
+            "tokens": self._tokens,
+        }
+
@@ -1,7 +1,11 @@
 import re
 import unicodedata
+from functools import lru_cache
 from typing import Optional
 
+# Distinct raw names remembered per sanitizer; profiles repeat on every update
+SANITIZE_CACHE_SIZE = 8192
+
 _OBFUSCATION_CHARS = " .\\-/\\\\•﹒٫＿․·∙‧ꞏ‒–—﹘﹣⁻−"
 
 _URL_PATTERNS = [
@@ -145,51 +149,72 @@ _NORMALIZED_BANNED_TOKENS = {
 
 _USERNAME_PLACEHOLDER = "клиент"
 
+_REMOVAL_PATTERNS = (
+    _URL_PATTERNS
+    + _OBFUSCATED_DOMAIN_PATTERNS
+    + _ENGLISH_SERVICE_PATTERNS
+    + _RUSSIAN_SERVICE_PATTERNS
+)
+
+# Every removal pattern as one alternation. It cannot replace the ordered
+# substitutions (greedy patterns overlap, so the order changes the result),
+# but one scan tells whether any of them applies, and most names match none.
+_ANY_REMOVAL_REGEX = re.compile("|".join(
+    f"(?:{pattern.pattern})" for pattern in _REMOVAL_PATTERNS
+).replace("(?i)", ""), re.IGNORECASE)
+
+# Longest first, although any match rejects the value
+_BANNED_TOKEN_REGEX = re.compile("|".join(
+    re.escape(token)
+    for token in sorted(_NORMALIZED_BANNED_TOKENS, key=len, reverse=True)))
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+# Also covers the obfuscation characters and whitespace
+_NON_ALPHANUMERIC_REGEX = re.compile(r"[^a-z0-9]+")
+
 
 def _normalize_for_detection(value: str) -> str:
     if not value:
         return ""
 
-    normalized = unicodedata.normalize("NFKD", value)
-    normalized = normalized.translate(_PRE_LOWER_TRANSLATION)
-    normalized = normalized.lower()
-    normalized = "".join(
-        ch for ch in normalized if unicodedata.category(ch) != "Mn"
-    )
-    normalized = normalized.translate(_POST_LOWER_TRANSLATION)
+    if value.isascii():
+        # NFKD leaves ASCII as is and it has no combining marks to strip
+        normalized = value.translate(_PRE_LOWER_TRANSLATION).lower()
+    else:
+        normalized = unicodedata.normalize("NFKD", value)
+        normalized = normalized.translate(_PRE_LOWER_TRANSLATION)
+        normalized = normalized.lower()
+        normalized = "".join(
+            ch for ch in normalized if unicodedata.category(ch) != "Mn"
+        )
+        normalized = normalized.translate(_POST_LOWER_TRANSLATION)
     normalized = normalized.replace("rn", "m")
-
-    pattern = rf"[{re.escape(_OBFUSCATION_CHARS)}\s]+"
-    normalized = re.sub(pattern, "", normalized)
-    normalized = re.sub(r"[^a-z0-9]+", "", normalized)
-    return normalized
+    return _NON_ALPHANUMERIC_REGEX.sub("", normalized)
 
 
 def _remove_patterns(value: str) -> str:
+    if _ANY_REMOVAL_REGEX.search(value) is None:
+        return value
     updated = value
-    for pattern in (
-        _URL_PATTERNS
-        + _OBFUSCATED_DOMAIN_PATTERNS
-        + _ENGLISH_SERVICE_PATTERNS
-        + _RUSSIAN_SERVICE_PATTERNS
-    ):
+    for pattern in _REMOVAL_PATTERNS:
         updated = pattern.sub(" ", updated)
     return updated
 
 
 def _finalize(value: str) -> Optional[str]:
-    compacted = re.sub(r"\s+", " ", value)
+    compacted = _WHITESPACE_REGEX.sub(" ", value)
     compacted = compacted.strip(" \t\r\n-_.,/\\")
     compacted = compacted.strip()
     if not compacted:
         return None
 
     normalized = _normalize_for_detection(compacted)
-    if any(token in normalized for token in _NORMALIZED_BANNED_TOKENS):
+    if _BANNED_TOKEN_REGEX.search(normalized):
         return None
     return compacted
 
 
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
 def sanitize_display_name(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -198,6 +223,7 @@ def sanitize_display_name(value: Optional[str]) -> Optional[str]:
     return _finalize(clean)
 
 
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
 def sanitize_username(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
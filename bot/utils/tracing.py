@@ -0,0 +1,178 @@
+import functools
+import importlib
+import importlib.util
+import inspect
+import logging
+import pkgutil
+from contextlib import nullcontext
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import Settings
+
+TRACING_EXPORTER_CONSOLE = "console"
+TRACING_EXPORTER_OTLP = "otlp"
+
+# Marker set on wrapped callables so instrumenting twice is a no-op
+_TRACED_ATTRIBUTE = "__traced_span_name__"
+
+_NO_SPAN = nullcontext()
+
+_tracer = None
+_tracer_provider = None
+
+
+def tracing_available() -> bool:
+    """Tracing needs opentelemetry-sdk (and the OTLP exporter for ``otlp``)."""
+    # find_spec on a submodule imports the parent package, which may be missing
+    if importlib.util.find_spec("opentelemetry") is None:
+        return False
+    return importlib.util.find_spec("opentelemetry.sdk") is not None
+
+
+def is_tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def _build_exporter(settings: Settings):
+    exporter_name = settings.TRACING_EXPORTER.lower()
+    if exporter_name == TRACING_EXPORTER_OTLP:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        if settings.TRACING_OTLP_ENDPOINT:
+            return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+        # Falls back to OTEL_EXPORTER_OTLP_* environment variables
+        return OTLPSpanExporter()
+    if exporter_name == TRACING_EXPORTER_CONSOLE:
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER '{settings.TRACING_EXPORTER}'")
+
+
+def setup_tracing(settings: Settings) -> bool:
+    """
+    Configure the process tracer from settings. Returns False (and leaves
+    every span helper a no-op) when tracing is disabled or OpenTelemetry is
+    not installed.
+    """
+    global _tracer, _tracer_provider
+    if not settings.TRACING_ENABLED:
+        return False
+    if not tracing_available():
+        logging.warning(
+            "TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing disabled.")
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    try:
+        exporter = _build_exporter(settings)
+    except (ImportError, ValueError) as e:
+        logging.error(f"Tracing disabled, exporter could not be created: {e}")
+        return False
+
+    sample_ratio = min(max(settings.TRACING_SAMPLE_RATIO, 0.0), 1.0)
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer_provider = provider
+    _tracer = provider.get_tracer("remnawave_tg_shop")
+    logging.info(
+        f"Tracing enabled: exporter={settings.TRACING_EXPORTER}, sample ratio={sample_ratio}")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter."""
+    global _tracer, _tracer_provider
+    if _tracer_provider is not None:
+        try:
+            _tracer_provider.shutdown()
+        except Exception as e:
+            logging.warning(f"Failed to shut down tracing: {e}")
+    _tracer = None
+    _tracer_provider = None
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Context manager for a child span of the current one. Without a tracer it
+    returns a shared no-op context, so call sites need no checks.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def current_span():
+    if _tracer is None:
+        return None
+    from opentelemetry import trace
+
+    span = trace.get_current_span()
+    return span if span.is_recording() else None
+
+
+def traced(name: str,
+           attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    Decorator for coroutine functions: runs the call inside a span called
+    ``name``. ``attributes`` receives the call's arguments and returns span
+    attributes; it is evaluated only for sampled spans.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return await func(*args, **kwargs)
+            with _tracer.start_as_current_span(name) as span:
+                if attributes is not None and span.is_recording():
+                    try:
+                        span.set_attributes(attributes(*args, **kwargs))
+                    except Exception:
+                        pass
+                return await func(*args, **kwargs)
+
+        setattr(wrapper, _TRACED_ATTRIBUTE, name)
+        return wrapper
+
+    return decorator
+
+
+def instrument_module(module: ModuleType, prefix: str) -> int:
+    """
+    Replace the coroutine functions defined in ``module`` with traced
+    versions named ``{prefix}.{function}``. Callers that look functions up
+    on the module at call time (``user_dal.get_user_by_id(...)``) are
+    covered; names imported before this ran keep the original.
+    """
+    instrumented = 0
+    for attribute_name, value in list(vars(module).items()):
+        if (attribute_name.startswith("_")
+                or not inspect.iscoroutinefunction(value)
+                or getattr(value, "__module__", None) != module.__name__
+                or hasattr(value, _TRACED_ATTRIBUTE)):
+            continue
+        setattr(module, attribute_name,
+                traced(f"{prefix}.{attribute_name}")(value))
+        instrumented += 1
+    return instrumented
+
+
+def instrument_dal() -> int:
+    """Trace every public coroutine in the ``db.dal`` modules."""
+    import db.dal
+
+    instrumented = 0
+    for module_info in pkgutil.iter_modules(db.dal.__path__):
+        module = importlib.import_module(f"db.dal.{module_info.name}")
+        instrumented += instrument_module(module, f"dal.{module_info.name}")
+    return instrumented
@@ -0,0 +1,77 @@
+"""
+Assign referral codes to every user that has none (accounts created before
+referral codes existed or imported without one). Users are processed in
+chunks, each chunk is a single ``UPDATE`` and is committed on its own, so
+the command can be interrupted and run again at any time:
+
+    python -m db.backfill_referral_codes --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from config.settings import get_settings
+from db import database_setup
+from db.dal import user_dal
+
+# Chunks in a row that assign nothing before giving up
+MAX_IDLE_CHUNKS = 3
+
+
+async def backfill_referral_codes(batch_size: int) -> int:
+    session_factory = database_setup.init_db_connection(get_settings())
+    assigned_total = 0
+    idle_chunks = 0
+    try:
+        while True:
+            async with session_factory() as session:
+                user_ids = await user_dal.get_user_ids_without_referral_code(
+                    session, batch_size)
+                if not user_ids:
+                    break
+                assigned = await user_dal.assign_referral_codes(session, user_ids)
+                await session.commit()
+
+            assigned_total += assigned
+            # Users whose candidate collided are picked up by the next chunk
+            logging.info(f"Referral codes: {assigned}/{len(user_ids)} assigned "
+                         f"in this chunk, {assigned_total} in total.")
+            idle_chunks = 0 if assigned else idle_chunks + 1
+            if idle_chunks >= MAX_IDLE_CHUNKS:
+                logging.error("Referral codes: no progress, stopping.")
+                break
+    finally:
+        await database_setup.async_engine.dispose()
+    return assigned_total
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m db.backfill_referral_codes",
+        description="Assign referral codes to users that have none.")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="users per UPDATE and commit")
+    args = parser.parse_args(argv)
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stdout,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    assigned = asyncio.run(backfill_referral_codes(args.batch_size))
+    logging.info(f"Referral codes: done, {assigned} user(s) got a code.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy import update, delete, func, and_
 
 from ..models import AdCampaign, AdAttribution, Payment
+from .pagination import KeysetKey, KeysetPage, RowCount, count_rows, fetch_keyset_page
 
 
 async def create_campaign(
@@ -141,22 +142,34 @@ async def get_campaign_stats(session: AsyncSession, campaign_id: int) -> Dict[st
     }
 
 
-async def count_campaigns(session: AsyncSession, *, only_active: bool = False) -> int:
-    stmt = select(func.count(AdCampaign.ad_campaign_id))
+def _campaigns_stmt(only_active: bool):
+    stmt = select(AdCampaign)
     if only_active:
         stmt = stmt.where(AdCampaign.is_active == True)
-    return int((await session.execute(stmt)).scalar() or 0)
+    return stmt
+
+
+async def count_campaigns(session: AsyncSession, *, only_active: bool = False) -> RowCount:
+    stmt = _campaigns_stmt(only_active).with_only_columns(AdCampaign.ad_campaign_id)
+    return await count_rows(session, stmt)
 
 
 async def list_campaigns_paged(
-    session: AsyncSession, *, page: int, page_size: int, only_active: bool = False
-) -> List[AdCampaign]:
-    offset = max(0, page) * max(1, page_size)
-    stmt = select(AdCampaign).order_by(AdCampaign.created_at.desc()).offset(offset).limit(page_size)
-    if only_active:
-        stmt = stmt.where(AdCampaign.is_active == True)
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    session: AsyncSession,
+    *,
+    page_size: int,
+    after: Optional[KeysetKey] = None,
+    before: Optional[KeysetKey] = None,
+    only_active: bool = False,
+) -> KeysetPage:
+    return await fetch_keyset_page(
+        session,
+        _campaigns_stmt(only_active),
+        (AdCampaign.created_at, AdCampaign.ad_campaign_id),
+        page_size,
+        after=after,
+        before=before,
+    )
 
 
 async def get_totals(session: AsyncSession) -> Dict[str, float]:
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, delete, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models import FsmRecord
+
+
+def _is_live(now: datetime):
+    return or_(FsmRecord.expires_at.is_(None), FsmRecord.expires_at > now)
+
+
+async def get_fsm_state(session: AsyncSession, key: str,
+                        now: datetime) -> Optional[str]:
+    stmt = select(FsmRecord.state).where(FsmRecord.key == key, _is_live(now))
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_fsm_data(session: AsyncSession, key: str,
+                       now: datetime) -> Optional[str]:
+    stmt = select(FsmRecord.data).where(FsmRecord.key == key, _is_live(now))
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def upsert_fsm_record(session: AsyncSession, key: str,
+                            values: Dict[str, Any], now: datetime,
+                            expires_at: Optional[datetime]) -> None:
+    """
+    Write ``values`` (``state`` and/or ``data``) of one record and move its
+    expiry. The other part of an already expired record is cleared, so it
+    does not come back to life with the new expiry.
+    """
+    stmt = pg_insert(FsmRecord).values(key=key, expires_at=expires_at, **values)
+    expired = and_(FsmRecord.expires_at.is_not(None), FsmRecord.expires_at <= now)
+    set_: Dict[str, Any] = {"expires_at": stmt.excluded.expires_at}
+    for column in ("state", "data"):
+        if column in values:
+            set_[column] = stmt.excluded[column]
+        else:
+            set_[column] = case((expired, None), else_=getattr(FsmRecord, column))
+    stmt = stmt.on_conflict_do_update(index_elements=[FsmRecord.key], set_=set_)
+    await session.execute(stmt)
+
+
+async def delete_empty_fsm_record(session: AsyncSession, key: str) -> None:
+    await session.execute(
+        delete(FsmRecord).where(FsmRecord.key == key,
+                                FsmRecord.state.is_(None),
+                                FsmRecord.data.is_(None)))
+
+
+async def delete_expired_fsm_records(session: AsyncSession,
+                                     now: datetime) -> int:
+    result = await session.execute(
+        delete(FsmRecord).where(FsmRecord.expires_at.is_not(None),
+                                FsmRecord.expires_at <= now))
+    return result.rowcount
@@ -1,10 +1,15 @@
 import logging
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, AsyncIterator, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import or_
 
+from .. import message_log_partitions
 from ..models import MessageLog, User
+from .pagination import (KeysetKey, KeysetPage, RowCount, count_rows,
+                         fetch_keyset_page)
 
 
 async def create_message_log(session: AsyncSession,
@@ -22,37 +27,107 @@ async def create_message_log(session: AsyncSession,
         return None
 
 
-async def get_all_message_logs(session: AsyncSession, limit: int,
-                               offset: int) -> List[MessageLog]:
-    stmt = select(MessageLog).order_by(
-        MessageLog.timestamp.desc()).limit(limit).offset(offset)
-    result = await session.execute(stmt)
-    return result.scalars().all()
-
-
-async def count_all_message_logs(session: AsyncSession) -> int:
-    stmt = select(func.count()).select_from(MessageLog)
-    result = await session.execute(stmt)
-    return result.scalar_one()
-
-
-async def get_user_message_logs(session: AsyncSession, user_id_to_search: int,
-                                limit: int, offset: int) -> List[MessageLog]:
-    stmt = (select(MessageLog).where(
+def _user_message_logs_stmt(user_id_to_search: int):
+    return select(MessageLog).where(
         or_(MessageLog.user_id == user_id_to_search,
-            MessageLog.target_user_id == user_id_to_search)).order_by(
-                MessageLog.timestamp.desc()).limit(limit).offset(offset))
-    result = await session.execute(stmt)
-    return result.scalars().all()
+            MessageLog.target_user_id == user_id_to_search))
+
+
+async def get_all_message_logs(session: AsyncSession,
+                               limit: int,
+                               after: Optional[KeysetKey] = None,
+                               before: Optional[KeysetKey] = None
+                               ) -> KeysetPage:
+    return await fetch_keyset_page(session,
+                                   select(MessageLog),
+                                   (MessageLog.timestamp, MessageLog.log_id),
+                                   limit,
+                                   after=after,
+                                   before=before)
+
+
+async def count_all_message_logs(session: AsyncSession) -> RowCount:
+    return await count_rows(session,
+                            select(MessageLog.log_id),
+                            table_name=MessageLog.__tablename__)
+
+
+async def get_user_message_logs(session: AsyncSession,
+                                user_id_to_search: int,
+                                limit: int,
+                                after: Optional[KeysetKey] = None,
+                                before: Optional[KeysetKey] = None
+                                ) -> KeysetPage:
+    return await fetch_keyset_page(session,
+                                   _user_message_logs_stmt(user_id_to_search),
+                                   (MessageLog.timestamp, MessageLog.log_id),
+                                   limit,
+                                   after=after,
+                                   before=before)
 
 
 async def count_user_message_logs(session: AsyncSession,
-                                  user_id_to_search: int) -> int:
-    stmt = (select(func.count()).select_from(MessageLog).where(
-        or_(MessageLog.user_id == user_id_to_search,
-            MessageLog.target_user_id == user_id_to_search)))
-    result = await session.execute(stmt)
-    return result.scalar_one()
+                                  user_id_to_search: int) -> RowCount:
+    stmt = _user_message_logs_stmt(user_id_to_search).with_only_columns(
+        MessageLog.log_id)
+    return await count_rows(session, stmt)
+
+
+async def stream_message_logs_for_export(
+        session: AsyncSession,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        event_type_prefixes: Optional[List[str]] = None,
+        batch_size: int = 2000) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield batches of log rows (only the exported columns) in chronological order.
+
+    Rows are read through a server-side cursor, so memory usage is bounded by
+    ``batch_size`` regardless of how many logs match.
+    """
+    stmt = select(
+        MessageLog.log_id,
+        MessageLog.timestamp,
+        MessageLog.user_id,
+        MessageLog.telegram_username,
+        MessageLog.telegram_first_name,
+        MessageLog.event_type,
+        MessageLog.content,
+        MessageLog.is_admin_event,
+        MessageLog.target_user_id,
+        MessageLog.raw_update_preview,
+    )
+    if date_from is not None:
+        stmt = stmt.where(MessageLog.timestamp >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(MessageLog.timestamp < date_to)
+    if event_type_prefixes:
+        stmt = stmt.where(
+            or_(*[
+                MessageLog.event_type.startswith(prefix, autoescape=True)
+                for prefix in event_type_prefixes
+            ]))
+    stmt = stmt.order_by(MessageLog.timestamp.asc(),
+                         MessageLog.log_id.asc()).execution_options(
+                             yield_per=batch_size)
+
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def ensure_message_log_partitions(session: AsyncSession,
+                                        months_ahead: int = 2) -> List[str]:
+    connection = await session.connection()
+    return await connection.run_sync(message_log_partitions.ensure_partitions,
+                                     months_ahead)
+
+
+async def drop_expired_message_log_partitions(
+        session: AsyncSession, retention_months: int) -> List[str]:
+    connection = await session.connection()
+    return await connection.run_sync(
+        message_log_partitions.drop_expired_partitions, retention_months)
 
 
 async def create_message_log_no_commit(session: AsyncSession,
@@ -0,0 +1,156 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ClauseElement, ColumnElement
+from sqlalchemy.sql.expression import Executable
+
+# (sort timestamp, tie-breaking primary key) of a row
+KeysetKey = Tuple[datetime, int]
+
+# Below this many rows an exact COUNT(*) is cheap enough and more useful than
+# a planner estimate (which is also unreliable on small or fresh tables).
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any]
+    has_prev: bool
+    has_next: bool
+    first_key: Optional[KeysetKey]
+    last_key: Optional[KeysetKey]
+
+
+@dataclass
+class RowCount:
+    value: int
+    is_estimate: bool
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a select, compiled with its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element: _Explain, compiler, **kwargs) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement,
+                                                       **kwargs)
+
+
+def _key_literal(key: KeysetKey,
+                 key_columns: Sequence[ColumnElement]) -> ColumnElement:
+    # Bind with the column types so timestamps stay timestamptz under asyncpg
+    return tuple_(*[
+        literal(value, column.type) for column, value in zip(key_columns, key)
+    ])
+
+
+def _row_key(item: Any, key_columns: Sequence[ColumnElement]) -> KeysetKey:
+    return tuple(getattr(item, column.key) for column in key_columns)
+
+
+async def fetch_keyset_page(session: AsyncSession,
+                            stmt: Select,
+                            key_columns: Sequence[ColumnElement],
+                            limit: int,
+                            after: Optional[KeysetKey] = None,
+                            before: Optional[KeysetKey] = None) -> KeysetPage:
+    """
+    Fetch one page of ``stmt`` ordered newest first by ``key_columns``.
+
+    ``after`` returns the rows that follow a key (older ones), ``before`` the
+    rows that precede it (newer ones). The row-value comparison lets Postgres
+    seek straight into a composite index on ``key_columns``, so the cost of a
+    page does not depend on how deep it is.
+    """
+    limit = max(limit, 1)
+    row_key = tuple_(*key_columns)
+    if before is not None:
+        stmt = stmt.where(row_key > _key_literal(before, key_columns)).order_by(
+            *[column.asc() for column in key_columns])
+    else:
+        if after is not None:
+            stmt = stmt.where(row_key < _key_literal(after, key_columns))
+        stmt = stmt.order_by(*[column.desc() for column in key_columns])
+
+    result = await session.execute(stmt.limit(limit + 1))
+    items = list(result.scalars().all())
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if before is not None:
+        items.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    return KeysetPage(
+        items=items,
+        has_prev=has_prev,
+        has_next=has_next,
+        first_key=_row_key(items[0], key_columns) if items else None,
+        last_key=_row_key(items[-1], key_columns) if items else None,
+    )
+
+
+async def estimate_table_rows(session: AsyncSession, table_name: str) -> int:
+    """
+    Row count of a table (including its partitions) from pg_class statistics.
+    Returns -1 if the table has never been analyzed.
+    """
+    stmt = text("""
+        SELECT COALESCE(SUM(c.reltuples) FILTER (WHERE c.reltuples >= 0), -1)
+        FROM pg_class AS c
+        WHERE c.oid = to_regclass(:table_name)
+           OR c.oid IN (
+               SELECT inhrelid FROM pg_inherits
+               WHERE inhparent = to_regclass(:table_name)
+           )
+    """)
+    result = await session.execute(stmt, {"table_name": table_name})
+    return int(result.scalar() or 0)
+
+
+async def estimate_statement_rows(session: AsyncSession, stmt: Select) -> int:
+    """Number of rows the planner expects ``stmt`` to return (EXPLAIN, no execution)."""
+    result = await session.execute(_Explain(stmt))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(session: AsyncSession,
+                     stmt: Select,
+                     table_name: Optional[str] = None) -> RowCount:
+    """
+    Cheap row count for pagination headers.
+
+    Pass ``table_name`` when ``stmt`` selects a whole table unfiltered; its
+    count then comes from pg_class. Filtered statements are estimated with
+    EXPLAIN. Small results are counted exactly.
+    """
+    if table_name is not None:
+        estimate = await estimate_table_rows(session, table_name)
+    else:
+        estimate = await estimate_statement_rows(session, stmt)
+
+    if estimate >= EXACT_COUNT_THRESHOLD:
+        return RowCount(value=estimate, is_estimate=True)
+
+    count_stmt = select(func.count()).select_from(
+        stmt.order_by(None).subquery())
+    result = await session.execute(count_stmt)
+    return RowCount(value=result.scalar_one(), is_estimate=False)
@@ -1,11 +1,15 @@
 import logging
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
 from sqlalchemy.future import select
-from sqlalchemy import update, func, and_
+from sqlalchemy import update, func, and_, lambda_stmt
 from sqlalchemy.orm import selectinload
 
 from db.models import Payment, User
+from .pagination import (KeysetKey, KeysetPage, RowCount, count_rows,
+                         fetch_keyset_page)
 
 
 async def create_payment_record(session: AsyncSession,
@@ -41,8 +45,8 @@ async def create_payment_record(session: AsyncSession,
 async def get_payment_by_provider_payment_id(
         session: AsyncSession, provider_payment_id: str) -> Optional[Payment]:
     """Fetch a payment by provider-specific identifier."""
-    stmt = select(Payment).where(
-        Payment.provider_payment_id == provider_payment_id)
+    stmt = lambda_stmt(lambda: select(Payment).where(
+        Payment.provider_payment_id == provider_payment_id))
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
@@ -122,20 +126,67 @@ async def get_recent_payment_logs_with_user(session: AsyncSession,
     return result.scalars().all()
 
 
-async def get_payments_count(session: AsyncSession) -> int:
-    """Get total count of successful payments."""
-    stmt = select(func.count(Payment.payment_id)).where(Payment.status == 'succeeded')
-    result = await session.execute(stmt)
-    return result.scalar() or 0
+async def get_succeeded_payments_page(
+        session: AsyncSession,
+        limit: int,
+        after: Optional[KeysetKey] = None,
+        before: Optional[KeysetKey] = None) -> KeysetPage:
+    """Page of succeeded payments (newest first) with their users loaded."""
+    stmt = (select(Payment).options(selectinload(Payment.user))
+            .where(Payment.status == 'succeeded'))
+    return await fetch_keyset_page(session,
+                                   stmt,
+                                   (Payment.created_at, Payment.payment_id),
+                                   limit,
+                                   after=after,
+                                   before=before)
 
 
-async def get_all_succeeded_payments_with_user(session: AsyncSession) -> List[Payment]:
-    """Get all successful payments with user data for export."""
-    stmt = (select(Payment).options(selectinload(Payment.user))
-            .where(Payment.status == 'succeeded')
-            .order_by(Payment.created_at.desc()))
-    result = await session.execute(stmt)
-    return result.scalars().all()
+async def get_payments_count(session: AsyncSession) -> RowCount:
+    """Get count of successful payments (planner estimate for large tables)."""
+    stmt = select(Payment.payment_id).where(Payment.status == 'succeeded')
+    return await count_rows(session, stmt)
+
+
+async def stream_succeeded_payments_for_export(
+        session: AsyncSession,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        providers: Optional[List[str]] = None,
+        batch_size: int = 2000) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield batches of succeeded payments joined with the payer's username and
+    first name, newest first. Only the exported columns are selected and rows
+    come from a server-side cursor, so memory stays bounded by ``batch_size``.
+    """
+    stmt = (select(
+        Payment.payment_id,
+        Payment.user_id,
+        User.username,
+        User.first_name,
+        Payment.amount,
+        Payment.currency,
+        Payment.provider,
+        Payment.status,
+        Payment.description,
+        Payment.subscription_duration_months,
+        Payment.created_at,
+        Payment.provider_payment_id,
+    ).outerjoin(User, User.user_id == Payment.user_id)
+            .where(Payment.status == 'succeeded'))
+    if date_from is not None:
+        stmt = stmt.where(Payment.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Payment.created_at < date_to)
+    if providers:
+        stmt = stmt.where(Payment.provider.in_(providers))
+    stmt = stmt.order_by(Payment.created_at.desc(),
+                         Payment.payment_id.desc()).execution_options(
+                             yield_per=batch_size)
+
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
 
 
 async def count_user_succeeded_payments(
@@ -2,7 +2,8 @@ import logging
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, func, and_, or_
+from sqlalchemy import update, func, and_, or_, lambda_stmt
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timezone
 
 from db.models import PromoCode, PromoCodeActivation, User, Payment
@@ -20,6 +21,25 @@ async def create_promo_code(session: AsyncSession,
     return new_promo
 
 
+async def insert_promo_codes(session: AsyncSession, codes: List[str],
+                             promo_data: Dict[str, Any]) -> List[str]:
+    """
+    Insert one promo code per entry of ``codes`` (all sharing ``promo_data``)
+    with a single multi-row statement. Codes that already exist are skipped;
+    returns the codes that were actually inserted.
+    """
+    if not codes:
+        return []
+    stmt = (
+        pg_insert(PromoCode)
+        .values([{**promo_data, "code": code} for code in codes])
+        .on_conflict_do_nothing(index_elements=[PromoCode.code])
+        .returning(PromoCode.code)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
 async def get_promo_code_by_id(session: AsyncSession,
                                promo_code_id: int) -> Optional[PromoCode]:
     return await session.get(PromoCode, promo_code_id)
@@ -34,11 +54,12 @@ async def get_promo_code_by_code(session: AsyncSession, code_str: str) -> Option
 
 async def get_active_promo_code_by_code_str(
         session: AsyncSession, code_str: str) -> Optional[PromoCode]:
-    stmt = select(PromoCode).where(
-        PromoCode.code == code_str.upper(), PromoCode.is_active == True,
+    code = code_str.upper()
+    now = datetime.now(timezone.utc)
+    stmt = lambda_stmt(lambda: select(PromoCode).where(
+        PromoCode.code == code, PromoCode.is_active == True,
         PromoCode.current_activations < PromoCode.max_activations,
-        or_(PromoCode.valid_until == None, PromoCode.valid_until
-            > datetime.now(timezone.utc)))
+        or_(PromoCode.valid_until == None, PromoCode.valid_until > now)))
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
@@ -0,0 +1,61 @@
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import TelegramRateQuota
+
+# The window is derived from the database clock, so instances with skewed
+# clocks still agree on it.
+_LEASE_SQL = text("""
+    WITH params AS (
+        SELECT CAST(:bucket AS varchar) AS bucket,
+               CAST(:quota_limit AS integer) AS quota_limit,
+               CAST(:window_seconds AS double precision) AS window_seconds,
+               CAST(:block AS integer) AS block
+    )
+    INSERT INTO telegram_rate_quota AS quota (bucket, window_id, granted, last_lease)
+    SELECT params.bucket,
+           floor(extract(epoch FROM clock_timestamp())::double precision
+                 / params.window_seconds)::bigint,
+           LEAST(params.block, params.quota_limit),
+           LEAST(params.block, params.quota_limit)
+    FROM params
+    ON CONFLICT (bucket, window_id) DO UPDATE
+    SET last_lease = LEAST(CAST(:block AS integer), CAST(:quota_limit AS integer) - quota.granted),
+        granted = quota.granted
+                  + LEAST(CAST(:block AS integer), CAST(:quota_limit AS integer) - quota.granted)
+    WHERE quota.granted < CAST(:quota_limit AS integer)
+    RETURNING quota.window_id,
+              quota.last_lease,
+              (quota.window_id + 1) * CAST(:window_seconds AS double precision)
+                  - extract(epoch FROM clock_timestamp())::double precision AS seconds_left
+""")
+
+
+async def lease_quota(session: AsyncSession, bucket: str, quota_limit: int,
+                      window_seconds: float,
+                      block: int) -> Optional[Tuple[int, int, float]]:
+    """
+    Take up to ``block`` sends from the current window of ``bucket``.
+    Returns (window id, sends leased, seconds until the window ends), or None
+    when the window is used up.
+    """
+    result = await session.execute(_LEASE_SQL, {
+        "bucket": bucket,
+        "quota_limit": quota_limit,
+        "window_seconds": window_seconds,
+        "block": block,
+    })
+    row = result.first()
+    if row is None:
+        return None
+    return int(row.window_id), int(row.last_lease), float(row.seconds_left)
+
+
+async def delete_quota_windows_before(session: AsyncSession, bucket: str,
+                                      window_id: int) -> int:
+    result = await session.execute(
+        delete(TelegramRateQuota).where(TelegramRateQuota.bucket == bucket,
+                                        TelegramRateQuota.window_id < window_id))
+    return result.rowcount
@@ -2,7 +2,7 @@ import logging
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete, func, and_, or_
+from sqlalchemy import update, delete, func, and_, or_, lambda_stmt
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone, timedelta
 
@@ -13,14 +13,15 @@ async def get_active_subscription_by_user_id(
         session: AsyncSession,
         user_id: int,
         panel_user_uuid: Optional[str] = None) -> Optional[Subscription]:
-    stmt = select(Subscription).where(
+    now = datetime.now(timezone.utc)
+    stmt = lambda_stmt(lambda: select(Subscription).where(
         Subscription.user_id == user_id,
         Subscription.is_active == True,
-        Subscription.end_date > datetime.now(timezone.utc),
-    )
+        Subscription.end_date > now,
+    ))
     if panel_user_uuid:
-        stmt = stmt.where(Subscription.panel_user_uuid == panel_user_uuid)
-    stmt = stmt.order_by(Subscription.end_date.desc()).limit(1)
+        stmt += lambda s: s.where(Subscription.panel_user_uuid == panel_user_uuid)
+    stmt += lambda s: s.order_by(Subscription.end_date.desc()).limit(1)
     result = await session.execute(stmt)
     return result.scalars().first()
 
@@ -188,8 +189,8 @@ async def update_subscription_end_date(
 
 async def has_any_subscription_for_user(session: AsyncSession,
                                         user_id: int) -> bool:
-    stmt = select(Subscription.subscription_id).where(
-        Subscription.user_id == user_id).limit(1)
+    stmt = lambda_stmt(lambda: select(Subscription.subscription_id).where(
+        Subscription.user_id == user_id).limit(1))
     result = await session.execute(stmt)
     return result.scalar_one_or_none() is not None
 
@@ -1,11 +1,14 @@
 import logging
 import secrets
 import string
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import update, delete, func, and_, or_
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import (
+    BigInteger, String, and_, column, delete, exists, func, lambda_stmt, or_, update, values,
+)
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
@@ -19,6 +22,8 @@ from ..models import (
     UserPaymentMethod,
     AdAttribution,
 )
+from ..invalidation_bus import ENTITY_USER, publish_invalidation
+from .pagination import KeysetKey, KeysetPage, RowCount, count_rows, fetch_keyset_page
 
 REFERRAL_CODE_ALPHABET = string.ascii_uppercase + string.digits
 REFERRAL_CODE_LENGTH = 9
@@ -37,16 +42,8 @@ async def _referral_code_exists(session: AsyncSession, code: str) -> bool:
     return result.scalar_one_or_none() is not None
 
 
-async def generate_unique_referral_code(session: AsyncSession) -> str:
-    """
-    Generate a unique referral code consisting of uppercase alphanumeric characters.
-    Retries until a free code is found or raises RuntimeError after exceeding attempts.
-    """
-    for _ in range(MAX_REFERRAL_CODE_ATTEMPTS):
-        candidate = _generate_referral_code_candidate()
-        if not await _referral_code_exists(session, candidate):
-            return candidate
-    raise RuntimeError("Failed to generate a unique referral code after several attempts.")
+def _missing_referral_code():
+    return or_(User.referral_code.is_(None), User.referral_code == "")
 
 
 async def ensure_referral_code(session: AsyncSession, user: User) -> str:
@@ -62,14 +59,78 @@ async def ensure_referral_code(session: AsyncSession, user: User) -> str:
             await session.refresh(user)
         return user.referral_code
 
-    user.referral_code = await generate_unique_referral_code(session)
-    await session.flush()
-    await session.refresh(user)
-    return user.referral_code
+    taken = aliased(User)
+    for _ in range(MAX_REFERRAL_CODE_ATTEMPTS):
+        candidate = _generate_referral_code_candidate()
+        # Only sets a code that is free and only if none was set meanwhile,
+        # so a collision never aborts the transaction with a unique violation
+        stmt = (
+            update(User)
+            .where(
+                User.user_id == user.user_id,
+                _missing_referral_code(),
+                ~exists().where(taken.referral_code == candidate),
+            )
+            .values(referral_code=candidate)
+            .returning(User.referral_code)
+            .execution_options(synchronize_session=False)
+        )
+        code = (await session.execute(stmt)).scalar_one_or_none()
+        if code is None:
+            code = await session.scalar(
+                select(User.referral_code).where(User.user_id == user.user_id))
+        if code:
+            set_committed_value(user, "referral_code", code)
+            return code
+    raise RuntimeError("Failed to generate a unique referral code after several attempts.")
+
+
+async def get_user_ids_without_referral_code(session: AsyncSession, limit: int) -> List[int]:
+    stmt = (
+        select(User.user_id)
+        .where(_missing_referral_code())
+        .order_by(User.user_id)
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def assign_referral_codes(session: AsyncSession, user_ids: List[int]) -> int:
+    """
+    Give each of ``user_ids`` that still has no referral code a fresh one in a
+    single ``UPDATE ... FROM (VALUES ...)``. Users whose candidate is already
+    taken are skipped and keep no code; returns how many got one.
+    """
+    if not user_ids:
+        return 0
+    codes: Set[str] = set()
+    while len(codes) < len(user_ids):
+        codes.add(_generate_referral_code_candidate())
+    candidates = values(
+        column("user_id", BigInteger),
+        column("referral_code", String),
+        name="candidates",
+    ).data(list(zip(user_ids, codes)))
+    taken = aliased(User)
+    stmt = (
+        update(User)
+        .where(
+            User.user_id == candidates.c.user_id,
+            _missing_referral_code(),
+            ~exists().where(taken.referral_code == candidates.c.referral_code),
+        )
+        .values(referral_code=candidates.c.referral_code)
+        .returning(User.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return len(result.all())
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> Optional[User]:
-    stmt = select(User).where(User.user_id == user_id)
+    # Hot path: a lambda statement is analysed once and only rebinds user_id
+    stmt = lambda_stmt(lambda: select(User).where(User.user_id == user_id))
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
@@ -95,43 +156,54 @@ async def get_user_by_panel_uuid(
 async def create_user(session: AsyncSession, user_data: Dict[str, Any]) -> Tuple[User, bool]:
     """Create a user if not exists in a race-safe way.
 
+    The referral code is generated up front and inserted with the row, so a
+    new user costs a single ``INSERT ... RETURNING``; another code is only
+    tried when the insert was skipped because the code was already taken.
+
     Returns a tuple of (user, created_flag).
     """
 
     if "registration_date" not in user_data:
         user_data["registration_date"] = datetime.now(timezone.utc)
 
-    if not user_data.get("referral_code"):
-        user_data["referral_code"] = await generate_unique_referral_code(session)
-    else:
+    generate_code = not user_data.get("referral_code")
+    if not generate_code:
         user_data["referral_code"] = user_data["referral_code"].strip().upper()
 
-    # Use PostgreSQL upsert to avoid IntegrityError on concurrent inserts
-    stmt = (
-        pg_insert(User)
-        .values(**user_data)
-        .on_conflict_do_nothing(index_elements=[User.user_id])
-        .returning(User.user_id)
-    )
-
-    result = await session.execute(stmt)
-    inserted_row = result.first()
-    created = inserted_row is not None
-
-    # Fetch the user (inserted just now or pre-existing)
     user_id: int = user_data["user_id"]
-    user = await get_user_by_id(session, user_id)
-
-    if created and user is not None:
-        logging.info(
-            f"New user {user.user_id} created in DAL. Referred by: {user.referred_by_id or 'N/A'}."
-        )
-    elif user is not None:
-        logging.info(
-            f"User {user.user_id} already exists in DAL. Proceeding without creation."
+    for _ in range(MAX_REFERRAL_CODE_ATTEMPTS):
+        if generate_code:
+            user_data["referral_code"] = _generate_referral_code_candidate()
+
+        # No conflict target: a taken user_id, referral code or panel UUID
+        # skips the row instead of aborting the transaction
+        stmt = (
+            pg_insert(User)
+            .values(**user_data)
+            .on_conflict_do_nothing()
+            .returning(User)
         )
+        user = (await session.scalars(stmt)).one_or_none()
+        if user is not None:
+            logging.info(
+                f"New user {user.user_id} created in DAL. Referred by: {user.referred_by_id or 'N/A'}."
+            )
+            return user, True
 
-    return user, created
+        user = await get_user_by_id(session, user_id)
+        if user is not None:
+            logging.info(
+                f"User {user.user_id} already exists in DAL. Proceeding without creation."
+            )
+            return user, False
+
+        if not generate_code or not await _referral_code_exists(
+                session, user_data["referral_code"]):
+            raise RuntimeError(
+                f"User {user_id} was not created: referral code or panel UUID is already in use."
+            )
+
+    raise RuntimeError("Failed to generate a unique referral code after several attempts.")
 
 
 async def get_user_by_referral_code(session: AsyncSession, referral_code: str) -> Optional[User]:
@@ -152,14 +224,57 @@ async def update_user(
             setattr(user, key, value)
         await session.flush()
         await session.refresh(user)
+        await publish_invalidation(session, ENTITY_USER, user_id)
     return user
 
 
+async def get_user_ids_due_for_channel_recheck(
+    session: AsyncSession, channel_id: int, checked_before: datetime, limit: int
+) -> List[int]:
+    """Verified members of ``channel_id`` whose last check is older than ``checked_before``, oldest first."""
+    stmt = (
+        select(User.user_id)
+        .where(
+            User.channel_subscription_verified.is_(True),
+            User.channel_subscription_verified_for == channel_id,
+            User.is_banned.isnot(True),
+            or_(
+                User.channel_subscription_checked_at.is_(None),
+                User.channel_subscription_checked_at < checked_before,
+            ),
+        )
+        .order_by(User.channel_subscription_checked_at.asc().nullsfirst())
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def set_channel_subscription_checked(
+    session: AsyncSession, user_ids: List[int], is_member: bool, checked_at: datetime
+) -> int:
+    if not user_ids:
+        return 0
+    stmt = (
+        update(User)
+        .where(User.user_id.in_(user_ids))
+        .values(
+            channel_subscription_verified=is_member,
+            channel_subscription_checked_at=checked_at,
+        )
+    )
+    result = await session.execute(stmt)
+    await publish_invalidation(session, ENTITY_USER, *user_ids)
+    return result.rowcount
+
+
 async def update_user_language(
     session: AsyncSession, user_id: int, lang_code: str
 ) -> bool:
     stmt = update(User).where(User.user_id == user_id).values(language_code=lang_code)
     result = await session.execute(stmt)
+    if result.rowcount:
+        await publish_invalidation(session, ENTITY_USER, user_id)
     return result.rowcount > 0
 
 
@@ -175,26 +290,28 @@ async def get_banned_users(session: AsyncSession) -> List[User]:
 
 
 async def get_all_users_paginated(
-    session: AsyncSession, *, page: int = 0, page_size: int = 15
-) -> List[User]:
-    """Return a slice of users ordered by newest registration first."""
-    safe_page = max(page, 0)
-    safe_page_size = max(page_size, 1)
-
-    stmt = (
-        select(User)
-        .order_by(User.registration_date.desc())
-        .offset(safe_page * safe_page_size)
-        .limit(safe_page_size)
+    session: AsyncSession,
+    *,
+    page_size: int = 15,
+    after: Optional[KeysetKey] = None,
+    before: Optional[KeysetKey] = None,
+) -> KeysetPage:
+    """Return a page of users ordered by newest registration first."""
+    return await fetch_keyset_page(
+        session,
+        select(User),
+        (User.registration_date, User.user_id),
+        page_size,
+        after=after,
+        before=before,
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
 
 
-async def count_all_users(session: AsyncSession) -> int:
-    """Count total number of users."""
-    result = await session.execute(select(func.count(User.user_id)))
-    return result.scalar_one()
+async def count_all_users(session: AsyncSession) -> RowCount:
+    """Count users (planner estimate for large tables)."""
+    return await count_rows(
+        session, select(User.user_id), table_name=User.__tablename__
+    )
 
 
 async def get_all_active_user_ids_for_broadcast(session: AsyncSession) -> List[int]:
@@ -359,4 +476,5 @@ async def delete_user_and_relations(session: AsyncSession, user_id: int) -> bool
 
     await session.delete(user)
     await session.flush()
+    await publish_invalidation(session, ENTITY_USER, user_id)
     return True
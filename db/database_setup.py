@@ -1,12 +1,91 @@
 import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from config.settings import Settings
 from .models import Base
 from .migrator import run_database_migrations
 
 async_engine = None
+replica_engine = None
+
+# Called with (seconds, timed_out) after every pool checkout
+PoolWaitObserver = Callable[[float, bool], None]
+_pool_wait_observer: Optional[PoolWaitObserver] = None
+
+
+def set_pool_wait_observer(observer: Optional[PoolWaitObserver]) -> None:
+    global _pool_wait_observer
+    _pool_wait_observer = observer
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default asyncio queue pool, timing each checkout: waiting for a free
+    connection, or opening a new one, until the connection is handed out.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            observer = _pool_wait_observer
+            if observer is not None:
+                observer(time.perf_counter() - started, timed_out)
+
+
+# Session.info flags kept by the listeners below
+SESSION_USED_CONNECTION = "used_connection"
+SESSION_HAS_WRITES = "has_writes"
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connection_used(session, transaction, connection) -> None:
+    session.info[SESSION_USED_CONNECTION] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context) -> None:
+    session.info[SESSION_HAS_WRITES] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state) -> None:
+    # INSERT/UPDATE/DELETE and textual SQL; plain SELECTs do not need a commit
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[SESSION_HAS_WRITES] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_writes(session) -> None:
+    session.info.pop(SESSION_HAS_WRITES, None)
+
+
+def mark_session_written(session) -> None:
+    """For side effects a SELECT cannot show, e.g. ``pg_notify``: the session must commit."""
+    session.info[SESSION_HAS_WRITES] = True
+
+
+def session_needs_commit(session) -> bool:
+    """Whether the session has pending ORM changes or executed writes since its last commit."""
+    return bool(session.info.get(SESSION_HAS_WRITES)
+                or session.new or session.dirty or session.deleted)
+
+
+def session_used_connection(session) -> bool:
+    return bool(session.info.get(SESSION_USED_CONNECTION))
 
 
 def init_db_connection(settings: Settings) -> sessionmaker:
@@ -16,10 +95,25 @@ def init_db_connection(settings: Settings) -> sessionmaker:
         logging.info(
             f"Attempting to create SQLAlchemy engine with URL: {settings.DATABASE_URL}"
         )
+        # Without pre-ping a dead connection fails the statement that hits it;
+        # SQLAlchemy then invalidates the whole pool, and pool_recycle keeps
+        # connections from outliving server or proxy idle timeouts.
         async_engine = create_async_engine(
             settings.DATABASE_URL,
             echo=False,
-            pool_pre_ping=True,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS or -1,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            # Per-connection LRU of prepared statements, keyed by SQL text:
+            # SQLAlchemy's for its own queries, asyncpg's for raw execute().
+            # 0 turns both off, as PgBouncer in transaction mode requires.
+            connect_args={
+                "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            },
         )
 
     local_async_session_factory = async_sessionmaker(
@@ -35,6 +129,37 @@ def init_db_connection(settings: Settings) -> sessionmaker:
     return local_async_session_factory
 
 
+def init_replica_connection(settings: Settings) -> Optional[async_sessionmaker]:
+    """Session factory of the read replica in POSTGRES_REPLICA_DSN, or None without one."""
+    global replica_engine
+
+    replica_url = settings.replica_database_url
+    if not replica_url:
+        return None
+    if replica_engine is None:
+        replica_engine = create_async_engine(
+            replica_url,
+            echo=False,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS or -1,
+            pool_pre_ping=True,
+            connect_args={
+                "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            },
+        )
+    logging.info("SQLAlchemy Async Engine configured for the PostgreSQL read replica.")
+    return async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
 async def get_async_session(session_factory: sessionmaker) -> AsyncSession:
 
     if session_factory is None:
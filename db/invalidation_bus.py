@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import Settings
+from .database_setup import mark_session_written
+
+INVALIDATION_CHANNEL = "bot_cache_invalidation"
+
+# Entities with in-process caches keyed by their id
+ENTITY_USER = "user"
+
+# Tags this process's messages: its caches are already up to date (it made
+# the change), so evicting them again would only throw away fresh entries
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_KEYS_PER_NOTIFY = 400
+# How often the listening connection is checked when nothing arrives
+KEEPALIVE_INTERVAL_SECONDS = 60
+RECONNECT_MIN_DELAY_SECONDS = 1
+RECONNECT_MAX_DELAY_SECONDS = 30
+
+# Called with the id of the changed row, or None when everything cached for
+# the entity must go (e.g. notifications may have been missed)
+InvalidationHandler = Callable[[Optional[str]], None]
+
+_handlers: Dict[str, List[InvalidationHandler]] = {}
+_bus: Optional["InvalidationBus"] = None
+
+
+def register_invalidation_handler(entity: str, handler: InvalidationHandler) -> None:
+    _handlers.setdefault(entity, []).append(handler)
+
+
+def _dispatch(entity: str, keys: Optional[Iterable[str]]) -> None:
+    for handler in _handlers.get(entity, ()):
+        try:
+            if keys is None:
+                handler(None)
+            else:
+                for key in keys:
+                    handler(key)
+        except Exception as e:
+            logging.error(f"Invalidation handler for '{entity}' failed: {e}", exc_info=True)
+
+
+def _flush_all() -> None:
+    for entity in list(_handlers):
+        _dispatch(entity, None)
+
+
+async def publish_invalidation(session: AsyncSession, entity: str, *keys: object) -> None:
+    """
+    Tell every other bot instance to evict ``entity`` rows ``keys`` from its
+    caches. Sent with ``pg_notify`` in the session's transaction, so it is
+    delivered on commit and dropped on rollback. A no-op while the bus is not
+    running.
+    """
+    if _bus is None or not keys:
+        return
+    values = [str(key) for key in keys]
+    for start in range(0, len(values), MAX_KEYS_PER_NOTIFY):
+        payload = (f"{INSTANCE_ID}:{entity}:"
+                   f"{','.join(values[start:start + MAX_KEYS_PER_NOTIFY])}")
+        await session.execute(select(func.pg_notify(INVALIDATION_CHANNEL, payload)))
+        _bus.published += 1
+    mark_session_written(session)
+
+
+def _listener_dsn(settings: Settings) -> str:
+    # asyncpg itself does not understand the SQLAlchemy driver suffix
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class InvalidationBus:
+    """
+    ``LISTEN`` on a dedicated connection (outside the SQLAlchemy pool) for
+    invalidation messages published by other bot instances. The connection is
+    re-established when lost; since messages may have been missed meanwhile,
+    every registered cache is then cleared.
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._connection: Optional[asyncpg.Connection] = None
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        try:
+            await self._connect()
+        except Exception as e:
+            logging.error(f"Invalidation bus: failed to connect, will retry: {e}")
+            self._lost.set()
+        self._task = asyncio.create_task(self._run(), name="InvalidationBus")
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        connection.add_termination_listener(self._on_terminated)
+        await connection.add_listener(INVALIDATION_CHANNEL, self._on_notification)
+        self._connection = connection
+        self._lost.clear()
+        logging.info(f"Invalidation bus: listening on '{INVALIDATION_CHANNEL}'.")
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN_DELAY_SECONDS
+        while True:
+            if not self._lost.is_set():
+                try:
+                    await asyncio.wait_for(self._lost.wait(), KEEPALIVE_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    try:
+                        await self._connection.execute("SELECT 1")
+                        continue
+                    except Exception as e:
+                        logging.warning(f"Invalidation bus: connection check failed: {e}")
+                        self._lost.set()
+
+            await self._drop_connection()
+            try:
+                await self._connect()
+            except Exception as e:
+                logging.warning(f"Invalidation bus: reconnect failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+                continue
+            delay = RECONNECT_MIN_DELAY_SECONDS
+            self.reconnects += 1
+            _flush_all()
+
+    def _on_terminated(self, connection) -> None:
+        # Connections closed by _drop_connection are no longer current
+        if connection is self._connection:
+            self._lost.set()
+
+    def _on_notification(self, _connection, _pid: int, _channel: str, payload: str) -> None:
+        origin, _, message = payload.partition(":")
+        if origin == INSTANCE_ID:
+            return
+        self.received += 1
+        entity, _, keys = message.partition(":")
+        _dispatch(entity, keys.split(",") if keys else None)
+
+    async def _drop_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                connection.terminate()
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self._drop_connection()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+        }
+
+
+async def init_invalidation_bus(settings: Settings) -> Optional[InvalidationBus]:
+    global _bus
+    if not settings.CACHE_INVALIDATION_ENABLED:
+        return None
+    if _bus is None:
+        _bus = InvalidationBus(_listener_dsn(settings))
+        await _bus.start()
+    return _bus
+
+
+async def close_invalidation_bus() -> None:
+    global _bus
+    if _bus is not None:
+        await _bus.close()
+        _bus = None
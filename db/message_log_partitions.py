@@ -0,0 +1,271 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "message_logs"
+DEFAULT_PARTITION = "message_logs_default"
+LEGACY_PARTITION = "message_logs_legacy"
+_MONTHLY_PARTITION_REGEX = re.compile(r"^message_logs_p(\d{4})(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1,
+                                                  hour=0,
+                                                  minute=0,
+                                                  second=0,
+                                                  microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def monthly_partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return bool(
+        connection.execute(
+            text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_partitioned_table
+                    WHERE partrelid = to_regclass(:table_name)
+                )
+            """), {
+                "table_name": PARENT_TABLE
+            }).scalar())
+
+
+def list_partitions(connection: Connection) -> Set[str]:
+    rows = connection.execute(
+        text("""
+            SELECT c.relname
+            FROM pg_inherits AS i
+            JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table_name)
+        """), {"table_name": PARENT_TABLE})
+    return {row[0] for row in rows}
+
+
+def create_monthly_partition(connection: Connection, month: datetime) -> bool:
+    """
+    Create the partition for ``month`` unless it exists. Rows that already
+    landed in the default partition for that range are moved into it, since
+    Postgres refuses to attach a range the default partition still holds.
+    """
+    name = monthly_partition_name(month)
+    if name in list_partitions(connection):
+        return False
+
+    bounds = {"start": month, "end": add_months(month, 1)}
+    range_sql = ("FOR VALUES FROM ('{start}') TO ('{end}')".format(
+        start=bounds["start"].isoformat(), end=bounds["end"].isoformat()))
+    default_has_rows = DEFAULT_PARTITION in list_partitions(
+        connection) and connection.execute(
+            text(f"""
+                SELECT EXISTS (
+                    SELECT 1 FROM {DEFAULT_PARTITION}
+                    WHERE timestamp >= :start AND timestamp < :end
+                )
+            """), bounds).scalar()
+
+    if not default_has_rows:
+        connection.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {range_sql}"))
+        return True
+
+    connection.execute(
+        text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    connection.execute(
+        text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE timestamp >= :start AND timestamp < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds)
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {range_sql}"))
+    logging.info(
+        f"message_logs: moved rows for {month:%Y-%m} out of the default partition into {name}."
+    )
+    return True
+
+
+def ensure_partitions(connection: Connection,
+                      months_ahead: int = 2,
+                      first_month: Optional[datetime] = None) -> List[str]:
+    """
+    Make sure the default partition and the monthly partitions from
+    ``first_month`` (default: the current month) up to ``months_ahead``
+    months in the future exist. Returns the names of created partitions.
+    """
+    if not is_partitioned(connection):
+        return []
+
+    created: List[str] = []
+    if DEFAULT_PARTITION not in list_partitions(connection):
+        connection.execute(
+            text(
+                f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+            ))
+        created.append(DEFAULT_PARTITION)
+
+    current_month = month_start(datetime.now(timezone.utc))
+    month = month_start(first_month) if first_month else current_month
+    last_month = add_months(current_month, max(months_ahead, 0))
+    while month <= last_month:
+        if create_monthly_partition(connection, month):
+            created.append(monthly_partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_expired_partitions(connection: Connection,
+                            retention_months: int) -> List[str]:
+    """
+    Drop monthly partitions that lie entirely before the retention window
+    (the current month plus ``retention_months`` full months before it).
+    The legacy partition is dropped once its newest row is out of the window;
+    stray old rows in the default partition are deleted.
+    """
+    if retention_months <= 0 or not is_partitioned(connection):
+        return []
+
+    cutoff = add_months(month_start(datetime.now(timezone.utc)),
+                        -retention_months)
+    dropped: List[str] = []
+    partitions = list_partitions(connection)
+    for name in sorted(partitions):
+        match = _MONTHLY_PARTITION_REGEX.match(name)
+        if match:
+            month = datetime(int(match.group(1)),
+                             int(match.group(2)),
+                             1,
+                             tzinfo=timezone.utc)
+            if add_months(month, 1) > cutoff:
+                continue
+        elif name == LEGACY_PARTITION:
+            newest = connection.execute(
+                text(f"SELECT max(timestamp) FROM {LEGACY_PARTITION}")).scalar()
+            if newest is not None and newest >= cutoff:
+                continue
+        else:
+            continue
+        connection.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    if DEFAULT_PARTITION in partitions:
+        connection.execute(
+            text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+            {"cutoff": cutoff})
+    return dropped
+
+
+def convert_to_partitioned(connection: Connection, months_ahead: int = 2) -> None:
+    """
+    Turn a plain message_logs table into a table partitioned by month.
+
+    Existing rows are not copied: the old table is attached as the
+    ``message_logs_legacy`` partition covering everything up to the month
+    after its newest row, and new monthly partitions start from there.
+    """
+    connection.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+    connection.execute(
+        text(f"""
+            UPDATE {PARENT_TABLE} SET timestamp = COALESCE(timestamp, now())
+            WHERE timestamp IS NULL
+        """))
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ALTER COLUMN timestamp SET NOT NULL"))
+
+    sequence_name = connection.execute(
+        text("SELECT pg_get_serial_sequence(:table_name, 'log_id')"),
+        {"table_name": PARENT_TABLE}).scalar()
+    newest = connection.execute(
+        text(f"SELECT max(timestamp) FROM {PARENT_TABLE}")).scalar()
+
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_PARTITION}"))
+    # Free the index names for the new parent table
+    index_names = [
+        row[0] for row in connection.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :table_name"),
+            {"table_name": LEGACY_PARTITION})
+    ]
+    for index_name in index_names:
+        if PARENT_TABLE not in index_name:
+            continue
+        new_name = index_name.replace(PARENT_TABLE, LEGACY_PARTITION, 1)[:63]
+        connection.execute(
+            text(f'ALTER INDEX "{index_name}" RENAME TO "{new_name}"'))
+
+    log_id_default = (f"DEFAULT nextval('{sequence_name}'::regclass)"
+                      if sequence_name else "")
+    connection.execute(
+        text(f"""
+            CREATE TABLE {PARENT_TABLE} (
+                log_id INTEGER NOT NULL {log_id_default},
+                user_id BIGINT REFERENCES users (user_id),
+                telegram_username VARCHAR,
+                telegram_first_name VARCHAR,
+                event_type VARCHAR NOT NULL,
+                content TEXT,
+                raw_update_preview TEXT,
+                timestamp TIMESTAMPTZ NOT NULL DEFAULT now(),
+                is_admin_event BOOLEAN,
+                target_user_id BIGINT REFERENCES users (user_id),
+                PRIMARY KEY (log_id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """))
+    if sequence_name:
+        # Keep the id sequence alive when the legacy partition is dropped
+        connection.execute(
+            text(f"ALTER SEQUENCE {sequence_name} OWNED BY {PARENT_TABLE}.log_id"))
+    for column in ("user_id", "event_type", "timestamp", "target_user_id"):
+        connection.execute(
+            text(
+                f"CREATE INDEX ix_{PARENT_TABLE}_{column} ON {PARENT_TABLE} ({column})"
+            ))
+    connection.execute(
+        text(f"""
+            CREATE INDEX ix_{PARENT_TABLE}_timestamp_log_id
+            ON {PARENT_TABLE} (timestamp, log_id)
+        """))
+
+    current_month = month_start(datetime.now(timezone.utc))
+    if newest is None:
+        connection.execute(text(f"DROP TABLE {LEGACY_PARTITION}"))
+        first_month = current_month
+    else:
+        first_month = add_months(month_start(newest), 1)
+        # A partition needs the parent's primary key, (log_id, timestamp)
+        legacy_pkey = connection.execute(
+            text("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = to_regclass(:table_name) AND contype = 'p'
+            """), {"table_name": LEGACY_PARTITION}).scalar()
+        if legacy_pkey:
+            connection.execute(
+                text(f'ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT "{legacy_pkey}"'))
+        connection.execute(
+            text(f"""
+                ALTER TABLE {LEGACY_PARTITION}
+                ADD CONSTRAINT {LEGACY_PARTITION}_pkey PRIMARY KEY (log_id, timestamp)
+            """))
+        connection.execute(
+            text(f"""
+                ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {LEGACY_PARTITION}
+                FOR VALUES FROM (MINVALUE) TO ('{first_month.isoformat()}')
+            """))
+
+    ensure_partitions(connection,
+                      months_ahead=months_ahead,
+                      first_month=first_month)
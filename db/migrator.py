@@ -5,6 +5,8 @@ from typing import Callable, List, Set
 from sqlalchemy import inspect, text
 from sqlalchemy.engine import Connection
 
+from . import message_log_partitions
+
 
 @dataclass(frozen=True)
 class Migration:
@@ -112,6 +114,34 @@ def _migration_0003_normalize_referral_codes(connection: Connection) -> None:
         )
     )
 
+def _migration_0004_add_keyset_pagination_indexes(connection: Connection) -> None:
+    statements = [
+        """
+        CREATE INDEX IF NOT EXISTS ix_message_logs_timestamp_log_id
+        ON message_logs (timestamp, log_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_users_registration_date_user_id
+        ON users (registration_date, user_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_payments_succeeded_created_at_payment_id
+        ON payments (created_at, payment_id)
+        WHERE status = 'succeeded'
+        """,
+    ]
+    for stmt in statements:
+        connection.execute(text(stmt))
+
+
+def _migration_0005_partition_message_logs(connection: Connection) -> None:
+    if message_log_partitions.is_partitioned(connection):
+        # Fresh databases get the partitioned table from create_all
+        message_log_partitions.ensure_partitions(connection)
+    else:
+        message_log_partitions.convert_to_partitioned(connection)
+
+
 MIGRATIONS: List[Migration] = [
     Migration(
         id="0001_add_channel_subscription_fields",
@@ -128,6 +158,16 @@ MIGRATIONS: List[Migration] = [
         description="Normalize referral codes to uppercase for consistent lookups",
         upgrade=_migration_0003_normalize_referral_codes,
     ),
+    Migration(
+        id="0004_add_keyset_pagination_indexes",
+        description="Add composite indexes backing keyset pagination of logs, users and payments",
+        upgrade=_migration_0004_add_keyset_pagination_indexes,
+    ),
+    Migration(
+        id="0005_partition_message_logs",
+        description="Partition message_logs by month, keeping existing rows as a legacy partition",
+        upgrade=_migration_0005_partition_message_logs,
+    ),
 ]
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger, Index, text
 from sqlalchemy.orm import relationship, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.sql import func
@@ -30,6 +30,9 @@ class User(Base):
                                              nullable=True)
     channel_subscription_verified_for = Column(BigInteger, nullable=True)
 
+    __table_args__ = (Index("ix_users_registration_date_user_id",
+                            "registration_date", "user_id"), )
+
     referrer = relationship("User", remote_side=[user_id], backref="referrals")
     subscriptions = relationship("Subscription",
                                  back_populates="user",
@@ -113,6 +116,11 @@ class Payment(Base):
                         onupdate=func.now(),
                         nullable=True)
 
+    __table_args__ = (Index("ix_payments_succeeded_created_at_payment_id",
+                            "created_at",
+                            "payment_id",
+                            postgresql_where=text("status = 'succeeded'")), )
+
     user = relationship("User", back_populates="payments")
     promo_code_used = relationship("PromoCode",
                                    back_populates="payments_where_used")
@@ -204,7 +212,9 @@ class MessageLog(Base):
     event_type = Column(String, nullable=False, index=True)
     content = Column(Text, nullable=True)
     raw_update_preview = Column(Text, nullable=True)
+    # Part of the primary key because the table is range-partitioned by it
     timestamp = Column(DateTime(timezone=True),
+                       primary_key=True,
                        server_default=func.now(),
                        index=True)
     is_admin_event = Column(Boolean, default=False)
@@ -213,6 +223,12 @@ class MessageLog(Base):
                             nullable=True,
                             index=True)
 
+    __table_args__ = (
+        Index("ix_message_logs_timestamp_log_id", "timestamp", "log_id"),
+        # Monthly partitions are managed by db/message_log_partitions.py
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
     author_user = relationship("User",
                                foreign_keys=[user_id],
                                back_populates="message_logs_authored")
@@ -264,3 +280,25 @@ class AdAttribution(Base):
 
     user = relationship("User")
     campaign = relationship("AdCampaign", back_populates="attributions")
+
+
+class FsmRecord(Base):
+    """FSM state and data of one chat/user, used when FSM_STORAGE=postgres."""
+    __tablename__ = "fsm_storage"
+
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    # Compact JSON of the FSM data
+    data = Column(Text, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+
+class TelegramRateQuota(Base):
+    """Telegram send quota granted to bot instances within one time window."""
+    __tablename__ = "telegram_rate_quota"
+
+    bucket = Column(String, primary_key=True)
+    window_id = Column(BigInteger, primary_key=True)
+    granted = Column(Integer, nullable=False, default=0)
+    # Size of the most recent lease, returned to the instance that took it
+    last_lease = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Seconds the replica is behind the primary; 0 when it has replayed all WAL
+# it received (an idle primary would otherwise look ever more "behind")
+_REPLICA_LAG_SQL = text("""
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM clock_timestamp() - pg_last_xact_replay_timestamp()), 0)
+END
+""")
+
+REPLICA_CHECK_TIMEOUT_SECONDS = 3
+
+
+class ReadOnlySessionFactory:
+    """
+    Sessions for heavy read-only work: admin statistics, listings, exports
+    and broadcast recipient selection. They go to the read replica when one
+    is configured, answered its last health check and is at most
+    ``max_lag_seconds`` behind; otherwise to the primary. Call it like a
+    sessionmaker: ``async with read_only_session_factory() as session``.
+    """
+
+    def __init__(self, primary_factory: sessionmaker,
+                 replica_factory: Optional[sessionmaker] = None,
+                 max_lag_seconds: float = 30.0,
+                 check_interval_seconds: float = 15.0):
+        self.primary_factory = primary_factory
+        self.replica_factory = replica_factory
+        self.max_lag_seconds = max(max_lag_seconds, 0.0)
+        self.check_interval_seconds = max(check_interval_seconds, 1.0)
+        # None until the first health check
+        self._usable: Optional[bool] = None
+        self._lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica_factory is not None
+
+    @property
+    def replica_lag_seconds(self) -> Optional[float]:
+        return self._lag
+
+    def __call__(self):
+        return self._open(None)
+
+    def read_session(self, primary_session: AsyncSession):
+        """Like calling the factory, but falls back to ``primary_session`` instead of opening another."""
+        return self._open(primary_session)
+
+    @asynccontextmanager
+    async def _open(self, primary_session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        if not await self._replica_usable():
+            if primary_session is not None:
+                yield primary_session
+                return
+            async with self.primary_factory() as session:
+                yield session
+            return
+
+        async with self.replica_factory() as session:
+            try:
+                yield session
+            except DBAPIError as e:
+                if e.connection_invalidated:
+                    self._set_usable(False, f"connection lost: {e.orig}")
+                raise
+            except OSError as e:
+                self._set_usable(False, f"connection failed: {e}")
+                raise
+
+    async def _replica_usable(self) -> bool:
+        if self.replica_factory is None:
+            return False
+        if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+            async with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+                    await self._check_replica()
+        return bool(self._usable)
+
+    async def _check_replica(self) -> None:
+        try:
+            lag = await asyncio.wait_for(self._query_lag(), REPLICA_CHECK_TIMEOUT_SECONDS)
+        except Exception as e:
+            self._lag = None
+            self._set_usable(False, f"health check failed: {e!r}")
+        else:
+            self._lag = lag
+            if lag <= self.max_lag_seconds:
+                self._set_usable(True, f"lag {lag:.1f}s")
+            else:
+                self._set_usable(False, f"lag {lag:.1f}s exceeds {self.max_lag_seconds:.0f}s")
+        self._checked_at = time.monotonic()
+
+    async def _query_lag(self) -> float:
+        async with self.replica_factory() as session:
+            result = await session.execute(_REPLICA_LAG_SQL)
+            return float(result.scalar() or 0.0)
+
+    def _set_usable(self, usable: bool, reason: str) -> None:
+        if usable != self._usable:
+            if usable:
+                logging.info(f"Read replica: in use ({reason}).")
+            else:
+                logging.warning(f"Read replica: falling back to the primary ({reason}).")
+        self._usable = usable